@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compare the 'fast' low-resolution motion path against the 'full' OpenCV path:
+wall time per mode, Spearman rank correlation of window scores, best-start agreement
+and top-k overlap for each window length.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import click
+import numpy as np
+from src.analysis.engagement import feature_timeline, score_timeline, hop_for_stride
+
+
+def _ranks(x: np.ndarray) -> np.ndarray:
+    r = np.empty(len(x))
+    r[np.argsort(x, kind='stable')] = np.arange(len(x))
+    return r
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2:
+        return 1.0
+    ra, rb = _ranks(a), _ranks(b)
+    if np.std(ra) == 0 or np.std(rb) == 0:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+@click.command()
+@click.argument('inputs', nargs=-1, required=True)
+@click.option('--durations', type=str, default='20,30,45,60')
+@click.option('--stride', type=float, default=1.0)
+@click.option('--width', type=int, default=160)
+@click.option('--height', type=int, default=90)
+@click.option('--fps', type=float, default=10.0)
+@click.option('--top-k', type=int, default=10)
+def main(inputs, durations, stride, width, height, fps, top_k):
+    durs = [float(x) for x in durations.split(',') if x.strip()]
+    hop = hop_for_stride(stride)
+    for path in inputs:
+        t0 = time.perf_counter()
+        full = feature_timeline(path, hop_sec=hop, motion_mode='full')
+        t1 = time.perf_counter()
+        fast = feature_timeline(path, hop_sec=hop, motion_mode='fast', motion_width=width, motion_height=height, motion_fps=fps)
+        t2 = time.perf_counter()
+        per_dur = {}
+        for d in durs:
+            a, _ = score_timeline(full, d, stride)
+            b, _ = score_timeline(fast, d, stride)
+            n = min(len(a), len(b))
+            a, b = a[:n], b[:n]
+            k = min(top_k, n)
+            top_a = set(np.argsort(-a, kind='stable')[:k].tolist())
+            top_b = set(np.argsort(-b, kind='stable')[:k].tolist())
+            per_dur[str(d)] = {
+                'spearman': _spearman(a, b),
+                'best_start_full': float(np.argmax(a) * stride),
+                'best_start_fast': float(np.argmax(b) * stride),
+                f'top{k}_overlap': len(top_a & top_b) / max(1, k),
+            }
+        click.echo(json.dumps({
+            'input': path,
+            'full_sec': round(t1 - t0, 3),
+            'fast_sec': round(t2 - t1, 3),
+            'speedup': round((t1 - t0) / max(1e-9, t2 - t1), 2),
+            'durations': per_dur,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
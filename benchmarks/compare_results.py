@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Compare two run_benchmarks.py result files (e.g. parent commit vs. this commit): median wall
+time, CPU time and Python allocation peak per (fixture, case). Exits 1 if any case got slower
+than --threshold (relative), so it can gate CI.
+"""
+import json
+
+import click
+
+
+def _load(path: str) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _ratio(new: float, old: float) -> float:
+    return new / old if old > 0 else float('inf') if new > 0 else 1.0
+
+
+@click.command()
+@click.argument('baseline')
+@click.argument('candidate')
+@click.option('--threshold', type=float, default=0.15, help='Allowed relative slowdown of the median wall time')
+@click.option('--min-sec', type=float, default=0.01, help='Ignore cases faster than this in both runs (noise)')
+def main(baseline, candidate, threshold, min_sec):
+    old, new = _load(baseline), _load(candidate)
+    before = {(r['fixture'], r['case']): r for r in old['results']}
+    regressions = 0
+    click.echo(f'{old.get("commit", "?")[:12]} -> {new.get("commit", "?")[:12]}')
+    click.echo(f'{"fixture":>14} {"case":<24} {"wall old":>9} {"wall new":>9} {"x":>6} {"cpu x":>6} {"peak x":>6}')
+    for r in new['results']:
+        key = (r['fixture'], r['case'])
+        o = before.get(key)
+        if o is None:
+            click.echo(f'{key[0]:>14} {key[1]:<24} {"-":>9} {r["wall_sec"]["median"]:>9.3f}   (new)')
+            continue
+        w_old, w_new = o['wall_sec']['median'], r['wall_sec']['median']
+        wx = _ratio(w_new, w_old)
+        cx = _ratio(r['cpu_sec'], o['cpu_sec'])
+        px = _ratio(r['py_peak_mb'], o['py_peak_mb'])
+        slow = wx > 1 + threshold and max(w_old, w_new) >= min_sec
+        regressions += slow
+        flag = '  SLOWER' if slow else ''
+        click.echo(f'{key[0]:>14} {key[1]:<24} {w_old:>9.3f} {w_new:>9.3f} {wx:>6.2f} {cx:>6.2f} {px:>6.2f}{flag}')
+    if old.get('machine') != new.get('machine'):
+        click.echo('note: results come from different machines/toolchains', err=True)
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
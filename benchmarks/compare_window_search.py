@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Compare the coarse-to-fine window search against the exhaustive scan at a fine stride:
+wall time of best_window / top_windows_multi per mode, and whether the coarse-to-fine best start
+(and picked clips) match the exhaustive ones. Without inputs, runs on synthetic feature timelines
+of the given lengths (the scan cost depends only on timeline length, not on the media); --seeds
+repeats each length with independent timelines. A final summary gives the best-start agreement
+rate and the largest start delta over every source and duration.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import click
+import numpy as np
+from src.analysis.engagement import FeatureTimeline, best_window, feature_timeline, hop_for_stride, top_windows_multi
+
+
+def _synthetic(hours: float, hop: float, seed: int) -> FeatureTimeline:
+    # loudness and motion that drift over a few seconds, like speech and camera activity
+    rng = np.random.default_rng(seed)
+    n = int(hours * 3600 / hop)
+    k = max(1, int(5.0 / hop))
+    level = np.convolve(rng.standard_normal(n), np.ones(k) / k, mode='same')
+    motion = np.abs(np.convolve(rng.standard_normal(n), np.ones(2 * k) / (2 * k), mode='same'))
+    return FeatureTimeline(
+        hop_sec=hop, energy=np.exp(4 * level) * 1000.0, samples=np.full(n, 1000.0),
+        motion=motion * 10.0, frames=np.full(n, 1.0),
+    )
+
+
+def _timed(fn, repeat: int):
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+@click.command()
+@click.argument('inputs', nargs=-1)
+@click.option('--hours', type=str, default='1,3,6', help='Synthetic timeline lengths when no inputs are given')
+@click.option('--durations', type=str, default='20,30,45,60')
+@click.option('--stride', type=float, default=0.1)
+@click.option('--coarse-factor', type=int, default=8)
+@click.option('--top-k', type=int, default=8)
+@click.option('--max-clips', type=int, default=10)
+@click.option('--repeat', type=int, default=5)
+@click.option('--seed', type=int, default=0)
+@click.option('--seeds', type=int, default=1, help='Synthetic timelines per length (seed, seed+1, ...)')
+def main(inputs, hours, durations, stride, coarse_factor, top_k, max_clips, repeat, seed, seeds):
+    durs = [float(x) for x in durations.split(',') if x.strip()]
+    hop = hop_for_stride(stride)
+    if inputs:
+        sources = [(p, feature_timeline(p, hop_sec=hop, motion_mode='fast')) for p in inputs]
+    else:
+        sources = [
+            (f'synthetic_{h}h_seed{s}', _synthetic(float(h), hop, s))
+            for h in hours.split(',') if h.strip() for s in range(seed, seed + max(1, seeds))
+        ]
+    deltas = []
+    for name, tl in sources:
+        per_dur = {}
+        for d in durs:
+            t_ex, (s_ex, _) = _timed(lambda: best_window(None, d, stride, timeline=tl), repeat)
+            t_cf, (s_cf, _) = _timed(lambda: best_window(None, d, stride, timeline=tl, coarse_factor=coarse_factor, top_k=top_k), repeat)
+            per_dur[str(d)] = {
+                'best_start_exhaustive': round(s_ex, 3),
+                'best_start_coarse': round(s_cf, 3),
+                'start_delta_sec': round(abs(s_cf - s_ex), 3),
+                'speedup': round(t_ex / max(1e-9, t_cf), 2),
+            }
+            deltas.append(abs(s_cf - s_ex))
+        t_ex, multi_ex = _timed(lambda: top_windows_multi(None, durs, stride, max_clips, timeline=tl), repeat)
+        t_cf, multi_cf = _timed(
+            lambda: top_windows_multi(None, durs, stride, max_clips, timeline=tl, coarse_factor=coarse_factor, top_k=top_k),
+            repeat,
+        )
+        same = {(round(s, 3), d) for s, d, _ in multi_ex} & {(round(s, 3), d) for s, d, _ in multi_cf}
+        click.echo(json.dumps({
+            'input': name,
+            'duration_sec': round(tl.duration_sec, 1),
+            'stride_sec': stride,
+            'coarse_factor': coarse_factor,
+            'best_window': per_dur,
+            'top_windows_multi': {
+                'exhaustive_sec': round(t_ex, 4),
+                'coarse_sec': round(t_cf, 4),
+                'speedup': round(t_ex / max(1e-9, t_cf), 2),
+                'same_clips': f'{len(same)}/{len(multi_ex)}',
+            },
+        }, indent=2))
+    agree = sum(d < 1e-6 for d in deltas)
+    click.echo(json.dumps({
+        'summary': {
+            'coarse_factor': coarse_factor,
+            'refine_top_k': top_k,
+            'stride_sec': stride,
+            'best_start_agreement': f'{agree}/{len(deltas)}',
+            'max_start_delta_sec': round(max(deltas, default=0.0), 3),
+        },
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
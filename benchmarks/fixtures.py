@@ -0,0 +1,98 @@
+"""
+Deterministic synthetic media for the benchmarks: ffmpeg lavfi test patterns with a 440 Hz tone
+gated into speech-like bursts and silence gaps. Fixtures are generated once into a cache
+directory and named after their spec, so every run (and every commit) measures the same bytes.
+"""
+import os
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+DEFAULT_FIXTURE_DIR = 'data/bench/fixtures'
+
+
+@dataclass(frozen=True)
+class FixtureSpec:
+    name: str
+    duration: float
+    width: int
+    height: int
+    fps: int = 30
+    sample_rate: int = 44100
+    tone_sec: float = 3.0  # tone burst length
+    gap_sec: float = 0.8   # silence after each burst
+
+    @property
+    def filename(self) -> str:
+        return (
+            f'{self.name}_{int(self.duration)}s_{self.width}x{self.height}_{self.fps}fps'
+            f'_{self.sample_rate}hz_{self.tone_sec:g}-{self.gap_sec:g}.mp4'
+        )
+
+
+FIXTURES: Dict[str, FixtureSpec] = {
+    f.name: f for f in (
+        FixtureSpec('short_720p', 30, 1280, 720),
+        FixtureSpec('medium_1080p', 120, 1920, 1080),
+        FixtureSpec('long_480p', 600, 854, 480, fps=25, tone_sec=5.0, gap_sec=1.2),
+        FixtureSpec('square_48k', 60, 1080, 1080, sample_rate=48000, tone_sec=2.0, gap_sec=0.5),
+    )
+}
+
+
+def fixture_command(spec: FixtureSpec, out_path: str) -> List[str]:
+    period = spec.tone_sec + spec.gap_sec
+    gate = f"volume='if(lt(mod(t,{period:g}),{spec.tone_sec:g}),1,0)':eval=frame"
+    return [
+        'ffmpeg', '-v', 'error', '-nostdin', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size={spec.width}x{spec.height}:rate={spec.fps}:duration={spec.duration:g}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate={spec.sample_rate}:duration={spec.duration:g}',
+        '-af', gate, '-ac', '2',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', str(spec.fps * 2), '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '128k', '-shortest', '-map_metadata', '-1', '-fflags', '+bitexact',
+        out_path,
+    ]
+
+
+def ensure_fixture(spec: FixtureSpec, root: str = DEFAULT_FIXTURE_DIR) -> str:
+    """Path of the fixture for spec, generating it if missing."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, spec.filename)
+    if not os.path.exists(path):
+        tmp = path + '.part.mp4'
+        subprocess.run(fixture_command(spec, tmp), check=True)
+        os.replace(tmp, path)
+    return path
+
+
+def synthetic_transcript(spec: FixtureSpec, word_sec: float = 0.35, words_per_sentence: int = 8) -> dict:
+    """
+    Whisper-shaped word-timestamp transcript aligned to the fixture's tone bursts (one segment per
+    burst, a sentence end every words_per_sentence words). Stands in for Whisper when it is absent.
+    """
+    period = spec.tone_sec + spec.gap_sec
+    segments = []
+    n = 0
+    t0 = 0.0
+    while t0 + 0.1 < spec.duration:
+        t_end = min(t0 + spec.tone_sec, spec.duration)
+        words = []
+        t = t0
+        while t + word_sec <= t_end:
+            n += 1
+            text = f' word{n}' + ('.' if n % words_per_sentence == 0 else '')
+            words.append({'word': text, 'start': round(t, 3), 'end': round(t + word_sec * 0.9, 3)})
+            t += word_sec
+        if words:
+            segments.append({
+                'start': words[0]['start'],
+                'end': words[-1]['end'],
+                'text': ''.join(w['word'] for w in words),
+                'words': words,
+            })
+        t0 += period
+    return {'text': ''.join(s['text'] for s in segments), 'segments': segments, 'language': 'en'}
+
+
+def describe(spec: FixtureSpec) -> dict:
+    return asdict(spec)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Stage benchmarks on deterministic synthetic fixtures (see benchmarks/fixtures.py).
+
+Each case is timed over --repeat runs (wall and CPU, including ffmpeg child processes) and then
+run once more under tracemalloc for the Python/NumPy allocation peak. Results go to a JSON file
+keyed by git commit; compare two files with benchmarks/compare_results.py.
+Whisper is never loaded: subtitle burn-in uses a synthetic word-timestamp transcript.
+"""
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import click
+import numpy as np
+
+from benchmarks.fixtures import FIXTURES, DEFAULT_FIXTURE_DIR, FixtureSpec, ensure_fixture, synthetic_transcript, describe
+from src.analysis.engagement import _score_series, feature_timeline, hop_for_stride, top_windows_multi
+from src.analysis.semantic import ActivityMap, detect_silences, pick_idea_endpoint, slice_transcript
+from src.edit.formatters import CanvasOutput, cut_segment, render_canvases, to_vertical
+from src.edit.subtitles import burn_subtitles_karaoke
+
+SCHEMA_VERSION = 1
+CLIP_SEC = 10.0  # length of the clip the render-side cases work on
+
+
+@dataclass
+class Ctx:
+    spec: FixtureSpec
+    path: str
+    work: str
+    state: Dict[str, Any]
+
+    def out(self, name: str) -> str:
+        return os.path.join(self.work, name)
+
+    @property
+    def clip_start(self) -> float:
+        return min(5.0, self.spec.duration / 4)
+
+
+@dataclass
+class Case:
+    run: Callable[[Ctx], Any]
+    setup: Optional[Callable[[Ctx], None]] = None
+
+
+def _setup_timeline(ctx: Ctx) -> None:
+    ctx.state['timeline'] = feature_timeline(ctx.path, hop_sec=hop_for_stride(1.0))
+
+
+def _setup_fine_timeline(ctx: Ctx) -> None:
+    ctx.state['fine_timeline'] = feature_timeline(ctx.path, hop_sec=hop_for_stride(0.25))
+
+
+def _setup_endpoints(ctx: Ctx) -> None:
+    ctx.state['silences'] = ActivityMap(detect_silences(ctx.path))
+    ctx.state['transcript'] = synthetic_transcript(ctx.spec)
+
+
+def _run_endpoints(ctx: Ctx) -> int:
+    # one lookup per second of source, as a long multi-clip run would do
+    starts = np.arange(0.0, max(1.0, ctx.spec.duration - 20.0), 1.0)
+    for s in starts.tolist():
+        pick_idea_endpoint(ctx.state['transcript'], ctx.state['silences'], start_hint=s, min_dur=5.0, max_dur=20.0)
+    return len(starts)
+
+
+def _setup_clip(ctx: Ctx) -> None:
+    clip = ctx.out('clip.mp4')
+    cut_segment(ctx.path, clip, ctx.clip_start, CLIP_SEC)
+    ctx.state['clip'] = clip
+    ctx.state['clip_transcript'] = slice_transcript(synthetic_transcript(ctx.spec), ctx.clip_start, CLIP_SEC)
+
+
+CASES: Dict[str, Case] = {
+    'score_series': Case(run=lambda ctx: _score_series(ctx.path, window_sec=2.0, stride_sec=0.5)),
+    'top_windows_multi': Case(
+        setup=_setup_timeline,
+        run=lambda ctx: top_windows_multi(
+            ctx.path, durations=[20, 30, 45, 60], stride_sec=1.0, max_clips=10, timeline=ctx.state['timeline'],
+        ),
+    ),
+    # 0.25 s stride, every position vs coarse-to-fine (8x coarser, then refined around the peaks)
+    'top_windows_multi_fine': Case(
+        setup=_setup_fine_timeline,
+        run=lambda ctx: top_windows_multi(
+            ctx.path, durations=[20, 30, 45, 60], stride_sec=0.25, max_clips=10, timeline=ctx.state['fine_timeline'],
+        ),
+    ),
+    'top_windows_multi_coarse': Case(
+        setup=_setup_fine_timeline,
+        run=lambda ctx: top_windows_multi(
+            ctx.path, durations=[20, 30, 45, 60], stride_sec=0.25, max_clips=10, timeline=ctx.state['fine_timeline'],
+            coarse_factor=8,
+        ),
+    ),
+    'detect_silences': Case(run=lambda ctx: detect_silences(ctx.path)),
+    'pick_idea_endpoint': Case(setup=_setup_endpoints, run=_run_endpoints),
+    'cut_segment': Case(run=lambda ctx: cut_segment(ctx.path, ctx.out('cut.mp4'), ctx.clip_start, CLIP_SEC)),
+    'cut_segment_smart': Case(run=lambda ctx: cut_segment(ctx.path, ctx.out('cut_smart.mp4'), ctx.clip_start, CLIP_SEC, mode='smart')),
+    'to_vertical': Case(setup=_setup_clip, run=lambda ctx: to_vertical(ctx.state['clip'], ctx.out('vertical.mp4'))),
+    # full-resolution background blur, for the per-rendered-second cost of the downscaled blur
+    'to_vertical_fullblur': Case(
+        setup=_setup_clip, run=lambda ctx: to_vertical(ctx.state['clip'], ctx.out('vertical_full.mp4'), bg_downscale=1),
+    ),
+    # three profiles (9:16, 9:16 at 25 fps, 1:1) from one decode; compare with 3x to_vertical
+    'render_canvases_3': Case(
+        setup=_setup_clip,
+        run=lambda ctx: render_canvases(ctx.state['clip'], [
+            CanvasOutput(ctx.out('p_tall.mp4'), 1080, 1920, 30, 25),
+            CanvasOutput(ctx.out('p_tall25.mp4'), 1080, 1920, 25, 25),
+            CanvasOutput(ctx.out('p_square.mp4'), 1080, 1080, 30, 20),
+        ]),
+    ),
+    'burn_subtitles_karaoke': Case(
+        setup=_setup_clip,
+        run=lambda ctx: burn_subtitles_karaoke(
+            ctx.state['clip'], ctx.out('subs.mp4'), transcript=ctx.state['clip_transcript'],
+        ),
+    ),
+}
+
+
+def _cpu() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def measure(case: Case, ctx: Ctx, repeat: int) -> Dict[str, Any]:
+    if case.setup:
+        case.setup(ctx)
+    walls, cpus = [], []
+    for _ in range(repeat):
+        gc.collect()
+        c0, t0 = _cpu(), time.perf_counter()
+        case.run(ctx)
+        walls.append(time.perf_counter() - t0)
+        cpus.append(_cpu() - c0)
+    gc.collect()
+    tracemalloc.start()
+    case.run(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'wall_sec': {'min': round(min(walls), 4), 'median': round(statistics.median(walls), 4), 'all': [round(w, 4) for w in walls]},
+        'cpu_sec': round(statistics.median(cpus), 4),
+        'py_peak_mb': round(peak / 2**20, 2),
+        # high-water marks so far in this process / its children (ru_maxrss is KiB on Linux)
+        'maxrss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'child_maxrss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _ffmpeg_version() -> Optional[str]:
+    try:
+        out = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, check=True).stdout
+        return out.splitlines()[0]
+    except Exception:
+        return None
+
+
+@click.command()
+@click.option('--cases', type=str, default=','.join(CASES), help='Comma-separated case names')
+@click.option('--fixtures', 'fixture_names', type=str, default='short_720p,medium_1080p', help=f'Any of {",".join(FIXTURES)}')
+@click.option('--repeat', type=int, default=3)
+@click.option('--fixture-dir', type=str, default=DEFAULT_FIXTURE_DIR)
+@click.option('--out', 'out_path', type=str, default=None, help='Default: data/bench/results/<commit>.json')
+def main(cases, fixture_names, repeat, fixture_dir, out_path):
+    case_names = [c.strip() for c in cases.split(',') if c.strip()]
+    unknown = [c for c in case_names if c not in CASES]
+    if unknown:
+        raise click.ClickException(f'Unknown cases: {unknown}')
+    specs = []
+    for name in (f.strip() for f in fixture_names.split(',') if f.strip()):
+        if name not in FIXTURES:
+            raise click.ClickException(f'Unknown fixture {name!r}')
+        specs.append(FIXTURES[name])
+
+    commit = _git('rev-parse', 'HEAD')
+    results = []
+    for spec in specs:
+        path = ensure_fixture(spec, fixture_dir)
+        for name in case_names:
+            work = tempfile.mkdtemp(prefix='bench_')
+            try:
+                res = measure(CASES[name], Ctx(spec=spec, path=path, work=work, state={}), max(1, repeat))
+            finally:
+                shutil.rmtree(work, ignore_errors=True)
+            results.append({'case': name, 'fixture': spec.name, **res})
+            click.echo(f'{spec.name:>14} {name:<24} median {res["wall_sec"]["median"]:.3f}s  cpu {res["cpu_sec"]:.3f}s  py_peak {res["py_peak_mb"]} MB', err=True)
+
+    report = {
+        'schema': SCHEMA_VERSION,
+        'commit': commit,
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'ffmpeg': _ffmpeg_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'repeat': repeat,
+        'fixtures': {s.name: describe(s) for s in specs},
+        'results': results,
+    }
+    out_path = out_path or os.path.join('data/bench/results', f'{(commit or "unknown")[:12]}.json')
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    click.echo(out_path)
+
+
+if __name__ == '__main__':
+    main()
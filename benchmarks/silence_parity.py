@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Parity and speed check for the NumPy silence detector against pydub.silence.detect_silence
+on synthetic tone/silence fixtures (no media files needed). Requires pydub for the reference.
+Intervals must match in count, with every boundary within TOLERANCE_MS (pydub maps
+milliseconds to frames with float math, which can shift a boundary by 1 ms at 44.1 kHz).
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import click
+import numpy as np
+from pydub import AudioSegment, silence
+
+from src.analysis.semantic import silences_from_ms_energy
+from src.analysis.stream import RunningBins
+
+TOLERANCE_MS = 1.0
+
+
+def tone_silence_fixture(seed: int, sr: int, segments: int = 12, max_seg_sec: float = 2.0) -> np.ndarray:
+    """Stereo int16 PCM alternating 440 Hz tone with silence / low-level tone gaps."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for i in range(segments):
+        t = np.arange(int(rng.uniform(0.2, max_seg_sec) * sr)) / sr
+        amp = 0.5 if i % 2 == 0 else float(rng.choice([0.0, 0.003, 0.05]))
+        parts.append(amp * np.sin(2 * np.pi * 440.0 * t))
+    y = np.concatenate(parts)
+    return (np.stack([y, 0.7 * y], axis=1) * 32767).astype(np.int16)
+
+
+def numpy_silences(pcm: np.ndarray, sr: int, min_len_ms: int, db_drop: float):
+    bins = RunningBins(sr, 1000, dtype=np.float32)
+    f = pcm.astype(np.float64) / 32768.0
+    block = sr * 10
+    for i in range(0, len(f), block):
+        bins.feed(np.square(f[i:i + block]).mean(axis=1))
+    e, c = bins.finish()
+    return silences_from_ms_energy(e, c, min_len_ms, db_drop)
+
+
+def pydub_silences(pcm: np.ndarray, sr: int, min_len_ms: int, db_drop: float):
+    audio = AudioSegment(pcm.tobytes(), frame_rate=sr, sample_width=2, channels=pcm.shape[1])
+    sils = silence.detect_silence(audio, min_silence_len=min_len_ms, silence_thresh=audio.dBFS - db_drop)
+    return [(s / 1000.0, e / 1000.0) for s, e in sils]
+
+
+def max_boundary_diff_ms(a, b) -> float:
+    """Largest boundary difference in ms between two interval lists (inf if counts differ)."""
+    if len(a) != len(b):
+        return float('inf')
+    if not a:
+        return 0.0
+    return float(np.max(np.abs(np.asarray(a) - np.asarray(b))) * 1000.0)
+
+
+@click.command()
+@click.option('--seeds', type=int, default=15, help='Fixtures per sample rate for the parity check')
+@click.option('--long-minutes', type=float, default=10.0, help='Length of the timing fixture')
+@click.option('--min-len-ms', type=int, default=400)
+@click.option('--db-drop', type=float, default=16.0)
+@click.option('--out', 'out_path', type=str, default=None, help='Write results as JSON')
+def main(seeds, long_minutes, min_len_ms, db_drop, out_path):
+    mismatches = []
+    checked = 0
+    for sr in (16000, 44100, 48000):
+        for seed in range(seeds):
+            pcm = tone_silence_fixture(seed, sr)
+            ref = pydub_silences(pcm, sr, min_len_ms, db_drop)
+            ours = numpy_silences(pcm, sr, min_len_ms, db_drop)
+            checked += 1
+            if max_boundary_diff_ms(ref, ours) > TOLERANCE_MS + 1e-6:
+                mismatches.append({'sr': sr, 'seed': seed, 'pydub': ref, 'numpy': ours})
+
+    sr = 44100
+    segments = max(2, int(long_minutes * 60 / 1.1))
+    pcm = tone_silence_fixture(0, sr, segments=segments)
+    t0 = time.perf_counter()
+    ours = numpy_silences(pcm, sr, min_len_ms, db_drop)
+    t1 = time.perf_counter()
+    ref = pydub_silences(pcm, sr, min_len_ms, db_drop)
+    t2 = time.perf_counter()
+
+    result = {
+        'parity_fixtures': checked,
+        'parity_mismatches': len(mismatches),
+        'mismatches': mismatches[:5],
+        'long_fixture_sec': round(len(pcm) / sr, 1),
+        'numpy_sec': round(t1 - t0, 3),
+        'pydub_sec': round(t2 - t1, 3),
+        'speedup': round((t2 - t1) / max(1e-9, t1 - t0), 1),
+        'long_fixture_intervals': len(ours),
+        'long_fixture_max_diff_ms': max_boundary_diff_ms(ref, ours),
+    }
+    text = json.dumps(result, indent=2)
+    click.echo(text)
+    if out_path:
+        with open(out_path, 'w') as f:
+            f.write(text)
+    if mismatches or result['long_fixture_max_diff_ms'] > TOLERANCE_MS + 1e-6:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
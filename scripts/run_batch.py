@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+# Ensure project root is on sys.path when running as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import click
+from src.pipeline import load_config
+from src.batch import collect_inputs, run_batch
+
+@click.command()
+@click.option('--inputs', 'spec', type=str, required=True, help='Directory, glob (e.g. "data/raw/**/*.mp4") or manifest (.txt/.json/.jsonl)')
+@click.option('--profile', type=str, default='tiktok')
+@click.option('--config', 'config_path', type=str, default='configs/pipeline.yaml')
+@click.option('--durations', type=str, default='20,30,45,60', help='Comma-separated durations in seconds')
+@click.option('--max-clips', type=int, default=3)
+@click.option('--stride', type=float, default=1.0)
+@click.option('--no-idea-end', is_flag=True, help='Use fixed window durations instead of idea-aware ends')
+@click.option('--min-dur', type=float, default=20.0)
+@click.option('--max-dur', type=float, default=120.0)
+@click.option('--tail-pad', type=float, default=1.5)
+@click.option('--head-pad', type=float, default=1.5)
+@click.option('--no-subtitles', is_flag=True)
+@click.option('--audio-only', is_flag=True)
+@click.option('--single-pass', is_flag=True)
+@click.option('--cut-mode', type=click.Choice(['copy', 'smart', 'accurate']), default=None)
+@click.option('--profiles', 'extra_profiles', type=str, default=None, help='Comma-separated extra profiles rendered from the same decode')
+@click.option('--joint-selection', is_flag=True, help='Choose clip starts and ends together on sentence/silence boundaries')
+@click.option('--proxy', is_flag=True, help='Analyze a low-res mono-16k proxy; render from the original')
+@click.option('--coarse-factor', type=int, default=None, help='Score windows at this multiple of the stride, then refine the best regions')
+@click.option('--no-cache', is_flag=True)
+@click.option('--no-resume', is_flag=True, help='Redo every step even if a previous run of the same inputs completed it')
+@click.option('--ingest-workers', type=int, default=2, help='Concurrent yt-dlp processes for URL inputs')
+@click.option('--analysis-workers', type=int, default=None, help='Default: half the CPU cores')
+@click.option('--transcribe-workers', type=int, default=1)
+@click.option('--lazy-transcript', is_flag=True, help='Transcribe only the ranges idea-end selection and subtitles need')
+@click.option('--whisper-workers', type=int, default=None, help='Processes per transcription (silence-split chunks; 0 = auto)')
+@click.option('--render-workers', type=int, default=2, help='Concurrent encoders')
+@click.option('--summary', 'summary_path', type=str, default='data/outputs/batch_summary.json')
+def main(spec, profile, config_path, durations, max_clips, stride, no_idea_end, min_dur, max_dur, tail_pad, head_pad,
+         no_subtitles, audio_only, single_pass, cut_mode, extra_profiles, whisper_workers, lazy_transcript, joint_selection, proxy, coarse_factor, no_cache, no_resume, ingest_workers, analysis_workers, transcribe_workers,
+         render_workers, summary_path):
+    items = collect_inputs(spec)
+    if not items:
+        raise click.ClickException(f'No inputs matched {spec!r}')
+    try:
+        dur_list = [float(x.strip()) for x in durations.split(',') if x.strip()]
+    except Exception:
+        raise click.ClickException('Invalid --durations format; use comma-separated seconds, e.g. 20,30,45,60')
+
+    profile_list = [p.strip() for p in extra_profiles.split(',') if p.strip()] if extra_profiles is not None else None
+    conf = load_config(config_path, profile, profile_list)
+    if no_subtitles:
+        conf.subs_enabled = False
+    if single_pass:
+        conf.single_pass = True
+    if cut_mode:
+        conf.cut_mode = cut_mode
+    if whisper_workers is not None:
+        conf.transcribe_workers = max(0, whisper_workers)
+    if lazy_transcript:
+        conf.lazy_transcript = True
+    if joint_selection:
+        conf.joint_selection = True
+    if proxy:
+        conf.proxy = True
+    if coarse_factor is not None:
+        conf.coarse_factor = max(1, coarse_factor)
+    if no_resume:
+        conf.resume = False
+    conf.render_workers = 1  # concurrency comes from --render-workers across files
+
+    workers = {'ingest': ingest_workers, 'transcription': transcribe_workers, 'render': render_workers}
+    if analysis_workers:
+        workers['analysis'] = analysis_workers
+    defaults = {
+        'durations': dur_list, 'max_clips': max_clips, 'stride_sec': stride, 'idea_end': not no_idea_end,
+        'min_dur': min_dur, 'max_dur': max_dur, 'tail_pad_sec': tail_pad, 'head_pad_sec': head_pad,
+    }
+    results = run_batch(
+        items, conf, defaults, workers=workers, use_cache=not no_cache,
+        export_audio_only=audio_only, summary_path=summary_path,
+    )
+    for r in results:
+        if r.status == 'done':
+            for p in r.outputs:
+                click.echo(p)
+        else:
+            click.echo(f'FAILED {r.source} [{r.failed_stage}]: {r.error}', err=True)
+    click.echo(f'Summary: {summary_path}')
+
+if __name__ == '__main__':
+    main()
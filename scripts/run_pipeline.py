@@ -8,6 +8,15 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import click
 from src.pipeline import run_pipeline, run_pipeline_multi
 
+
+def _print_progress(ev):
+    if ev['event'] == 'stage_end':
+        click.echo(f"[{ev['stage']}] {ev['wall_sec']:.2f}s" + (f" ({ev['error']})" if ev.get('error') else ''), err=True)
+    elif ev['event'] == 'step_skipped':
+        click.echo(f"[{ev['step']}] up to date, skipped", err=True)
+    elif ev['event'] == 'ffmpeg' and ev.get('speed') is not None:
+        click.echo(f"  ffmpeg {ev['label']}: {ev['speed']}x realtime", err=True)
+
 @click.command()
 @click.option('--input', 'input_path', type=str, default=None, help='Local input video path')
 @click.option('--profile', type=str, default='tiktok')
@@ -24,8 +33,27 @@ from src.pipeline import run_pipeline, run_pipeline_multi
 @click.option('--min-dur', type=float, default=20.0, help='Minimum duration bound for idea-aware end (seconds)')
 @click.option('--max-dur', type=float, default=120.0, help='Maximum duration bound for idea-aware end (seconds)')
 @click.option('--audio-only', is_flag=True, help='Export audio files (mp3) instead of video')
-def main(input_path, profile, config_path, duration, yt_query, no_subtitles, multi, max_clips, durations, stride, tail_pad, head_pad, min_dur, max_dur, audio_only):
+@click.option('--no-cache', is_flag=True, help='Bypass the on-disk analysis cache')
+@click.option('--streaming', is_flag=True, help='Bounded-memory block-wise analysis for very long sources')
+@click.option('--single-pass', is_flag=True, help='Cut, composite and burn subtitles in one frame-accurate encode')
+@click.option('--cut-mode', type=click.Choice(['copy', 'smart', 'accurate']), default=None, help='Multi-pass cut: keyframe copy, smart (re-encode only the partial GOP) or full re-encode')
+@click.option('--profiles', 'extra_profiles', type=str, default=None, help='Comma-separated extra profiles rendered from the same decode, e.g. shorts,reels,square')
+@click.option('--whisper-workers', type=int, default=None, help='Transcribe silence-split chunks in this many processes (0 = auto, 1 = one pass)')
+@click.option('--lazy-transcript', is_flag=True, help='Transcribe only the ranges idea-end selection and subtitles need')
+@click.option('--coarse-factor', type=int, default=None, help='Score windows at this multiple of the stride, then refine the best regions (1 = every position)')
+@click.option('--render-workers', type=int, default=None, help='Clips rendered concurrently in multi mode')
+@click.option('--ffmpeg-threads', type=int, default=None, help='Thread cap per ffmpeg render (0 = auto)')
+@click.option('--joint-selection', is_flag=True, help='Choose clip starts and ends together on sentence/silence boundaries')
+@click.option('--proxy', is_flag=True, help='Analyze a low-res mono-16k proxy; render from the original')
+@click.option('--no-resume', is_flag=True, help='Redo every step even if a previous run of the same inputs completed it')
+@click.option('--report', 'report_path', type=str, default=None, help='Write a JSON run report (per-stage time, memory, I/O, ffmpeg speed)')
+@click.option('--progress', is_flag=True, help='Print stage progress to stderr')
+def main(input_path, profile, config_path, duration, yt_query, no_subtitles, multi, max_clips, durations, stride, tail_pad, head_pad, min_dur, max_dur, audio_only, no_cache, streaming, single_pass, cut_mode, extra_profiles, whisper_workers, lazy_transcript, coarse_factor, render_workers, ffmpeg_threads, joint_selection, proxy, no_resume, report_path, progress):
     subs_override = False if no_subtitles else None
+    profile_list = [p.strip() for p in extra_profiles.split(',') if p.strip()] if extra_profiles is not None else None
+    on_event = _print_progress if progress else None
+    if render_workers is not None and not multi:
+        raise click.ClickException('--render-workers only applies with --multi (a single clip renders alone)')
     if multi:
         dur_list = None
         if durations:
@@ -48,6 +76,21 @@ def main(input_path, profile, config_path, duration, yt_query, no_subtitles, mul
             tail_pad_sec=tail_pad,
             head_pad_sec=head_pad,
             export_audio_only=audio_only,
+            use_cache=not no_cache,
+            streaming=streaming,
+            single_pass=single_pass,
+            render_workers=render_workers,
+            ffmpeg_threads=ffmpeg_threads,
+            joint_selection=joint_selection,
+            proxy=proxy,
+            cut_mode=cut_mode,
+            profiles=profile_list,
+            transcribe_workers=whisper_workers,
+            lazy_transcript=lazy_transcript,
+            coarse_factor=coarse_factor,
+            resume=not no_resume,
+            report_path=report_path,
+            on_event=on_event,
         )
         for p in paths:
             click.echo(p)
@@ -65,6 +108,20 @@ def main(input_path, profile, config_path, duration, yt_query, no_subtitles, mul
             tail_pad_sec=tail_pad,
             head_pad_sec=head_pad,
             export_audio_only=audio_only,
+            use_cache=not no_cache,
+            streaming=streaming,
+            single_pass=single_pass,
+            ffmpeg_threads=ffmpeg_threads,
+            joint_selection=joint_selection,
+            proxy=proxy,
+            cut_mode=cut_mode,
+            profiles=profile_list,
+            transcribe_workers=whisper_workers,
+            lazy_transcript=lazy_transcript,
+            coarse_factor=coarse_factor,
+            resume=not no_resume,
+            report_path=report_path,
+            on_event=on_event,
         )
         click.echo(path)
 
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+# Ensure project root is on sys.path when running as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import click
+from src.service import PipelineService, serve
+
+@click.command()
+@click.option('--config', 'config_path', type=str, default='configs/pipeline.yaml')
+@click.option('--host', type=str, default='127.0.0.1', help='Bind address (local only by default)')
+@click.option('--port', type=int, default=8765)
+@click.option('--workers', type=int, default=1, help='Concurrent pipeline jobs')
+@click.option('--max-queue', type=int, default=16, help='Jobs accepted before submissions get 503')
+@click.option('--keep-finished', type=int, default=256, help='Finished jobs kept for polling (oldest dropped first)')
+@click.option('--finished-ttl', type=float, default=24 * 3600.0, help='Seconds a finished job is kept for polling')
+@click.option('--models', type=str, default=None, help='Comma-separated Whisper models to keep loaded (default: config subtitles.model)')
+def main(config_path, host, port, workers, max_queue, keep_finished, finished_ttl, models):
+    preload = [m.strip() for m in models.split(',') if m.strip()] if models else None
+    service = PipelineService(
+        config_path=config_path,
+        workers=workers,
+        max_queue=max_queue,
+        preload_models=preload,
+        keep_finished=keep_finished,
+        finished_ttl=finished_ttl,
+    )
+    server = serve(service, host=host, port=port)
+    click.echo(f'Listening on http://{host}:{port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+if __name__ == '__main__':
+    main()
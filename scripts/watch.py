@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+# Ensure project root is on sys.path when running as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import click
+from src.pipeline import load_config
+from src.watch import watch
+
+@click.command()
+@click.option('--source', type=str, required=True, help='Recording being written (.ts/.mkv/.flv) or a directory of rolling segments')
+@click.option('--profile', type=str, default='tiktok')
+@click.option('--config', 'config_path', type=str, default='configs/pipeline.yaml')
+@click.option('--window', type=float, default=30.0, help='Engagement window length (seconds)')
+@click.option('--stride', type=float, default=1.0)
+@click.option('--min-dur', type=float, default=20.0, help='Earliest idea-end after the clip start')
+@click.option('--max-dur', type=float, default=30.0, help='Latest idea-end after the clip start (bounds latency)')
+@click.option('--min-score', type=float, default=1.0, help='Minimum window z-score to emit a clip')
+@click.option('--settle', type=float, default=5.0, help='Seconds a window must stay the local best before it is emitted')
+@click.option('--warmup', type=float, default=60.0, help='History needed before the first clip')
+@click.option('--idle-timeout', type=float, default=30.0, help='Stop after the source has not grown for this long')
+@click.option('--head-pad', type=float, default=0.0)
+@click.option('--tail-pad', type=float, default=0.5)
+@click.option('--no-subtitles', is_flag=True)
+@click.option('--audio-only', is_flag=True)
+@click.option('--render-workers', type=int, default=1)
+@click.option('--out-dir', type=str, default=None, help='Default: data/outputs/shorts/live/<name>_<start time>_<id>, one per session')
+def main(source, profile, config_path, window, stride, min_dur, max_dur, min_score, settle, warmup, idle_timeout,
+         head_pad, tail_pad, no_subtitles, audio_only, render_workers, out_dir):
+    conf = load_config(config_path, profile)
+    if no_subtitles:
+        conf.subs_enabled = False
+    conf.render_workers = max(1, render_workers)
+    watch(
+        source, conf, window_sec=window, stride_sec=stride, min_dur=min_dur, max_dur=max_dur,
+        min_score=min_score, settle_sec=settle, warmup_sec=warmup, idle_timeout_sec=idle_timeout,
+        head_pad_sec=head_pad, tail_pad_sec=tail_pad, export_audio_only=audio_only, out_dir=out_dir,
+        on_clip=lambda path, start, dur: click.echo(f'{path}\t{start:.2f}\t{dur:.2f}'),
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+# Content-addressed on-disk cache for analysis artifacts (feature timelines, transcripts,
+# silence maps, probe results). Entries are keyed by the source file's content hash plus the
+# parameters that produced them, stored as zlib-compressed pickles and evicted LRU by size.
+
+DEFAULT_CACHE_DIR = 'data/cache'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+_HASH_CHUNK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """Return the blake2b hex digest of a file's content."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.enabled = bool(enabled)
+        self._digests: Dict[str, str] = {}
+
+    def digest(self, path: str) -> str:
+        """
+        Content hash of path. The (path, size, mtime) -> digest mapping is itself cached, even when
+        the cache is disabled (it cannot go stale), so an unchanged file is not re-read on every run.
+        """
+        st = os.stat(path)
+        stat_key = f'{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}'
+        if stat_key in self._digests:
+            return self._digests[stat_key]
+        memo_key = hashlib.sha1(f'stat:{stat_key}'.encode()).hexdigest()
+        digest = self._load(memo_key)
+        if digest is None:
+            digest = file_digest(path)
+            try:
+                self._store(memo_key, digest)
+            except OSError:
+                pass  # unwritable cache dir: memoised for this process only
+        self._digests[stat_key] = digest
+        return digest
+
+    def key(self, path: str, kind: str, **params) -> str:
+        payload = json.dumps({'src': self.digest(path), 'kind': kind, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f'{key}.bin')
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return self._load(key)
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled or value is None:
+            return
+        self._store(key, value)
+
+    def _load(self, key: str) -> Optional[Any]:
+        p = self._entry_path(key)
+        try:
+            with open(p, 'rb') as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # corrupt or incompatible entry; drop it
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(p)  # bump recency for LRU eviction
+        except OSError:
+            pass
+        return value
+
+    def _store(self, key: str, value: Any) -> None:
+        p = self._entry_path(key)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(p), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, p)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._evict()
+
+    def fetch(self, path: str, kind: str, compute: Callable[[], Any], **params) -> Any:
+        """Return the cached artifact for (path content, kind, params), computing it on a miss."""
+        if not self.enabled:
+            return compute()
+        k = self.key(path, kind, **params)
+        value = self.get(k)
+        if value is None:
+            value = compute()
+            self.put(k, value)
+        return value
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for dirpath, _dirs, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith('.bin'):
+                    continue
+                p = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _mtime, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
@@ -1,88 +1,388 @@
-from typing import Tuple, List, Sequence
+from typing import Tuple, List, Sequence, Optional
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import cached_property
+import math
+import subprocess
 import numpy as np
 import librosa
 import cv2
 
+from src.analysis.stream import stream_audio_features, DEFAULT_BLOCK_SEC
+from src.metrics import reap
+
 # Simple engagement heuristic: combine short-window audio RMS energy with frame diff-based motion
 
+AUDIO_WEIGHT = 0.6
+MOTION_WEIGHT = 0.4
+MAX_HOP_SEC = 0.5
+
+# Motion analysis modes: 'full' decodes every frame at source resolution through OpenCV;
+# 'fast' pipes small grayscale frames at a reduced fps out of ffmpeg and diffs them in NumPy blocks.
+MOTION_MODES = ('full', 'fast')
+FAST_MOTION_WIDTH = 160
+FAST_MOTION_HEIGHT = 90
+FAST_MOTION_FPS = 10.0
+_FAST_BLOCK_FRAMES = 256
+
+# Coarse-to-fine window search: windows are scored at coarse_factor x the stride first, and only
+# the neighbourhoods of the best coarse peaks are rescored at the stride itself. A coarse step is
+# kept to at most COARSE_MAX_WINDOW_FRACTION of the window, so neighbouring coarse windows share
+# most of their span and a fine peak shows up in the coarse scores around it.
+COARSE_FACTOR = 8
+REFINE_TOP_K = 8
+COARSE_MAX_WINDOW_FRACTION = 0.25
+
+
+@dataclass
+class FeatureTimeline:
+    """
+    Per-hop feature sums for a whole source. Any window length and stride that is a
+    multiple of hop_sec can be scored from the prefix sums in O(1) per window.
+    """
+    hop_sec: float
+    energy: np.ndarray   # sum of squared audio samples per hop
+    samples: np.ndarray  # audio sample count per hop
+    motion: np.ndarray   # sum of per-frame mean abs diffs per hop
+    frames: np.ndarray   # frame diff count per hop
+
+    def __len__(self) -> int:
+        return len(self.energy)
+
+    @property
+    def duration_sec(self) -> float:
+        return len(self) * self.hop_sec
+
+    @cached_property
+    def prefix(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        def cs(x):
+            return np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+        return cs(self.energy), cs(self.samples), cs(self.motion), cs(self.frames)
+
+    def __getstate__(self):
+        # prefix sums are cheap to rebuild; keep pickled (cached) timelines compact
+        state = dict(self.__dict__)
+        state.pop('prefix', None)
+        return state
+
+
+def hop_for_stride(stride_sec: float) -> float:
+    """Largest hop <= MAX_HOP_SEC that divides stride_sec evenly."""
+    stride_sec = float(stride_sec)
+    if stride_sec <= 0:
+        return MAX_HOP_SEC
+    return stride_sec / math.ceil(stride_sec / MAX_HOP_SEC)
+
+
+def _audio_hops(path: str, hop_sec: float) -> Tuple[np.ndarray, np.ndarray]:
+    y, sr = librosa.load(path, sr=None, mono=True)
+    if len(y) == 0:
+        return np.zeros(0), np.zeros(0)
+    hop = max(1, int(round(hop_sec * sr)))
+    idx = np.arange(0, len(y), hop)
+    energy = np.add.reduceat(np.square(y, dtype=np.float64), idx)
+    samples = np.diff(np.append(idx, len(y))).astype(np.float64)
+    return energy, samples
+
+
+def _motion_hops(path: str, hop_sec: float) -> Tuple[np.ndarray, np.ndarray]:
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return np.zeros(0), np.zeros(0)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    diffs = []
+    ok, prev = cap.read()
+    if ok:
+        prev = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
+    while ok:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        g = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        d = cv2.absdiff(g, prev)
+        prev = g
+        diffs.append(float(np.mean(d)))
+    cap.release()
+    if not diffs:
+        return np.zeros(0), np.zeros(0)
+    return _bin_diffs(np.asarray(diffs, dtype=np.float64), fps, hop_sec)
+
+
+def _bin_diffs(diffs: np.ndarray, fps: float, hop_sec: float) -> Tuple[np.ndarray, np.ndarray]:
+    # diff i compares frame i+1 against frame i; attribute it to frame i+1's timestamp
+    bins = (np.arange(1, len(diffs) + 1) / fps / hop_sec).astype(int)
+    motion = np.bincount(bins, weights=np.asarray(diffs, dtype=np.float64))
+    frames = np.bincount(bins).astype(np.float64)
+    return motion, frames
+
+
+def _read_exact(stream, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = stream.read(n - len(buf))
+        if not chunk:
+            break
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def iter_gray_frames(
+    path: str,
+    width: int = FAST_MOTION_WIDTH,
+    height: int = FAST_MOTION_HEIGHT,
+    fps: float = FAST_MOTION_FPS,
+    block_frames: int = _FAST_BLOCK_FRAMES,
+    input_args: Sequence[str] = (),
+):
+    """
+    Yield uint8 blocks of shape (frames, width * height): grayscale frames sampled at fps and
+    scaled by ffmpeg. input_args go before -i. Raises OSError if ffmpeg is unavailable.
+    """
+    cmd = [
+        'ffmpeg', '-v', 'error', '-nostdin', *input_args, '-i', path, '-an',
+        '-vf', f'fps={fps},scale={width}:{height},format=gray',
+        '-f', 'rawvideo', '-pix_fmt', 'gray', '-',
+    ]
+    frame_bytes = width * height
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            buf = _read_exact(proc.stdout, frame_bytes * block_frames)
+            n = len(buf) // frame_bytes
+            if n == 0:
+                break
+            yield np.frombuffer(buf, dtype=np.uint8, count=n * frame_bytes).reshape(n, frame_bytes)
+    finally:
+        proc.stdout.close()
+        reap(proc)
+
+
+def frame_diffs(block: np.ndarray, prev: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean abs diff of each frame against the one before (prev carries across blocks); returns (diffs, new prev)."""
+    block = block.astype(np.int16)
+    if prev is not None:
+        block = np.concatenate((prev[None, :], block))
+    diffs = np.abs(np.diff(block, axis=0)).mean(axis=1) if len(block) > 1 else np.zeros(0)
+    return diffs, block[-1]
+
+
+def _motion_hops_fast(
+    path: str,
+    hop_sec: float,
+    width: int = FAST_MOTION_WIDTH,
+    height: int = FAST_MOTION_HEIGHT,
+    fps: float = FAST_MOTION_FPS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Frame-diff motion from width x height grayscale frames sampled at fps, decoded by ffmpeg
+    (scale/fps filters) and differenced in blocks of frames.
+    Raises OSError if ffmpeg is unavailable.
+    """
+    diffs = []
+    prev = None
+    for block in iter_gray_frames(path, width, height, fps):
+        block, prev = frame_diffs(block, prev)
+        if len(block):
+            diffs.append(block)
+    if not diffs:
+        return np.zeros(0), np.zeros(0)
+    return _bin_diffs(np.concatenate(diffs), fps, hop_sec)
+
+
+def _pad(x: np.ndarray, n: int) -> np.ndarray:
+    return np.pad(x, (0, n - len(x))) if len(x) < n else x
+
+
+def feature_timeline(
+    path: str,
+    hop_sec: float = MAX_HOP_SEC,
+    motion_mode: str = 'full',
+    motion_width: int = FAST_MOTION_WIDTH,
+    motion_height: int = FAST_MOTION_HEIGHT,
+    motion_fps: float = FAST_MOTION_FPS,
+    streaming: bool = False,
+    block_sec: float = DEFAULT_BLOCK_SEC,
+) -> FeatureTimeline:
+    """
+    Decode audio and video once and return per-hop RMS/motion sums.
+    motion_mode='fast' trades motion resolution (motion_width x motion_height at motion_fps)
+    for speed; it falls back to the full OpenCV path if ffmpeg cannot be run.
+    streaming=True reads audio in block_sec blocks instead of loading the whole track, so peak
+    memory does not grow with source length; the hop sums (and window starts) are the same.
+    Both motion paths already read frames incrementally.
+    """
+    if motion_mode not in MOTION_MODES:
+        raise ValueError(f'Unknown motion_mode {motion_mode!r}; expected one of {MOTION_MODES}')
+    if streaming:
+        feats = stream_audio_features(path, hop_sec=hop_sec, block_sec=block_sec)
+        energy, samples = feats.hop_energy, feats.hop_samples
+    else:
+        energy, samples = _audio_hops(path, hop_sec)
+    motion = frames = None
+    if motion_mode == 'fast':
+        try:
+            motion, frames = _motion_hops_fast(path, hop_sec, width=motion_width, height=motion_height, fps=motion_fps)
+        except OSError:
+            motion = frames = None
+    if motion is None:
+        motion, frames = _motion_hops(path, hop_sec)
+    n = max(len(energy), len(motion))
+    return FeatureTimeline(
+        hop_sec=float(hop_sec),
+        energy=_pad(energy, n),
+        samples=_pad(samples, n),
+        motion=_pad(motion, n),
+        frames=_pad(frames, n),
+    )
+
+
+def _norm(x: np.ndarray, ref: Optional[np.ndarray] = None) -> np.ndarray:
+    """z-score of x against the mean/std of ref (x itself by default)."""
+    ref = x if ref is None else ref
+    if len(ref) == 0:
+        return x
+    m, s = float(np.mean(ref)), float(np.std(ref) + 1e-6)
+    return (x - m) / s
+
+
+def _window_features(timeline: FeatureTimeline, starts: np.ndarray, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Audio RMS and mean motion of the windows of w hops starting at hop indices `starts`."""
+    ends = np.minimum(starts + w, len(timeline))
+    e, ns, mo, nf = timeline.prefix
+    rms = np.sqrt((e[ends] - e[starts]) / np.maximum(ns[ends] - ns[starts], 1.0))
+    motion = (mo[ends] - mo[starts]) / np.maximum(nf[ends] - nf[starts], 1.0)
+    return rms, motion
+
+
+def score_timeline(timeline: FeatureTimeline, window_sec: float, stride_sec: float) -> Tuple[np.ndarray, float]:
+    """
+    Score every window of window_sec at stride_sec from the timeline's prefix sums.
+    Returns (scores array, effective stride_sec); window i starts at i * stride.
+    """
+    hop = timeline.hop_sec
+    step = max(1, int(round(stride_sec / hop)))
+    n = len(timeline)
+    if n == 0:
+        return np.array([0.0]), step * hop
+    w = max(1, int(round(window_sec / hop)))
+    rms, motion = _window_features(timeline, np.arange(0, max(0, n - w) + 1, step), w)
+    score = AUDIO_WEIGHT * _norm(rms) + MOTION_WEIGHT * _norm(motion)
+    return score, step * hop
+
+
+def search_timeline(
+    timeline: FeatureTimeline,
+    window_sec: float,
+    stride_sec: float,
+    coarse_factor: int = COARSE_FACTOR,
+    top_k: int = REFINE_TOP_K,
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Coarse-to-fine score_timeline: score every coarse_factor-th window, then every window within
+    one coarse step of the top_k coarse local maxima. Returns (window indices on the stride grid,
+    their scores, effective stride_sec), sorted by index. Scores are z-scored against the coarse
+    windows (a regular subsample of all windows), so they estimate score_timeline's closely but
+    not exactly. The best start matches the exhaustive scan's whenever its peak lies within one
+    coarse step of a refined coarse peak, and is otherwise the best start within those regions;
+    benchmarks/compare_window_search.py measures the agreement. coarse_factor is lowered so the
+    coarse step stays within COARSE_MAX_WINDOW_FRACTION of the window; at 1 the scan is exhaustive.
+    """
+    hop = timeline.hop_sec
+    step = max(1, int(round(stride_sec / hop)))
+    n = len(timeline)
+    w = max(1, int(round(window_sec / hop)))
+    n_windows = max(0, n - w) // step + 1
+    factor = min(int(coarse_factor), int(w * COARSE_MAX_WINDOW_FRACTION / step))
+    if n == 0 or factor <= 1 or n_windows <= 2 * factor:
+        score, stride = score_timeline(timeline, window_sec, stride_sec)
+        return np.arange(len(score)), score, stride
+    coarse = np.arange(0, n_windows, factor)
+    c_rms, c_motion = _window_features(timeline, coarse * step, w)
+    c_score = AUDIO_WEIGHT * _norm(c_rms) + MOTION_WEIGHT * _norm(c_motion)
+    # local maxima (plateaus included), best first; refine +-(factor - 1) windows around each
+    padded = np.concatenate(([-np.inf], c_score, [-np.inf]))
+    peaks = np.flatnonzero((c_score >= padded[:-2]) & (c_score >= padded[2:]))
+    peaks = peaks[np.argsort(-c_score[peaks], kind='stable')[:max(1, int(top_k))]]
+    fine = (coarse[peaks][:, None] + np.arange(1 - factor, factor)[None, :]).ravel()
+    fine = np.unique(fine[(fine >= 0) & (fine < n_windows) & (fine % factor != 0)])
+    f_rms, f_motion = _window_features(timeline, fine * step, w)
+    f_score = AUDIO_WEIGHT * _norm(f_rms, c_rms) + MOTION_WEIGHT * _norm(f_motion, c_motion)
+    idx = np.concatenate((coarse, fine))
+    order = np.argsort(idx, kind='stable')
+    return idx[order], np.concatenate((c_score, f_score))[order], step * hop
+
+
 def _score_series(path: str, window_sec: float = 2.0, stride_sec: float = 0.5) -> Tuple[np.ndarray, float, float]:
     """
     Internal: compute engagement score per window along the video.
     Returns (scores array, stride_sec, window_sec).
     """
+    timeline = feature_timeline(path, hop_sec=hop_for_stride(stride_sec))
+    score, stride = score_timeline(timeline, window_sec, stride_sec)
+    return score, stride, window_sec
+
+
+def best_window(
+    path: str,
+    window_sec: float = 2.0,
+    stride_sec: float = 0.5,
+    timeline: Optional[FeatureTimeline] = None,
+    coarse_factor: int = 1,
+    top_k: int = REFINE_TOP_K,
+) -> Tuple[float, float]:
     """
-    Returns (start_sec, score) for the best window.
+    Returns (start_sec, score) for the best window. coarse_factor > 1 searches coarse-to-fine
+    (see search_timeline) instead of scoring every stride position.
     """
-    # Audio energy
-    y, sr = librosa.load(path, sr=None, mono=True)
-    hop = int(stride_sec * sr)
-    win = int(window_sec * sr)
-    rms = []
-    for s in range(0, max(1, len(y) - win), hop):
-        seg = y[s:s+win]
-        if len(seg) == 0:
-            continue
-        rms.append(float(np.sqrt(np.mean(seg**2))))
-    rms = np.array(rms) if rms else np.array([0.0])
-
-    # Visual motion via frame diffs
-    cap = cv2.VideoCapture(path)
-    if not cap.isOpened():
-        # fallback to audio-only
-        motion_series = np.zeros_like(rms)
-    else:
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        frames_per_win = int(window_sec * fps)
-        frames_per_stride = max(1, int(stride_sec * fps))
-        diffs = []
-        ok, prev = cap.read()
-        if ok:
-            prev = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
-        frame_index = 0
-        acc = []
-        while True:
-            ok, frame = cap.read()
-            if not ok:
+    if timeline is None:
+        timeline = feature_timeline(path, hop_sec=hop_for_stride(stride_sec))
+    idx, score, stride = search_timeline(timeline, window_sec, stride_sec, coarse_factor, top_k)
+    best = int(np.argmax(score)) if len(score) else 0
+    start_sec = int(idx[best]) * stride if len(score) else 0.0
+    return start_sec, float(score[best] if len(score) else 0.0)
+
+
+def select_non_overlapping(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    scores: np.ndarray,
+    max_clips: int,
+    min_gap_sec: float = 1.0,
+) -> np.ndarray:
+    """
+    Greedy non-maximum suppression: indices of up to max_clips spans taken in descending score
+    order (ties keep input order), skipping any span within min_gap_sec of one already taken.
+    Candidates are screened in growing chunks against the chosen spans with one vectorized
+    searchsorted; only chunk survivors are walked one by one, each tested with a bisect.
+    """
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    chosen_starts: List[float] = []
+    chosen_ends: List[float] = []
+    picked: List[int] = []
+    pos, chunk = 0, 256
+    while pos < len(order) and len(picked) < max_clips:
+        idx = order[pos:pos + chunk]
+        pos += len(idx)
+        chunk = min(chunk * 2, 1 << 16)
+        s, e = starts[idx], ends[idx]
+        if chosen_starts:
+            cs, ce = np.asarray(chosen_starts), np.asarray(chosen_ends)
+            j = np.searchsorted(cs, s, side='left')
+            free = (j == 0) | (ce[np.maximum(j - 1, 0)] + min_gap_sec <= s)
+            free &= (j == len(cs)) | (e + min_gap_sec <= cs[np.minimum(j, len(cs) - 1)])
+            idx, s, e = idx[free], s[free], e[free]
+        for i, a, b in zip(idx.tolist(), s.tolist(), e.tolist()):
+            j = bisect_left(chosen_starts, a)
+            if j > 0 and chosen_ends[j - 1] + min_gap_sec > a:
+                continue
+            if j < len(chosen_starts) and b + min_gap_sec > chosen_starts[j]:
+                continue
+            chosen_starts.insert(j, a)
+            chosen_ends.insert(j, b)
+            picked.append(i)
+            if len(picked) >= max_clips:
                 break
-            g = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            d = cv2.absdiff(g, prev)
-            prev = g
-            acc.append(float(np.mean(d)))
-            frame_index += 1
-        cap.release()
-        if not acc:
-            motion_series = np.zeros_like(rms)
-        else:
-            acc = np.array(acc)
-            # windowed mean over visual diffs to align with audio windows count
-            num_windows = len(rms)
-            if num_windows <= 1:
-                motion_series = np.array([float(np.mean(acc))])
-            else:
-                # resample by averaging chunks
-                idxs = np.linspace(0, len(acc), num_windows + 1).astype(int)
-                chunks = [acc[idxs[i]:idxs[i+1]] for i in range(num_windows)]
-                motion_series = np.array([float(np.mean(c)) if len(c) else 0.0 for c in chunks])
-
-    # Normalize and combine
-    def norm(x):
-        if len(x) == 0:
-            return x
-        m, s = float(np.mean(x)), float(np.std(x) + 1e-6)
-        return (x - m) / s
-
-    audio_n = norm(rms)
-    motion_n = norm(motion_series)
-    score = 0.6 * audio_n + 0.4 * motion_n
-    return score, stride_sec, window_sec
-
-
-def best_window(path: str, window_sec: float = 2.0, stride_sec: float = 0.5) -> Tuple[float, float]:
-    """Returns (start_sec, score) for the best window."""
-    score, stride, _win = _score_series(path, window_sec=window_sec, stride_sec=stride_sec)
-    best_idx = int(np.argmax(score)) if len(score) else 0
-    start_sec = best_idx * stride
-    return start_sec, float(score[best_idx] if len(score) else 0.0)
+    return np.asarray(picked, dtype=np.int64)
 
 
 def top_windows_multi(
@@ -91,33 +391,32 @@ def top_windows_multi(
     stride_sec: float = 1.0,
     max_clips: int = 3,
     min_gap_sec: float = 1.0,
+    timeline: Optional[FeatureTimeline] = None,
+    coarse_factor: int = 1,
+    top_k: int = REFINE_TOP_K,
 ) -> List[Tuple[float, float, float]]:
     """
     Return up to max_clips non-overlapping windows across multiple durations.
     Each tuple is (start_sec, duration_sec, score).
+    The source is decoded once; every duration is scored from the same feature timeline, and the
+    candidates live in flat start/duration/score arrays rather than per-window tuples.
+    coarse_factor > 1 scores each duration coarse-to-fine (see search_timeline), refining at
+    least max_clips coarse peaks; unrefined coarse windows stay candidates.
     """
-    candidates: List[Tuple[float, float, float]] = []
+    if timeline is None:
+        timeline = feature_timeline(path, hop_sec=hop_for_stride(stride_sec))
+    top_k = max(int(top_k), int(max_clips))
+    starts, durs, scores = [], [], []
     for dur in durations:
-        s, stride, win = _score_series(path, window_sec=float(dur), stride_sec=float(stride_sec))
-        for i, sc in enumerate(s):
-            start = i * stride
-            candidates.append((start, float(dur), float(sc)))
-
-    # sort by score desc
-    candidates.sort(key=lambda t: t[2], reverse=True)
-
-    chosen: List[Tuple[float, float, float]] = []
-    def overlaps(a, b) -> bool:
-        a0, a1 = a[0], a[0] + a[1]
-        b0, b1 = b[0], b[0] + b[1]
-        return not (a1 + min_gap_sec <= b0 or b1 + min_gap_sec <= a0)
-
-    for cand in candidates:
-        if len(chosen) >= max_clips:
-            break
-        if any(overlaps(cand, c) for c in chosen):
-            continue
-        chosen.append(cand)
+        idx, s, stride = search_timeline(timeline, float(dur), float(stride_sec), coarse_factor, top_k)
+        starts.append(idx * stride)
+        durs.append(np.full(len(s), float(dur)))
+        scores.append(s)
+    if not scores:
+        return []
+    starts, durs, scores = np.concatenate(starts), np.concatenate(durs), np.concatenate(scores)
+
+    picked = select_non_overlapping(starts, starts + durs, scores, max_clips, min_gap_sec)
     # sort chosen by start time for nicer ordering
-    chosen.sort(key=lambda t: t[0])
-    return chosen
+    picked = picked[np.argsort(starts[picked], kind='stable')]
+    return [(float(starts[i]), float(durs[i]), float(scores[i])) for i in picked.tolist()]
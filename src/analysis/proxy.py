@@ -0,0 +1,78 @@
+import os
+import tempfile
+from typing import Optional
+
+import ffmpeg
+
+from src.analysis.cache import AnalysisCache
+from src.metrics import run_ffmpeg
+
+# Analysis proxies: one fast ffmpeg pass turns the source into a small low-bitrate video with mono
+# 16 kHz PCM audio. Every analysis stage (engagement features, silences, Whisper) can run on the
+# proxy so its cost follows duration rather than source resolution/bitrate; only the final cut and
+# render read the original. Proxies keep the source timeline, so times carry over unchanged.
+
+DEFAULT_PROXY_DIR = 'data/proxies'
+PROXY_HEIGHT = 360
+PROXY_SAMPLE_RATE = 16000  # Whisper's native rate
+
+
+def proxy_path(source: str, cache: AnalysisCache, root: str = DEFAULT_PROXY_DIR, height: int = PROXY_HEIGHT, fps: float = 0.0) -> str:
+    """Deterministic proxy location for a source: its content hash plus the proxy settings."""
+    fps_tag = f'_{fps:g}fps' if fps else ''
+    return os.path.join(root, f'{cache.digest(source)}_{int(height)}p{fps_tag}.mkv')
+
+
+def make_proxy(source: str, output_path: str, height: int = PROXY_HEIGHT, fps: float = 0.0, threads: Optional[int] = None) -> str:
+    """
+    Encode the analysis proxy: video scaled to `height` (even width, aspect kept), optionally
+    resampled to `fps`, x264 ultrafast at a high CRF; audio downmixed to mono 16 kHz PCM.
+    Written to a unique temp file beside `output_path` and renamed, so a reader never sees a
+    partial proxy and concurrent builders of the same proxy never share a file.
+    """
+    out_dir = os.path.dirname(output_path) or '.'
+    os.makedirs(out_dir, exist_ok=True)
+    inp = ffmpeg.input(source)
+    video = inp.video.filter('scale', -2, int(height))
+    if fps:
+        video = video.filter('fps', fps=fps)
+    streams = [video]
+    if _has_audio(source):
+        streams.append(inp.audio)
+    out_kwargs = {
+        'vcodec': 'libx264', 'preset': 'ultrafast', 'crf': 32, 'pix_fmt': 'yuv420p',
+        'acodec': 'pcm_s16le', 'ac': 1, 'ar': PROXY_SAMPLE_RATE,
+    }
+    if threads:
+        out_kwargs['threads'] = int(threads)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=os.path.basename(output_path) + '.', suffix='.part.mkv')
+    os.close(fd)
+    try:
+        run_ffmpeg(ffmpeg.output(*streams, tmp, **out_kwargs).overwrite_output(), 'proxy')
+        os.replace(tmp, output_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return output_path
+
+
+def _has_audio(path: str) -> bool:
+    try:
+        return any(s.get('codec_type') == 'audio' for s in ffmpeg.probe(path).get('streams', []))
+    except ffmpeg.Error:
+        return False
+
+
+def ensure_proxy(
+    source: str,
+    cache: AnalysisCache,
+    root: str = DEFAULT_PROXY_DIR,
+    height: int = PROXY_HEIGHT,
+    fps: float = 0.0,
+    threads: Optional[int] = None,
+) -> str:
+    """Path of the source's analysis proxy, encoding it on first use."""
+    path = proxy_path(source, cache, root, height, fps)
+    if not os.path.exists(path):
+        make_proxy(source, path, height=height, fps=fps, threads=threads)
+    return path
@@ -0,0 +1,105 @@
+from typing import List, Optional, Tuple
+import numpy as np
+
+from src.analysis.engagement import FeatureTimeline, AUDIO_WEIGHT, MOTION_WEIGHT, _norm, select_non_overlapping
+from src.analysis.semantic import ActivityMap
+
+# Joint start/end selection: clip starts and ends are snapped to sentence and silence boundaries
+# and every (start, end) candidate is scored over its actual span from the timeline's prefix sums.
+# Boundaries are sorted once per source, so end lookup for all candidates is one searchsorted each.
+
+SENTENCE_END = ('.', '!', '?')
+
+
+class BoundaryIndex:
+    """
+    Sorted boundary arrays for one source, built once from the transcript and speech/silence map:
+    sentence ends, segment ends, silence starts (candidate clip ends) and sentence starts plus
+    silence ends (candidate clip starts).
+    """
+
+    def __init__(self, transcript: Optional[dict] = None, silences: Optional[ActivityMap] = None):
+        segs = sorted(
+            (float(s.get('start', 0.0)), float(s.get('end', 0.0)), (s.get('text') or '').strip())
+            for s in (transcript or {}).get('segments', [])
+        )
+        if silences is None:
+            silences = ActivityMap()
+        elif not isinstance(silences, ActivityMap):
+            silences = ActivityMap(silences)
+        self.sentence_ends = np.sort(np.array([e for _, e, t in segs if t.endswith(SENTENCE_END)], dtype=np.float64))
+        self.segment_ends = np.sort(np.array([e for _, e, _ in segs], dtype=np.float64))
+        self.silence_starts = silences.starts
+        # a sentence starts at the first segment and after every segment that closes one
+        sent_starts = [s for i, (s, _, _) in enumerate(segs) if i == 0 or segs[i - 1][2].endswith(SENTENCE_END)]
+        self.starts = np.unique(np.concatenate((np.array(sent_starts, dtype=np.float64), silences.ends)))
+
+    @staticmethod
+    def _first_in(arr: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Per query, the first arr value in [lo, hi] or NaN."""
+        if not len(arr):
+            return np.full(len(lo), np.nan)
+        i = np.searchsorted(arr, lo, side='left')
+        v = arr[np.minimum(i, len(arr) - 1)]
+        return np.where((i < len(arr)) & (v <= hi), v, np.nan)
+
+    def ends_for(self, starts: np.ndarray, min_dur: float, max_dur: float) -> np.ndarray:
+        """
+        Idea endpoint for every start, with the same preference as pick_idea_endpoint: the earlier
+        of (first sentence end, else first segment end) and first silence start within
+        [start + min_dur, start + max_dur]; start + max_dur when there is neither.
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        lo, hi = starts + min_dur, starts + max_dur
+        tr = self._first_in(self.sentence_ends, lo, hi)
+        tr = np.where(np.isnan(tr), self._first_in(self.segment_ends, lo, hi), tr)
+        end = np.fmin(tr, self._first_in(self.silence_starts, lo, hi))
+        return np.where(np.isnan(end), hi, end)
+
+    def end_for(self, start: float, min_dur: float, max_dur: float) -> float:
+        return float(self.ends_for(np.array([start]), min_dur, max_dur)[0])
+
+
+def score_spans(timeline: FeatureTimeline, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Engagement score of arbitrary [start, end) spans, normalised across the given spans."""
+    n = len(timeline)
+    if n == 0 or not len(starts):
+        return np.zeros(len(starts))
+    hop = timeline.hop_sec
+    a = np.clip(np.floor(np.asarray(starts) / hop).astype(np.int64), 0, n - 1)
+    b = np.clip(np.ceil(np.asarray(ends) / hop).astype(np.int64), a + 1, n)
+    e, ns, mo, nf = timeline.prefix
+    rms = np.sqrt((e[b] - e[a]) / np.maximum(ns[b] - ns[a], 1.0))
+    motion = (mo[b] - mo[a]) / np.maximum(nf[b] - nf[a], 1.0)
+    return AUDIO_WEIGHT * _norm(rms) + MOTION_WEIGHT * _norm(motion)
+
+
+def select_clips(
+    timeline: FeatureTimeline,
+    boundaries: BoundaryIndex,
+    min_dur: float = 20.0,
+    max_dur: float = 120.0,
+    max_clips: int = 3,
+    stride_sec: float = 1.0,
+    min_gap_sec: float = 1.0,
+    media_dur: float = 0.0,
+) -> List[Tuple[float, float, float]]:
+    """
+    Choose up to max_clips non-overlapping (start_sec, duration_sec, score) clips whose start is a
+    sentence start / speech onset and whose end is the idea endpoint for that start. Without any
+    start boundaries (no transcript, no silences) starts fall back to a stride_sec grid.
+    """
+    limit = media_dur or timeline.duration_sec
+    starts = boundaries.starts
+    if not len(starts):
+        starts = np.arange(0.0, max(0.0, limit - min_dur) + 1e-9, max(stride_sec, timeline.hop_sec))
+    ends = boundaries.ends_for(starts, min_dur, max_dur)
+    if limit:
+        ends = np.minimum(ends, limit)
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    scores = score_spans(timeline, starts, ends)
+    picked = select_non_overlapping(starts, ends, scores, max_clips, min_gap_sec)
+    out = [(float(starts[i]), float(ends[i] - starts[i]), float(scores[i])) for i in picked.tolist()]
+    out.sort(key=lambda t: t[0])
+    return out
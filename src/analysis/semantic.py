@@ -1,5 +1,7 @@
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Any, Iterable, Iterator, Union
 import math
+import threading
+import numpy as np
 
 # Optional whisper import
 try:
@@ -7,30 +9,210 @@ try:
 except Exception:
     whisper = None
 
-from pydub import AudioSegment, silence
+from src.analysis.stream import stream_audio_features, DEFAULT_BLOCK_SEC
+
+
+_models: Dict[str, Any] = {}
+_model_locks: Dict[str, threading.Lock] = {}
+_models_lock = threading.Lock()
+
+
+def load_whisper_model(model: str = "tiny"):
+    """Load a Whisper model once per process and reuse it (keeps long-lived workers warm)."""
+    if whisper is None:
+        return None
+    with _models_lock:
+        m = _models.get(model)
+        if m is None:
+            m = whisper.load_model(model)
+            _models[model] = m
+            _model_locks[model] = threading.Lock()
+        return m
+
+
+def loaded_models() -> List[str]:
+    with _models_lock:
+        return sorted(_models)
+
+
+def whisper_transcribe(path: str, model: str = "tiny", **kwargs) -> Optional[dict]:
+    """Word-timestamped transcription on the shared model; calls on one model are serialized."""
+    m = load_whisper_model(model)
+    if m is None:
+        return None
+    with _model_locks[model]:
+        return m.transcribe(path, word_timestamps=True, **kwargs)
 
 
 def transcribe_with_words(path: str, model: str = "tiny") -> Optional[dict]:
     if whisper is None:
         return None
     try:
-        m = whisper.load_model(model)
-        return m.transcribe(path, word_timestamps=True)
+        return whisper_transcribe(path, model=model)
     except Exception:
         return None
 
 
-def detect_silences(path: str, min_silence_len_ms: int = 400, silence_db_drop: float = 16.0) -> List[Tuple[float, float]]:
+def slice_transcript(transcript: dict, start: float, duration: float) -> dict:
+    """
+    Cut a word-timestamped transcript down to [start, start+duration) and shift it so the clip
+    starts at 0. Words are kept by their start time; segments without words are kept if they
+    overlap the range. The result has the same segments/words shape Whisper returns.
+    """
+    end = start + duration
+    out_segments = []
+    for seg in transcript.get('segments', []):
+        seg_start = float(seg.get('start', 0.0))
+        seg_end = float(seg.get('end', seg_start))
+        if seg_end <= start or seg_start >= end:
+            continue
+        words = seg.get('words') or []
+        new_seg = dict(seg)
+        if words:
+            kept = []
+            for w in words:
+                w_start = float(w.get('start', seg_start))
+                if w_start < start or w_start >= end:
+                    continue
+                w = dict(w)
+                w['start'] = w_start - start
+                w['end'] = min(float(w.get('end', w_start)), end) - start
+                kept.append(w)
+            if not kept:
+                continue
+            new_seg['words'] = kept
+            new_seg['text'] = ''.join((w.get('word') or '') for w in kept)
+            new_seg['start'] = kept[0]['start']
+            new_seg['end'] = kept[-1]['end']
+        else:
+            new_seg['start'] = max(seg_start, start) - start
+            new_seg['end'] = min(seg_end, end) - start
+        out_segments.append(new_seg)
+    return {'text': ''.join((seg.get('text') or '') for seg in out_segments), 'segments': out_segments}
+
+
+_SILENCE_CHUNK_MS = 1 << 20
+
+
+def silences_from_ms_energy(
+    ms_energy: np.ndarray,
+    ms_frames: np.ndarray,
+    min_silence_len_ms: int = 400,
+    silence_db_drop: float = 16.0,
+    reference_power: Optional[float] = None,
+    offset_ms: int = 0,
+) -> List[Tuple[float, float]]:
+    """
+    pydub-style silence detection on millisecond energy bins: every min_silence_len_ms window
+    (1 ms step) whose RMS is at most silence_db_drop dB below the whole track's RMS is silent, runs
+    of silent window starts become (start_sec, end_sec) intervals, and intervals that overlap or
+    touch are merged (as pydub does).
+    Window sums come from prefix sums over fixed-size chunks, so scratch memory stays bounded.
+    For a slice of a longer track, pass the track's mean power (mean squared sample) as
+    reference_power and the slice's first millisecond as offset_ms.
+    """
+    n_ms = len(ms_energy)
+    if n_ms > 1 and 2 * int(ms_frames[-1]) < int(ms_frames[0]):
+        # like pydub, round the track length to whole milliseconds
+        n_ms -= 1
+        ms_energy, ms_frames = ms_energy[:n_ms], ms_frames[:n_ms]
+    L = int(min_silence_len_ms)
+    total_frames = float(np.sum(ms_frames, dtype=np.float64))
+    if n_ms < L or total_frames == 0:
+        return []
+    if reference_power is None:
+        reference_power = float(np.sum(ms_energy, dtype=np.float64)) / total_frames
+    thresh = reference_power * 10.0 ** (-silence_db_drop / 10.0)
+    n_starts = n_ms - L + 1
+    silent = np.zeros(n_starts + 2, dtype=np.int8)  # padded with a non-silent sentinel on each side
+    for a in range(0, n_starts, _SILENCE_CHUNK_MS):
+        b = min(n_starts, a + _SILENCE_CHUNK_MS)
+        e = np.concatenate(([0.0], np.cumsum(ms_energy[a:b + L - 1], dtype=np.float64)))
+        c = np.concatenate(([0.0], np.cumsum(ms_frames[a:b + L - 1], dtype=np.float64)))
+        win = (e[L:] - e[:-L]) / np.maximum(c[L:] - c[:-L], 1.0)
+        silent[a + 1:b + 1] = win <= thresh
+    edges = np.diff(silent)
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1) - 1 + L
+    # a run starting at or before the previous run's end continues it
+    split = np.flatnonzero(run_starts[1:] > run_ends[:-1])
+    run_starts = np.concatenate((run_starts[:1], run_starts[split + 1]))
+    run_ends = np.concatenate((run_ends[split], run_ends[-1:]))
+    return [((s + offset_ms) / 1000.0, (t + offset_ms) / 1000.0) for s, t in zip(run_starts.tolist(), run_ends.tolist())]
+
+
+class ActivityMap:
+    """
+    Speech/silence map of a source: sorted silence intervals (everything else is speech/activity)
+    with O(log n) point and range queries.
+    """
+
+    def __init__(self, silences: Iterable[Tuple[float, float]] = ()):
+        arr = np.asarray(list(silences), dtype=np.float64).reshape(-1, 2)
+        order = np.argsort(arr[:, 0], kind='stable')
+        self.starts = arr[order, 0]
+        self.ends = arr[order, 1]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return iter(zip(self.starts.tolist(), self.ends.tolist()))
+
+    @property
+    def silences(self) -> List[Tuple[float, float]]:
+        return list(self)
+
+    def is_silent(self, t: float) -> bool:
+        i = int(np.searchsorted(self.starts, t, side='right')) - 1
+        return i >= 0 and t < self.ends[i]
+
+    def is_speech(self, t: float) -> bool:
+        return not self.is_silent(t)
+
+    def first_silence_start(self, lo: float, hi: float) -> Optional[float]:
+        """Earliest silence start in [lo, hi], or None."""
+        i = int(np.searchsorted(self.starts, lo, side='left'))
+        if i < len(self.starts) and self.starts[i] <= hi:
+            return float(self.starts[i])
+        return None
+
+    def silent_fraction(self, lo: float, hi: float) -> float:
+        """Fraction of [lo, hi] covered by silence."""
+        if hi <= lo or not len(self):
+            return 0.0
+        i = max(0, int(np.searchsorted(self.ends, lo, side='right')))
+        j = int(np.searchsorted(self.starts, hi, side='left'))
+        if j <= i:
+            return 0.0
+        overlap = np.minimum(self.ends[i:j], hi) - np.maximum(self.starts[i:j], lo)
+        return float(np.clip(overlap, 0.0, None).sum() / (hi - lo))
+
+
+def detect_activity(
+    path: str,
+    min_silence_len_ms: int = 400,
+    silence_db_drop: float = 16.0,
+    block_sec: float = DEFAULT_BLOCK_SEC,
+) -> ActivityMap:
+    """Decode audio block-wise into millisecond energy bins and return its speech/silence map."""
+    feats = stream_audio_features(path, per_ms=True, block_sec=block_sec)
+    return ActivityMap(silences_from_ms_energy(feats.ms_energy, feats.ms_frames, min_silence_len_ms, silence_db_drop))
+
+
+def detect_silences(
+    path: str,
+    min_silence_len_ms: int = 400,
+    silence_db_drop: float = 16.0,
+    block_sec: float = DEFAULT_BLOCK_SEC,
+) -> List[Tuple[float, float]]:
     """Return list of silence intervals as (start_sec, end_sec)."""
-    audio = AudioSegment.from_file(path)
-    thresh = audio.dBFS - silence_db_drop
-    sils = silence.detect_silence(audio, min_silence_len=min_silence_len_ms, silence_thresh=thresh)
-    return [(s/1000.0, e/1000.0) for s, e in sils]
+    return detect_activity(path, min_silence_len_ms, silence_db_drop, block_sec).silences
 
 
 def pick_idea_endpoint(
     transcript: Optional[dict],
-    silences: List[Tuple[float, float]],
+    silences: Union[ActivityMap, List[Tuple[float, float]]],
     start_hint: float,
     min_dur: float = 20.0,
     max_dur: float = 120.0,
@@ -38,6 +220,7 @@ def pick_idea_endpoint(
     """
     Choose an end time based on transcript punctuation boundaries and/or silence, constrained within [start+min_dur, start+max_dur].
     Preference: nearest sentence end >= min_dur; else nearest silence >= min_dur; else fallback to max_dur.
+    Pass an ActivityMap (built once per source) to make the silence lookup a binary search.
     """
     min_end = start_hint + min_dur
     max_end = start_hint + max_dur
@@ -60,11 +243,9 @@ def pick_idea_endpoint(
                     cand_transcript = seg_end
                     break
 
-    cand_silence: Optional[float] = None
-    for s, e in silences:
-        if s >= min_end and s <= max_end:
-            cand_silence = s
-            break
+    if not isinstance(silences, ActivityMap):
+        silences = ActivityMap(silences)
+    cand_silence = silences.first_silence_start(min_end, max_end)
 
     # Decide
     if cand_transcript is not None and cand_silence is not None:
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+import subprocess
+import numpy as np
+import ffmpeg
+
+from src.metrics import reap
+
+# Bounded-memory audio analysis: decode PCM through an ffmpeg pipe in fixed-size blocks and
+# keep only per-bin running sums. Memory is O(block) for samples plus a few bytes per output
+# bin (per hop for engagement, per millisecond for silence detection), independent of how
+# many samples the source holds.
+
+DEFAULT_BLOCK_SEC = 10.0
+
+
+def probe_audio(path: str) -> Optional[Tuple[int, int]]:
+    """Return (sample_rate, channels) of the first audio stream, or None if there is none."""
+    meta = ffmpeg.probe(path)
+    for st in meta.get('streams', []):
+        if st.get('codec_type') == 'audio':
+            return int(st['sample_rate']), int(st.get('channels') or 1)
+    return None
+
+
+def iter_pcm_blocks(
+    path: str,
+    sr: int,
+    channels: int,
+    block_sec: float = DEFAULT_BLOCK_SEC,
+    input_args: Sequence[str] = (),
+) -> Iterator[np.ndarray]:
+    """
+    Yield float32 blocks of shape (frames, channels) at the source rate and layout.
+    input_args go before -i (e.g. ('-follow', '1') to keep reading a file that is still being written).
+    """
+    cmd = [
+        'ffmpeg', '-v', 'error', '-nostdin', *input_args, '-i', path, '-vn',
+        '-f', 'f32le', '-acodec', 'pcm_f32le', '-ar', str(sr), '-ac', str(channels), '-',
+    ]
+    frame_bytes = 4 * channels
+    block_bytes = max(1, int(block_sec * sr)) * frame_bytes
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    pending = b''
+    try:
+        while True:
+            chunk = proc.stdout.read(block_bytes)
+            if not chunk:
+                break
+            buf = pending + chunk
+            usable = len(buf) - len(buf) % frame_bytes
+            pending = buf[usable:]
+            if usable:
+                yield np.frombuffer(buf[:usable], dtype=np.float32).reshape(-1, channels)
+    finally:
+        proc.stdout.close()
+        reap(proc)
+
+
+class RunningBins:
+    """
+    Per-bin sums and counts of a per-sample stream, where sample i falls in bin
+    i * den // num (i.e. num/den samples per bin). Only the open bin is carried between feeds.
+    num must be >= den: with fewer than one sample per bin some bins would never receive a sample.
+    """
+
+    def __init__(self, num: int, den: int = 1, dtype=np.float64):
+        if int(den) < 1 or int(num) < int(den):
+            raise ValueError(f'RunningBins needs num >= den >= 1, got num={num}, den={den}')
+        self.num = int(num)
+        self.den = int(den)
+        self.dtype = dtype
+        self.offset = 0
+        self._sums: List[np.ndarray] = []
+        self._counts: List[np.ndarray] = []
+        self._open_bin = 0
+        self._open_sum = 0.0
+        self._open_count = 0
+
+    def feed(self, values: np.ndarray) -> None:
+        n = len(values)
+        if n == 0:
+            return
+        bins = np.arange(self.offset, self.offset + n, dtype=np.int64) * self.den // self.num
+        b0 = int(bins[0])
+        sums = np.bincount(bins - b0, weights=values)
+        counts = np.bincount(bins - b0)
+        if b0 == self._open_bin:
+            sums[0] += self._open_sum
+            counts[0] += self._open_count
+        elif self._open_count:
+            self._sums.append(np.array([self._open_sum], dtype=self.dtype))
+            self._counts.append(np.array([self._open_count], dtype=np.int64))
+        self._sums.append(sums[:-1].astype(self.dtype))
+        self._counts.append(counts[:-1])
+        self._open_bin = b0 + len(sums) - 1
+        self._open_sum = float(sums[-1])
+        self._open_count = int(counts[-1])
+        self.offset += n
+
+    def closed(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sums and counts of the bins that can no longer change (everything but the open bin)."""
+        if len(self._sums) > 1:
+            self._sums = [np.concatenate(self._sums)]
+            self._counts = [np.concatenate(self._counts)]
+        if not self._sums:
+            return np.zeros(0, dtype=self.dtype), np.zeros(0, dtype=np.int64)
+        return self._sums[0], self._counts[0]
+
+    def finish(self) -> Tuple[np.ndarray, np.ndarray]:
+        sums, counts = list(self._sums), list(self._counts)
+        if self._open_count:
+            sums.append(np.array([self._open_sum], dtype=self.dtype))
+            counts.append(np.array([self._open_count], dtype=np.int64))
+        if not sums:
+            return np.zeros(0, dtype=self.dtype), np.zeros(0, dtype=np.int64)
+        return np.concatenate(sums), np.concatenate(counts)
+
+
+@dataclass
+class AudioStreamFeatures:
+    sr: int
+    hop_energy: np.ndarray   # per hop: sum of squared mono samples
+    hop_samples: np.ndarray  # per hop: sample count
+    ms_energy: np.ndarray    # per millisecond: sum over frames of the channel-mean squared sample
+    ms_frames: np.ndarray    # per millisecond: frame count
+
+
+def stream_audio_features(
+    path: str,
+    hop_sec: Optional[float] = None,
+    per_ms: bool = False,
+    block_sec: float = DEFAULT_BLOCK_SEC,
+) -> AudioStreamFeatures:
+    """
+    Single streaming pass over the audio track. hop_sec enables the engagement per-hop RMS sums
+    (mono = channel mean, as librosa does); per_ms enables millisecond energy bins for silence detection
+    (channel-mean of squares, as pydub's interleaved RMS does).
+    """
+    info = probe_audio(path)
+    empty = np.zeros(0)
+    if info is None:
+        return AudioStreamFeatures(sr=0, hop_energy=empty, hop_samples=empty, ms_energy=empty, ms_frames=empty)
+    sr, channels = info
+    hop_bins = RunningBins(max(1, int(round(hop_sec * sr)))) if hop_sec else None
+    ms_bins = RunningBins(sr, 1000, dtype=np.float32) if per_ms else None
+    for block in iter_pcm_blocks(path, sr, channels, block_sec=block_sec):
+        if hop_bins is not None:
+            mono = block.mean(axis=1, dtype=np.float64)
+            hop_bins.feed(mono * mono)
+        if ms_bins is not None:
+            ms_bins.feed(np.square(block, dtype=np.float64).mean(axis=1))
+    hop_energy, hop_samples = hop_bins.finish() if hop_bins is not None else (empty, empty)
+    ms_energy, ms_frames = ms_bins.finish() if ms_bins is not None else (empty, empty)
+    return AudioStreamFeatures(
+        sr=sr,
+        hop_energy=hop_energy,
+        hop_samples=hop_samples.astype(np.float64),
+        ms_energy=ms_energy,
+        ms_frames=ms_frames.astype(np.uint16),
+    )
@@ -0,0 +1,244 @@
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.analysis.cache import AnalysisCache
+from src.analysis.semantic import whisper, whisper_transcribe
+
+# Chunked parallel transcription: a long source is split at silences into chunks of about
+# chunk_sec, each chunk is decoded (16 kHz mono, straight from the source with an input seek)
+# and transcribed in its own worker process, and the per-chunk results are shifted by their
+# offsets and concatenated into one Whisper-shaped transcript (segments with words). Cutting
+# inside silences keeps words whole; Whisper's context is reset at every chunk boundary.
+
+WHISPER_SR = 16000
+DEFAULT_CHUNK_SEC = 120.0
+MAX_CHUNK_FACTOR = 2.0  # silences are searched up to chunk_sec * this past the chunk start
+LAST_CHUNK_FACTOR = 1.5  # the remainder is left as one chunk once it is at most chunk_sec * this
+LAZY_SNAP_SEC = 10.0  # lazy ranges grow outward by up to this much to start/end inside a silence
+LAZY_MIN_SEC = 30.0  # Whisper decodes 30 s windows, so shorter ranges cost as much as this
+
+
+def plan_chunks(
+    silences: Iterable[Tuple[float, float]],
+    media_dur: float,
+    chunk_sec: float = DEFAULT_CHUNK_SEC,
+) -> List[Tuple[float, float]]:
+    """
+    (start, end) chunks covering [0, media_dur). Each cut lies at the middle of the silence whose
+    middle is closest to start + chunk_sec, among silences between start + chunk_sec/2 and
+    start + chunk_sec*MAX_CHUNK_FACTOR; without one it is cut at start + chunk_sec.
+    """
+    mids = np.sort(np.asarray([(s + e) / 2.0 for s, e in silences], dtype=np.float64))
+    chunks = []
+    start = 0.0
+    while media_dur - start > chunk_sec * LAST_CHUNK_FACTOR:
+        lo, hi = start + chunk_sec / 2, start + chunk_sec * MAX_CHUNK_FACTOR
+        cand = mids[np.searchsorted(mids, lo):np.searchsorted(mids, hi)]
+        cut = float(cand[np.argmin(np.abs(cand - (start + chunk_sec)))]) if len(cand) else start + chunk_sec
+        if cut >= media_dur:
+            break
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, float(media_dur)))
+    return chunks
+
+
+def load_audio_range(path: str, start: float, duration: float, sr: int = WHISPER_SR) -> np.ndarray:
+    """[start, start+duration) of path's audio as mono float32 at sr, the array Whisper accepts."""
+    cmd = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-ss', f'{start:.3f}', '-t', f'{duration:.3f}', '-i', path,
+        '-f', 's16le', '-ac', '1', '-ar', str(sr), '-',
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _init_worker(torch_threads: int) -> None:
+    try:
+        import torch
+        torch.set_num_threads(max(1, torch_threads))
+    except Exception:
+        pass
+
+
+def _transcribe_chunk(path: str, start: float, end: float, model: str) -> dict:
+    audio = load_audio_range(path, start, end - start)
+    return whisper_transcribe(audio, model=model)  # model loaded once per worker process
+
+
+def shift_transcript(res: dict, offset: float) -> List[dict]:
+    """Segments of a Whisper result with every start/end (segment and word) moved by offset."""
+    segments = []
+    for seg in res.get('segments', []):
+        seg = dict(seg)
+        seg['start'] = float(seg.get('start', 0.0)) + offset
+        seg['end'] = float(seg.get('end', 0.0)) + offset
+        if seg.get('words'):
+            seg['words'] = [
+                {**w, 'start': float(w.get('start', 0.0)) + offset, 'end': float(w.get('end', 0.0)) + offset}
+                for w in seg['words']
+            ]
+        segments.append(seg)
+    return segments
+
+
+def merge_chunks(results: List[dict], chunks: List[Tuple[float, float]]) -> dict:
+    """One transcript from per-chunk results (in chunk order), timed on the source timeline."""
+    segments = []
+    for res, (start, _) in zip(results, chunks):
+        segments.extend(shift_transcript(res, start))
+    for i, seg in enumerate(segments):
+        seg['id'] = i
+    language = next((r.get('language') for r in results if r.get('language')), None)
+    return {'text': ''.join(seg.get('text') or '' for seg in segments), 'segments': segments, 'language': language}
+
+
+def default_workers() -> int:
+    # on CPU, several Whisper processes with two torch threads each beat one process with all cores
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def transcribe_chunked(
+    path: str,
+    silences: Iterable[Tuple[float, float]],
+    media_dur: float,
+    model: str = 'tiny',
+    workers: int = 0,
+    chunk_sec: float = DEFAULT_CHUNK_SEC,
+) -> Optional[dict]:
+    """
+    Word-timestamped transcript of path (same shape as whisper_transcribe) from chunks cut at
+    silences and transcribed by `workers` processes (0 = default_workers()). Sources that fit in
+    one chunk are transcribed directly.
+    """
+    if whisper is None:
+        return None
+    chunks = plan_chunks(silences, media_dur, chunk_sec) if media_dur > 0 else [(0.0, 0.0)]
+    workers = min(len(chunks), workers if workers > 0 else default_workers())
+    if len(chunks) == 1 or workers <= 1:
+        if len(chunks) == 1:
+            return whisper_transcribe(path, model=model)
+        return merge_chunks([_transcribe_chunk(path, s, e, model) for s, e in chunks], chunks)
+    # spawn: forked children of a process that already ran torch can deadlock
+    ctx = multiprocessing.get_context('spawn')
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = [pool.submit(_transcribe_chunk, path, s, e, model) for s, e in chunks]
+        results = [f.result() for f in futures]
+    return merge_chunks(results, chunks)
+
+
+class LazyTranscript:
+    """
+    Transcript of path that is only transcribed where it is asked for. transcript(ranges) runs
+    Whisper on the parts of the ranges not covered yet (each widened to the nearest silence
+    within LAZY_SNAP_SEC, never into covered time) and returns every segment transcribed so far,
+    in source time and Whisper's segments/words shape. Covered ranges are merged, so overlapping
+    requests are served from memory; with a cache, each transcribed range is also kept on disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: str = 'tiny',
+        silences: Iterable[Tuple[float, float]] = (),
+        media_dur: float = 0.0,
+        cache: Optional[AnalysisCache] = None,
+    ):
+        self.path = path
+        self.model = model
+        self.media_dur = float(media_dur)
+        self.cache = cache
+        self._mids = np.sort(np.asarray([(s + e) / 2.0 for s, e in silences], dtype=np.float64))
+        self._covered: List[Tuple[float, float]] = []  # sorted, disjoint
+        self._segments: List[dict] = []  # sorted by start
+        self._lock = threading.Lock()  # concurrent renders may ask for ranges at once
+        self.transcribed_sec = 0.0
+
+    @property
+    def covered(self) -> List[Tuple[float, float]]:
+        return list(self._covered)
+
+    def _gaps(self, start: float, end: float) -> List[Tuple[float, float, float, float]]:
+        """Uncovered parts of [start, end) as (lo, hi, floor, ceil): floor/ceil bound widening."""
+        gaps = []
+        pos = start
+        prev_end = 0.0
+        for a, b in self._covered:
+            if b <= pos:
+                prev_end = b
+                continue
+            if a >= end:
+                break
+            if a > pos:
+                gaps.append((pos, a, prev_end, a))
+            pos, prev_end = max(pos, b), b
+            if pos >= end:
+                break
+        if pos < end:
+            nxt = next((a for a, _ in self._covered if a >= end), self.media_dur or end)
+            gaps.append((pos, end, prev_end, max(nxt, end)))
+        return gaps
+
+    def _snap(self, t: float, bound: float, forward: bool) -> float:
+        """Nearest silence middle beyond t (forward: after) within LAZY_SNAP_SEC, not past bound."""
+        if forward:
+            i = int(np.searchsorted(self._mids, t, side='left'))
+            if i < len(self._mids) and self._mids[i] - t <= LAZY_SNAP_SEC:
+                return min(float(self._mids[i]), bound)
+        else:
+            i = int(np.searchsorted(self._mids, t, side='right')) - 1
+            if i >= 0 and t - self._mids[i] <= LAZY_SNAP_SEC:
+                return max(float(self._mids[i]), bound)
+        return t
+
+    def _transcribe(self, start: float, end: float) -> List[dict]:
+        def run() -> dict:
+            return _transcribe_chunk(self.path, start, end, self.model)
+        if self.cache is not None:
+            res = self.cache.fetch(self.path, 'transcript_range', run, model=self.model, start=round(start, 3), end=round(end, 3))
+        else:
+            res = run()
+        self.transcribed_sec += end - start
+        return shift_transcript(res or {}, start)
+
+    def _add(self, start: float, end: float, segments: List[dict]) -> None:
+        self._segments.extend(segments)
+        self._segments.sort(key=lambda s: s['start'])
+        merged = []
+        for a, b in sorted(self._covered + [(start, end)]):
+            if merged and a <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+            else:
+                merged.append((a, b))
+        self._covered = merged
+
+    def ensure(self, start: float, end: float) -> None:
+        """Transcribe whatever part of [start, end) is not covered yet."""
+        start = max(0.0, float(start))
+        end = min(float(end), self.media_dur) if self.media_dur else float(end)
+        if end <= start or whisper is None:
+            return
+        with self._lock:
+            for lo, hi, floor, ceil in self._gaps(start, end):
+                hi = min(max(hi, lo + LAZY_MIN_SEC), ceil)
+                lo, hi = self._snap(lo, floor, forward=False), self._snap(hi, ceil, forward=True)
+                self._add(lo, hi, self._transcribe(lo, hi))
+
+    def transcript(self, ranges: Iterable[Tuple[float, float]] = ()) -> Optional[dict]:
+        """Ensure every (start, end) range and return all segments transcribed so far (None without Whisper)."""
+        if whisper is None:
+            return None
+        for start, end in ranges:
+            self.ensure(start, end)
+        with self._lock:
+            segments = [dict(s) for s in self._segments]
+        for i, seg in enumerate(segments):
+            seg['id'] = i
+        return {'text': ''.join(seg.get('text') or '' for seg in segments), 'segments': segments}
@@ -0,0 +1,201 @@
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict, replace
+from typing import Any, Dict, List, Optional
+
+from src.pipeline import (
+    PipelineConfig, make_cache, resolve_input, analysis_input, analyze_source, source_transcript,
+    source_keyframes, plan_clips, prefetch_transcript, render_clips, open_run,
+)
+from src.analysis.transcribe import LazyTranscript
+from src.ingest.async_ingest import start_ingest
+
+# Batch runner: many sources through ingest -> analysis -> transcription -> render, with a separate
+# concurrency limit per stage so one file's analysis overlaps another file's encode.
+
+VIDEO_EXTS = ('.mp4', '.mov', '.mkv', '.webm', '.m4v', '.avi', '.ts')
+STAGES = ('ingest', 'analysis', 'transcription', 'render')
+# per-item manifest keys that override the batch-wide options
+ITEM_OPTIONS = ('durations', 'max_clips', 'stride_sec', 'idea_end', 'min_dur', 'max_dur', 'tail_pad_sec', 'head_pad_sec')
+
+
+@dataclass
+class BatchItem:
+    source: str  # local path or URL
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BatchResult:
+    source: str
+    input_path: Optional[str] = None
+    status: str = 'pending'  # pending | done | failed
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+    stage_sec: Dict[str, float] = field(default_factory=dict)
+
+
+def _is_url(s: str) -> bool:
+    return s.startswith(('http://', 'https://'))
+
+
+def collect_inputs(spec: str) -> List[BatchItem]:
+    """
+    Expand a directory, glob pattern or manifest file into batch items.
+    Manifests are .json (list), .jsonl, or plain text (one path/URL per line, '#' comments);
+    JSON entries are either strings or objects with "input" plus optional ITEM_OPTIONS overrides.
+    """
+    if os.path.isdir(spec):
+        paths = sorted(
+            os.path.join(spec, f) for f in os.listdir(spec)
+            if f.lower().endswith(VIDEO_EXTS)
+        )
+        return [BatchItem(p) for p in paths]
+    if os.path.isfile(spec) and not spec.lower().endswith(VIDEO_EXTS):
+        return _read_manifest(spec)
+    return [BatchItem(p) for p in sorted(glob.glob(spec, recursive=True)) if p.lower().endswith(VIDEO_EXTS)]
+
+
+def _read_manifest(path: str) -> List[BatchItem]:
+    with open(path, 'r') as f:
+        text = f.read()
+    if path.lower().endswith('.json'):
+        entries = json.loads(text)
+    elif path.lower().endswith('.jsonl'):
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        entries = [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith('#')]
+    items = []
+    base = os.path.dirname(os.path.abspath(path))
+    for e in entries:
+        if isinstance(e, str):
+            e = {'input': e}
+        src = str(e['input'])
+        if not _is_url(src) and not os.path.isabs(src) and not os.path.exists(src):
+            src = os.path.join(base, src)
+        items.append(BatchItem(src, {k: e[k] for k in ITEM_OPTIONS if k in e}))
+    return items
+
+
+def run_batch(
+    items: List[BatchItem],
+    conf: PipelineConfig,
+    defaults: Dict[str, Any],
+    workers: Optional[Dict[str, int]] = None,
+    use_cache: bool = True,
+    export_audio_only: bool = False,
+    summary_path: Optional[str] = None,
+) -> List[BatchResult]:
+    """
+    Run every item through the pipeline stages. Each stage has its own limit (workers[stage]);
+    an item holds one slot per stage only while that stage runs, so stages overlap across items.
+    Each item is a run (see open_run): its clips go to OUTPUT_DIR/<run id>/short_final_{idx}.*,
+    and clips a previous batch already rendered for the same inputs are skipped. A JSON summary is
+    written to summary_path if given.
+    """
+    limits = {'ingest': 2, 'analysis': max(1, (os.cpu_count() or 2) // 2), 'transcription': 1, 'render': 2}
+    limits.update({k: max(1, int(v)) for k, v in (workers or {}).items() if k in STAGES})
+    slots = {k: threading.BoundedSemaphore(v) for k, v in limits.items()}
+    if conf.ffmpeg_threads <= 0:
+        # split the cores across every ffmpeg that may run at once
+        conf = replace(conf, ffmpeg_threads=max(1, (os.cpu_count() or 1) // (limits['render'] * max(1, conf.render_workers))))
+    cache = make_cache(conf, use_cache)
+    results = [BatchResult(source=item.source) for item in items]
+
+    def timed(res: BatchResult, stage: str, fn, *args, slot: Optional[str] = None):
+        # holds slots[slot] (default: the stage's own, if it has a limit); repeated stages add up
+        with slots.get(slot or stage, nullcontext()):
+            t0 = time.perf_counter()
+            res.failed_stage = stage
+            try:
+                return fn(*args)
+            finally:
+                res.stage_sec[stage] = round(res.stage_sec.get(stage, 0.0) + time.perf_counter() - t0, 3)
+
+    def process(i: int) -> None:
+        item, res = items[i], results[i]
+        opts = {**defaults, **item.options}
+        try:
+            if _is_url(item.source):
+                got = downloads[item.source].result()  # already done: items are started per finished download
+                res.stage_sec['ingest'] = got.wall_sec
+                if not got.path:
+                    res.failed_stage = 'ingest'
+                    raise RuntimeError(f'Failed to download CC video: {got.error}')
+                path = got.path
+            else:
+                path = timed(res, 'ingest', resolve_input, item.source)
+            res.input_path = path
+
+            def analyze(src: str):
+                # the proxy (if enabled) is made inside the analysis slot; render reads the original
+                apath = analysis_input(src, conf, cache)
+                return apath, analyze_source(
+                    apath, conf, cache, opts['durations'], opts['max_clips'], opts['stride_sec'], opts['idea_end'],
+                )
+            # same id as run_pipeline_multi with these options, so either can resume the other
+            run = open_run(
+                path, conf, cache, mode='multi', export_audio_only=export_audio_only, **{k: opts[k] for k in ITEM_OPTIONS},
+            )
+            with run:
+                apath, analysis = timed(res, 'analysis', analyze, path)
+                transcript = timed(res, 'transcription', source_transcript, apath, conf, cache, opts['idea_end'], export_audio_only)
+                # a lazy transcript runs Whisper while planning, so it plans in a transcription slot
+                lazy = isinstance(transcript, LazyTranscript)
+                jobs = timed(
+                    res, 'plan', plan_clips, analysis, transcript, opts['idea_end'], opts['min_dur'], opts['max_dur'],
+                    opts['tail_pad_sec'], opts['head_pad_sec'], conf.joint_selection,
+                    slot='transcription' if lazy else None,
+                )
+                if lazy:
+                    # subtitle ranges too, instead of inside the render slot
+                    timed(res, 'transcription', prefetch_transcript, transcript, jobs, conf, export_audio_only, run)
+                keyframes = None
+                if not export_audio_only:
+                    keyframes = timed(res, 'keyframes', source_keyframes, path, conf, cache, slot='analysis')
+                res.outputs = timed(
+                    res, 'render', render_clips, path, jobs, transcript, conf, export_audio_only,
+                    run.work_dir, run.out_dir, keyframes, run,
+                )
+            res.status = 'done'
+            res.failed_stage = None
+        except Exception as e:
+            res.status = 'failed'
+            res.error = f'{type(e).__name__}: {e}'
+
+    # URL downloads all start at once on an asyncio loop (at most workers['ingest'] yt-dlp processes);
+    # local items start right away and each URL item as soon as its own download lands
+    downloads = start_ingest(
+        [item.source for item in items if _is_url(item.source)], conf.raw_dir, limits['ingest'],
+        max_bytes=int(conf.raw_max_mb * 1024 * 1024),
+    )
+    by_url: Dict[str, List[int]] = {}
+    for i, item in enumerate(items):
+        if _is_url(item.source):
+            by_url.setdefault(item.source, []).append(i)
+
+    # enough drivers that every stage can be saturated at once
+    with ThreadPoolExecutor(max_workers=max(1, min(len(items), sum(limits.values())))) as pool:
+        running = [pool.submit(process, i) for i, item in enumerate(items) if not _is_url(item.source)]
+        urls = {f: url for url, f in downloads.items()}
+        for f in as_completed(urls):
+            running.extend(pool.submit(process, i) for i in by_url[urls[f]])
+        for f in running:
+            f.result()
+
+    if summary_path:
+        os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+        with open(summary_path, 'w') as f:
+            json.dump({
+                'workers': limits,
+                'done': sum(1 for r in results if r.status == 'done'),
+                'failed': sum(1 for r in results if r.status == 'failed'),
+                'items': [asdict(r) for r in results],
+            }, f, indent=2)
+    return results
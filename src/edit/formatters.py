@@ -1,6 +1,62 @@
-from typing import Tuple
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 import ffmpeg
 import os
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+
+from src.metrics import run_ffmpeg
+
+# cut_segment modes: 'copy' stream-copies from the keyframe at or before start (fast, may add leading
+# frames); 'smart' re-encodes only the partial GOP before the first keyframe inside the clip and
+# stream-copies the rest (frame-accurate at close to copy speed); 'accurate' re-encodes everything.
+CUT_MODES = ('copy', 'smart', 'accurate')
+# encoders able to produce a head GOP that concatenates with copied packets of the same codec
+_SMART_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+_KEYFRAME_EPS = 1e-3
+# the blurred background is built at 1/BG_DOWNSCALE of the canvas and scaled up: a box blur of
+# radius r there looks like radius r*BG_DOWNSCALE at full size, for ~1/BG_DOWNSCALE^2 of the work
+BG_DOWNSCALE = 4
+
+
+def ffmpeg_thread_args(threads: Optional[int]) -> dict:
+    """Per-process ffmpeg thread cap (None/0 lets ffmpeg pick, i.e. use every core)."""
+    return {'threads': int(threads)} if threads else {}
+
+
+def _vertical_composite(
+    bg_src,
+    fg_src,
+    width: int,
+    height: int,
+    blur: int,
+    fg_scale: float,
+    bg_brightness: float,
+    bg_saturation: float,
+    bg_downscale: int = BG_DOWNSCALE,
+):
+    """Blurred full-canvas background with the scaled foreground centered on top (yuv420p)."""
+    # Background: fill, crop, blur and gently brighten at 1/bg_downscale of the canvas (blur
+    # radius scaled to match), then upscale to the exact canvas; bilinear keeps it smooth
+    d = max(1, int(bg_downscale))
+    bw, bh = max(2, width // d // 2 * 2), max(2, height // d // 2 * 2)
+    bg = (
+        bg_src
+        .filter('scale', bw, bh, force_original_aspect_ratio='increase')
+        .filter('crop', bw, bh)
+        .filter('boxblur', max(1, round(blur / d)))
+        .filter('eq', brightness=bg_brightness, saturation=bg_saturation)
+    )
+    if (bw, bh) != (width, height):
+        bg = bg.filter('scale', width, height, flags='bilinear')
+
+    # Foreground: target a fraction of canvas HEIGHT (keeps aspect ratio), centered
+    # Note: Scaling by height avoids the "too small" look on wide 16:9 sources.
+    fg = fg_src.filter('scale', -2, int(height * fg_scale))
+
+    return ffmpeg.overlay(bg, fg, x='(W-w)/2', y='(H-h)/2').filter('format', 'yuv420p')
 
 
 def to_vertical(
@@ -13,65 +69,258 @@ def to_vertical(
     fg_scale: float = 0.95,  # scale foreground height relative to canvas (e.g., 0.95 = 95%)
     bg_brightness: float = 0.08,  # lift background brightness slightly
     bg_saturation: float = 1.05,  # a touch more color on BG
+    threads: Optional[int] = None,
+    bg_downscale: int = BG_DOWNSCALE,
 ):
     """
     Convert any aspect to an exact WxH canvas (e.g., 1080x1920) by:
-    - making a blurred background that fills the canvas
+    - making a blurred background that fills the canvas (blurred at 1/bg_downscale size, 1 = full)
     - scaling the foreground to fit and padding to center
     Ensures the final output dimensions are exactly width x height.
+    The input is demuxed and decoded once; the video is split into background and foreground.
     """
-    # Background: fill, crop, blur, and gently brighten to exact canvas
-    bg = (
+    inp = ffmpeg.input(input_path)
+    split = inp.video.split()
+    video = _vertical_composite(
+        split[0], split[1],
+        width, height, blur, fg_scale, bg_brightness, bg_saturation, bg_downscale,
+    )
+    audio = inp.audio
+
+    run_ffmpeg(
         ffmpeg
-        .input(input_path)
-        .video
-        .filter('scale', width, height, force_original_aspect_ratio='increase')
-        .filter('crop', width, height)
-        .filter('boxblur', blur)
-        .filter('eq', brightness=bg_brightness, saturation=bg_saturation)
+        .output(video, audio, output_path, r=30, preset='veryfast', crf=20, movflags='faststart', **ffmpeg_thread_args(threads))
+        .overwrite_output(),
+        'to_vertical',
     )
 
-    # Foreground: target a fraction of canvas HEIGHT (keeps aspect ratio), centered
-    # Note: Scaling by height avoids the "too small" look on wide 16:9 sources.
-    fg = (
+
+def render_clip(
+    input_path: str,
+    output_path: str,
+    start: float,
+    duration: float,
+    width: int = 1080,
+    height: int = 1920,
+    blur: int = 18,
+    fg_scale: float = 0.95,
+    bg_brightness: float = 0.08,
+    bg_saturation: float = 1.05,
+    ass_path: Optional[str] = None,
+    fps: int = 30,
+    threads: Optional[int] = None,
+):
+    """
+    Single-encode render: accurate seek into the source, blurred-background vertical composite and
+    (optionally) burned-in ASS subtitles in one filter graph. The source is decoded once and the
+    output encoded once, and the clip starts exactly at `start` rather than the previous keyframe.
+    ass_path timings are relative to `start`.
+    """
+    inp = ffmpeg.input(input_path, ss=start, t=duration)
+    split = inp.video.split()
+    video = _vertical_composite(split[0], split[1], width, height, blur, fg_scale, bg_brightness, bg_saturation)
+    if ass_path:
+        video = video.filter('subtitles', ass_path)
+    run_ffmpeg(
         ffmpeg
-        .input(input_path)
-        .video
-        .filter('scale', -2, int(height * fg_scale))
+        .output(video, inp.audio, output_path, r=fps, preset='veryfast', crf=20, movflags='faststart', **ffmpeg_thread_args(threads))
+        .overwrite_output(),
+        'render_clip',
     )
 
-    video = ffmpeg.overlay(bg, fg, x='(W-w)/2', y='(H-h)/2').filter('format', 'yuv420p')
-    a_inp = ffmpeg.input(input_path)
-    audio = a_inp.audio
 
-    (
+@dataclass
+class CanvasOutput:
+    """One output of render_canvases: canvas size, frame rate, background blur and optional subtitles."""
+    path: str
+    width: int
+    height: int
+    fps: int = 30
+    blur: int = 18
+    ass_path: Optional[str] = None
+
+
+def render_canvases(
+    input_path: str,
+    outputs: List[CanvasOutput],
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+    fg_scale: float = 0.95,
+    bg_brightness: float = 0.08,
+    bg_saturation: float = 1.05,
+    threads: Optional[int] = None,
+):
+    """
+    Render several canvases (e.g. 9:16 and 1:1 profiles) of one clip in a single ffmpeg run: the
+    input is decoded once and split into one blurred-background composite per output, each encoded
+    to its own file. With start/duration the input is seeked accurately (as in render_clip).
+    """
+    in_kwargs = {}
+    if start is not None:
+        in_kwargs['ss'] = start
+    if duration is not None:
+        in_kwargs['t'] = duration
+    inp = ffmpeg.input(input_path, **in_kwargs)
+    split = inp.video.split()
+    streams = []
+    for i, o in enumerate(outputs):
+        video = _vertical_composite(split[2 * i], split[2 * i + 1], o.width, o.height, o.blur, fg_scale, bg_brightness, bg_saturation)
+        if o.ass_path:
+            video = video.filter('subtitles', o.ass_path)
+        streams.append(ffmpeg.output(
+            video, inp.audio, o.path, r=o.fps, preset='veryfast', crf=20, movflags='faststart', **ffmpeg_thread_args(threads),
+        ))
+    run_ffmpeg(ffmpeg.merge_outputs(*streams).overwrite_output(), 'render_canvases')
+
+
+def probe_keyframes(path: str) -> np.ndarray:
+    """
+    Sorted keyframe times (seconds from the start of the file, as -ss counts them) of the first
+    video stream, read from packet flags by ffprobe without decoding.
+    """
+    out = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    times = []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(',')
+        if 'K' in flags and pts not in ('', 'N/A'):
+            times.append(float(pts))
+    start_time = float(ffmpeg.probe(path).get('format', {}).get('start_time') or 0.0)
+    return np.unique(np.asarray(times, dtype=np.float64)) - start_time
+
+
+def _first_streams(path: str) -> Tuple[Optional[dict], Optional[dict]]:
+    """(first video stream, first audio stream) of path as reported by ffprobe."""
+    found = {}
+    for st in ffmpeg.probe(path).get('streams', []):
+        found.setdefault(st.get('codec_type'), st)
+    return found.get('video'), found.get('audio')
+
+
+def cut_accurate(input_path: str, output_path: str, start: float, duration: float, threads: Optional[int] = None):
+    """Frame-accurate cut by re-encoding the whole range."""
+    run_ffmpeg(
         ffmpeg
-        .output(video, audio, output_path, r=30, preset='veryfast', crf=20, movflags='faststart')
-        .overwrite_output()
-        .run(quiet=True)
+        .input(input_path, ss=start, t=duration)
+        .output(output_path, vcodec='libx264', preset='veryfast', crf=18, acodec='aac', audio_bitrate='192k', movflags='faststart', **ffmpeg_thread_args(threads))
+        .overwrite_output(),
+        'cut_accurate',
     )
 
 
-def cut_segment(input_path: str, output_path: str, start: float, duration: float):
-    (
+def smart_cut(
+    input_path: str,
+    output_path: str,
+    start: float,
+    duration: float,
+    keyframes: Optional[np.ndarray] = None,
+    threads: Optional[int] = None,
+):
+    """
+    Frame-accurate cut that re-encodes only [start, first keyframe >= start) and stream-copies
+    the video from that keyframe on; the two parts are joined as MPEG-TS (in-band parameter
+    sets) and muxed with the audio, re-encoded from exactly start. keyframes is the source's
+    probe_keyframes() index (probed here if not given). Falls back to cut_accurate when the
+    codec can't be smart-cut or no keyframe falls inside the clip.
+    """
+    end = start + duration
+    vst, ast = _first_streams(input_path)
+    encoder = _SMART_ENCODERS.get((vst or {}).get('codec_name'))
+    if keyframes is None and encoder:
+        keyframes = probe_keyframes(input_path)
+    i = int(np.searchsorted(keyframes, start - _KEYFRAME_EPS)) if encoder else 0
+    if not encoder or i >= len(keyframes) or keyframes[i] >= end - _KEYFRAME_EPS:
+        return cut_accurate(input_path, output_path, start, duration, threads)
+    k1 = float(keyframes[i])
+
+    tmp = tempfile.mkdtemp(prefix='smartcut_')
+    try:
+        parts = []
+        if k1 - start > _KEYFRAME_EPS:
+            head = os.path.join(tmp, 'head.ts')
+            run_ffmpeg(
+                ffmpeg
+                .input(input_path, ss=start, t=k1 - start)
+                .video
+                .output(head, vcodec=encoder, preset='veryfast', crf=18, pix_fmt=vst.get('pix_fmt') or 'yuv420p', **ffmpeg_thread_args(threads))
+                .overwrite_output(),
+                'smart_cut_head',
+            )
+            parts.append(head)
+        body = os.path.join(tmp, 'body.ts')
+        run_ffmpeg(
+            ffmpeg
+            .input(input_path, ss=k1, t=end - k1)
+            .video
+            .output(body, vcodec='copy')
+            .overwrite_output(),
+            'smart_cut_copy',
+        )
+        parts.append(body)
+        list_path = os.path.join(tmp, 'parts.txt')
+        with open(list_path, 'w') as f:
+            f.writelines(f"file '{p}'\n" for p in parts)
+        streams = [ffmpeg.input(list_path, f='concat', safe=0).video]
+        out_kwargs = {'vcodec': 'copy', 'movflags': 'faststart'}
+        if ast is not None:
+            streams.append(ffmpeg.input(input_path, ss=start, t=duration).audio)
+            out_kwargs.update(acodec='aac', audio_bitrate='192k')
+        run_ffmpeg(ffmpeg.output(*streams, output_path, **out_kwargs).overwrite_output(), 'smart_cut_mux')
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def cut_segment(
+    input_path: str,
+    output_path: str,
+    start: float,
+    duration: float,
+    mode: str = 'copy',
+    keyframes: Optional[np.ndarray] = None,
+    threads: Optional[int] = None,
+):
+    """Cut [start, start+duration) of input_path; mode is one of CUT_MODES."""
+    if mode not in CUT_MODES:
+        raise ValueError(f'Unknown cut mode {mode!r}; expected one of {CUT_MODES}')
+    if mode == 'smart':
+        return smart_cut(input_path, output_path, start, duration, keyframes=keyframes, threads=threads)
+    if mode == 'accurate':
+        return cut_accurate(input_path, output_path, start, duration, threads)
+    run_ffmpeg(
         ffmpeg
         .input(input_path, ss=start, t=duration)
         .output(output_path, c='copy', movflags='faststart')
-        .overwrite_output()
-        .run(quiet=True)
+        .overwrite_output(),
+        'cut_segment',
     )
 
 
-def export_audio(input_path: str, output_path: str, bitrate: str = '192k'):
-    """Extract audio to MP3 (or extension-driven format)."""
-    a = ffmpeg.input(input_path).audio
+def export_audio(
+    input_path: str,
+    output_path: str,
+    bitrate: str = '192k',
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+):
+    """
+    Extract audio to MP3 (or extension-driven format). With start/duration the range is read
+    straight from input_path; input seeking is sample-accurate when transcoding.
+    """
+    in_kwargs = {}
+    if start is not None:
+        in_kwargs['ss'] = start
+    if duration is not None:
+        in_kwargs['t'] = duration
+    a = ffmpeg.input(input_path, **in_kwargs).audio
     # If extension is .mp3, use libmp3lame; else let ffmpeg pick
     kwargs = {}
     if output_path.lower().endswith('.mp3'):
         kwargs.update({'acodec': 'libmp3lame', 'audio_bitrate': bitrate})
-    (
+    run_ffmpeg(
         ffmpeg
         .output(a, output_path, **kwargs)
-        .overwrite_output()
-        .run(quiet=True)
+        .overwrite_output(),
+        'export_audio',
     )
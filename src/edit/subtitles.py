@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import ffmpeg
 import tempfile
 import os
@@ -8,11 +8,14 @@ try:
 except Exception:  # optional dependency fallback
     whisper = None
 
+from src.analysis.semantic import whisper_transcribe
+from src.edit.formatters import ffmpeg_thread_args
+from src.metrics import run_ffmpeg
 
-def burn_subtitles_karaoke(
-    input_path: str,
-    output_path: str,
-    model: str = "tiny",
+
+def write_karaoke_ass(
+    res: dict,
+    ass_path: str,
     font: str = "DejaVu Sans",
     font_size: int = 108,  # 2x larger
     primary_color: str = "&H00FFFFFF&",  # ASS BGR with &H..& format
@@ -22,22 +25,9 @@ def burn_subtitles_karaoke(
     shadow: int = 0,
     margin_lr: int = 80,
     margin_bottom: int = 0,  # use as center offset when centered
-):
-    """
-    Transcribe with Whisper (if available) and burn animated karaoke-style subtitles.
-    If Whisper is unavailable, this no-ops and just copies the input.
-    """
-    if whisper is None:
-        # pass-through
-        ffmpeg.input(input_path).output(output_path, c='copy', movflags='faststart').overwrite_output().run(quiet=True)
-        return
-
-    tmpdir = tempfile.mkdtemp()
-    ass_path = os.path.join(tmpdir, 'subs.ass')
-
-    model_obj = whisper.load_model(model)
-    res = model_obj.transcribe(input_path, word_timestamps=True)
-
+    play_res: Tuple[int, int] = (1080, 1920),  # canvas the style sizes refer to; match the video's aspect
+) -> str:
+    """Write a karaoke-style ASS file from a word-timestamped transcript and return its path."""
     # Build ASS with karaoke effect using \k tags
     def ass_time(sec: float) -> str:
         # ASS uses h:mm:ss.cs (centiseconds)
@@ -52,8 +42,8 @@ def burn_subtitles_karaoke(
 
     header = f"""[Script Info]
 ScriptType: v4.00+
-PlayResX: 1080
-PlayResY: 1920
+PlayResX: {int(play_res[0])}
+PlayResY: {int(play_res[1])}
 WrapStyle: 2
 
 [V4+ Styles]
@@ -152,12 +142,53 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 
     with open(ass_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(lines))
+    return ass_path
+
+
+def burn_subtitles_karaoke(
+    input_path: str,
+    output_path: str,
+    model: str = "tiny",
+    font: str = "DejaVu Sans",
+    font_size: int = 108,  # 2x larger
+    primary_color: str = "&H00FFFFFF&",  # ASS BGR with &H..& format
+    secondary_color: str = "&H0000FF00&",  # highlight color for karaoke effect
+    outline_color: str = "&H00000000&",
+    outline: int = 16,  # 2x thicker outline
+    shadow: int = 0,
+    margin_lr: int = 80,
+    margin_bottom: int = 0,  # use as center offset when centered
+    transcript: Optional[dict] = None,
+    threads: Optional[int] = None,
+):
+    """
+    Transcribe with Whisper (if available) and burn animated karaoke-style subtitles.
+    A precomputed word-timestamp transcript (timed relative to input_path) skips Whisper entirely.
+    If neither is available, this no-ops and just copies the input.
+    """
+    if transcript is None and whisper is None:
+        # pass-through
+        run_ffmpeg(ffmpeg.input(input_path).output(output_path, c='copy', movflags='faststart').overwrite_output(), 'copy')
+        return
+
+    tmpdir = tempfile.mkdtemp()
+    ass_path = os.path.join(tmpdir, 'subs.ass')
+
+    if transcript is not None:
+        res = transcript
+    else:
+        res = whisper_transcribe(input_path, model=model)
+    write_karaoke_ass(
+        res, ass_path, font=font, font_size=font_size, primary_color=primary_color,
+        secondary_color=secondary_color, outline_color=outline_color, outline=outline,
+        shadow=shadow, margin_lr=margin_lr, margin_bottom=margin_bottom,
+    )
 
     inp = ffmpeg.input(input_path)
     styled = inp.video.filter('subtitles', ass_path)
-    (
+    run_ffmpeg(
         ffmpeg
-        .output(styled, inp.audio, output_path, **{'c:v': 'libx264', 'c:a': 'copy', 'movflags': 'faststart'})
-        .overwrite_output()
-        .run(quiet=True)
+        .output(styled, inp.audio, output_path, **{'c:v': 'libx264', 'c:a': 'copy', 'movflags': 'faststart', **ffmpeg_thread_args(threads)})
+        .overwrite_output(),
+        'burn_subtitles',
     )
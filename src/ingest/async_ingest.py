@@ -0,0 +1,241 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from src.ingest.store import DEFAULT_RAW_DIR, RawStore, video_id_from_url
+
+# asyncio ingest layer: yt-dlp runs as asyncio subprocesses, at most `concurrency` at a time.
+# Each URL costs one metadata extraction (--dump-json); the same info dict decides the license
+# check and is handed back to yt-dlp (--load-info-json) for the download, so nothing is fetched
+# twice. Downloads go through a RawStore (src/ingest/store.py), so a video that is already stored
+# is returned without running yt-dlp. Results are yielded as downloads finish, so callers can
+# start analysis early.
+# The executable is taken from $YTDLP_BIN (default 'yt-dlp'), which lets tests use a fake one.
+
+YTDLP_ENV = 'YTDLP_BIN'
+DEFAULT_CONCURRENCY = 4
+OUTPUT_TEMPLATE = '%(id)s.%(ext)s'  # deterministic per video: concurrent downloads never collide
+
+
+class YtDlpError(RuntimeError):
+    pass
+
+
+@dataclass
+class IngestResult:
+    url: str
+    path: Optional[str] = None
+    info: Optional[dict] = None
+    error: Optional[str] = None
+    cached: bool = False  # served from the raw store without downloading
+    wall_sec: float = 0.0  # metadata + download, including time spent waiting for a slot
+
+
+def ytdlp_bin() -> str:
+    return os.environ.get(YTDLP_ENV) or 'yt-dlp'
+
+
+def is_creative_commons(license_str: Optional[str]) -> bool:
+    return 'creative' in (license_str or '').lower()
+
+
+async def run_ytdlp(*args: str) -> str:
+    """Run yt-dlp with args and return its stdout; YtDlpError on a non-zero exit."""
+    proc = await asyncio.create_subprocess_exec(
+        ytdlp_bin(), *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate()
+    if proc.returncode != 0:
+        msg = err.decode('utf-8', 'replace').strip().splitlines()
+        raise YtDlpError(f'yt-dlp exited with {proc.returncode}: {msg[-1] if msg else ""}')
+    return out.decode('utf-8', 'replace')
+
+
+def _json_lines(out: str) -> List[dict]:
+    infos = []
+    for line in out.splitlines():
+        line = line.strip()
+        if line.startswith('{'):
+            try:
+                infos.append(json.loads(line))
+            except ValueError:
+                continue
+    return infos
+
+
+async def fetch_info(url: str) -> dict:
+    """Full yt-dlp metadata for one video (title, license, view_count, formats, ...)."""
+    infos = _json_lines(await run_ytdlp(url, '--dump-json', '--skip-download', '--no-warnings'))
+    if not infos:
+        raise YtDlpError(f'yt-dlp returned no metadata for {url}')
+    return infos[0]
+
+
+async def search_infos(query: str, limit: int = 20) -> List[dict]:
+    """Metadata of the first `limit` search results for query, one --dump-json call."""
+    return _json_lines(await run_ytdlp(f'ytsearch{int(limit)}:{query}', '--dump-json', '--skip-download', '--no-warnings'))
+
+
+async def download_from_info(info: dict, out_dir: str) -> str:
+    """
+    Download the video described by a --dump-json info dict without extracting it again, and
+    return the file yt-dlp wrote (reported by --print after_move:filepath, not guessed from mtimes).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    fd, info_path = tempfile.mkstemp(prefix='ytdlp_', suffix='.info.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(info, f)
+        out = await run_ytdlp(
+            '--load-info-json', info_path, '-f', 'mp4', '-o', os.path.join(out_dir, OUTPUT_TEMPLATE),
+            '--no-simulate', '--print', 'after_move:filepath', '--no-warnings',
+        )
+    finally:
+        os.remove(info_path)
+    paths = [line.strip() for line in out.splitlines() if line.strip()]
+    if not paths or not os.path.exists(paths[-1]):
+        raise YtDlpError(f'yt-dlp reported no output file for {info.get("webpage_url") or info.get("id")}')
+    return paths[-1]
+
+
+class AsyncIngest:
+    """
+    Concurrent CC-checked downloads into a RawStore at out_dir (capped at max_bytes, 0 = no cap);
+    `concurrency` bounds the yt-dlp processes running at once.
+    """
+
+    def __init__(self, out_dir: str = DEFAULT_RAW_DIR, concurrency: int = DEFAULT_CONCURRENCY, max_bytes: int = 0):
+        self.store = RawStore(out_dir, max_bytes)
+        self.concurrency = max(1, int(concurrency))
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._id_locks: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def sem(self) -> asyncio.Semaphore:
+        # created lazily so it binds to the loop that actually runs the ingest
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._sem
+
+    async def info(self, url: str) -> dict:
+        async with self.sem:
+            return await fetch_info(url)
+
+    async def _stored(self, res: IngestResult, video_id: str) -> bool:
+        entry = await asyncio.to_thread(self.store.lookup, video_id)
+        if entry is None:
+            return False
+        res.path, res.cached = entry['path'], True
+        return True
+
+    async def ingest(self, url: str, info: Optional[dict] = None) -> IngestResult:
+        """
+        Return the stored file for the video if there is one; otherwise check the license (from
+        info, fetched if not given), download a CC video and add it to the store.
+        """
+        res = IngestResult(url=url, info=info)
+        t0 = time.perf_counter()
+        try:
+            video_id = (info or {}).get('id') or video_id_from_url(url)
+            if video_id and await self._stored(res, video_id):
+                return res
+            if res.info is None:
+                res.info = await self.info(url)
+            if not is_creative_commons(res.info.get('license')):
+                res.error = f'not Creative Commons licensed (license: {res.info.get("license")!r})'
+                return res
+            video_id = str(res.info['id'])
+            # one download per id: in this loop via an asyncio lock, across processes via the
+            # store's file lock (taken off-loop, it blocks)
+            lock = self._id_locks.setdefault(video_id, asyncio.Lock())
+            async with lock:
+                handle = await asyncio.to_thread(self.store.lock_id, video_id)
+                try:
+                    if await self._stored(res, video_id):
+                        return res
+                    # the semaphore is released between metadata and download, so other URLs'
+                    # metadata calls can run while this one waits for a download slot
+                    async with self.sem:
+                        path = await download_from_info(res.info, self.store.root)
+                    entry = await asyncio.to_thread(
+                        self.store.add, video_id, path,
+                        url=url, title=res.info.get('title'), license=res.info.get('license'),
+                    )
+                    res.path = entry['path']
+                finally:
+                    self.store.unlock_id(handle)
+        except Exception as e:
+            res.error = f'{type(e).__name__}: {e}'
+        finally:
+            res.wall_sec = round(time.perf_counter() - t0, 3)
+        return res
+
+    async def ingest_many(self, urls: Iterable[str]) -> AsyncIterator[IngestResult]:
+        """Ingest all urls concurrently, yielding each result as soon as it finishes."""
+        tasks = [asyncio.ensure_future(self.ingest(u)) for u in urls]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def search_cc(self, query: str, limit: int = 20) -> Optional[dict]:
+        """Info dict of the most viewed CC-licensed video among the search results, or None."""
+        async with self.sem:
+            infos = await search_infos(query, limit)
+        cc = [i for i in infos if is_creative_commons(i.get('license'))]
+        return max(cc, key=lambda i: int(i.get('view_count') or 0), default=None)
+
+
+def ingest_urls(
+    urls: Iterable[str],
+    out_dir: str = DEFAULT_RAW_DIR,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    on_result: Optional[Callable[[IngestResult], None]] = None,
+    max_bytes: int = 0,
+) -> List[IngestResult]:
+    """Blocking wrapper: ingest urls concurrently, calling on_result in completion order."""
+    async def main() -> List[IngestResult]:
+        results = []
+        async for res in AsyncIngest(out_dir, concurrency, max_bytes).ingest_many(urls):
+            if on_result is not None:
+                on_result(res)
+            results.append(res)
+        return results
+    return asyncio.run(main())
+
+
+def start_ingest(
+    urls: Iterable[str],
+    out_dir: str = DEFAULT_RAW_DIR,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_bytes: int = 0,
+) -> Dict[str, 'Future[IngestResult]']:
+    """
+    Start ingesting urls on an event loop in a background thread and return one Future per
+    distinct URL; each resolves when that download finishes, independently of the others.
+    """
+    futures: Dict[str, Future] = {u: Future() for u in urls}
+    if not futures:
+        return futures
+
+    def deliver(res: IngestResult) -> None:
+        futures[res.url].set_result(res)
+
+    def run() -> None:
+        try:
+            ingest_urls(list(futures), out_dir, concurrency, on_result=deliver, max_bytes=max_bytes)
+        except BaseException as e:
+            for f in futures.values():
+                if not f.done():
+                    f.set_exception(e)
+
+    threading.Thread(target=run, name='ingest', daemon=True).start()
+    return futures
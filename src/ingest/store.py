@@ -0,0 +1,150 @@
+import fcntl
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+from src.analysis.cache import file_digest
+
+# Raw-media store for downloaded sources. Files live at deterministic paths <root>/<id>.<ext>,
+# so concurrent downloads never share a name. index.json maps video id -> {path, sha, size,
+# license, ...}, and a repeat request for a known id is answered without running yt-dlp. Two ids
+# with identical content (re-uploads) share one file by content hash. The total size is capped,
+# and the least recently used entries are evicted first. The index is read and written under an
+# exclusive flock on .index.lock; each id also has its own lock, held while it downloads.
+
+DEFAULT_RAW_DIR = 'data/raw'
+INDEX_VERSION = 1
+EVICT_GRACE_SEC = 3600  # never evict entries used this recently (they may be under analysis)
+_ID_RE = re.compile(r'^[A-Za-z0-9_-]{6,}$')
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """YouTube video id from a watch/shorts/embed/youtu.be URL, without asking yt-dlp."""
+    u = urlparse(url)
+    host = (u.hostname or '').lower()
+    vid = None
+    if host.endswith('youtu.be'):
+        vid = u.path.strip('/').split('/')[0]
+    elif host.endswith('youtube.com'):
+        if u.path == '/watch':
+            vid = (parse_qs(u.query).get('v') or [None])[0]
+        else:
+            parts = u.path.strip('/').split('/')
+            if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+                vid = parts[1]
+    return vid if vid and _ID_RE.match(vid) else None
+
+
+class RawStore:
+    def __init__(self, root: str = DEFAULT_RAW_DIR, max_bytes: int = 0):
+        self.root = root
+        self.max_bytes = int(max_bytes)  # 0 = unbounded
+        self.index_path = os.path.join(root, 'index.json')
+        os.makedirs(os.path.join(root, '.locks'), exist_ok=True)
+
+    @contextmanager
+    def _flock(self, name: str) -> Iterator[None]:
+        with open(os.path.join(self.root, '.locks', f'{name}.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def lock_id(self, video_id: str) -> IO:
+        """
+        Take video_id's download lock (blocking) and return the handle to pass to unlock_id.
+        Held while the id downloads, so a concurrent request for it waits and then hits.
+        """
+        f = open(os.path.join(self.root, '.locks', f'id_{video_id}.lock'), 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        except BaseException:
+            f.close()
+            raise
+        return f
+
+    @staticmethod
+    def unlock_id(handle: IO) -> None:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        handle.close()
+
+    @contextmanager
+    def _index(self) -> Iterator[Dict[str, Any]]:
+        """Locked read-modify-write of the index; the new version is written atomically."""
+        with self._flock('index'):
+            try:
+                with open(self.index_path, 'r') as f:
+                    index = json.load(f)
+                if index.get('version') != INDEX_VERSION:
+                    raise ValueError('index version')
+            except (OSError, ValueError):
+                index = {'version': INDEX_VERSION, 'entries': {}}
+            yield index
+            tmp = f'{self.index_path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.index_path)
+
+    def lookup(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Index entry for video_id (its file still present), marked as just used; else None."""
+        with self._index() as index:
+            entry = index['entries'].get(video_id)
+            if entry is None:
+                return None
+            if not os.path.exists(entry['path']):
+                del index['entries'][video_id]
+                return None
+            entry['last_used'] = time.time()
+            return dict(entry)
+
+    def add(self, video_id: str, path: str, **meta) -> Dict[str, Any]:
+        """
+        Register a downloaded file for video_id. If another entry already holds identical content
+        the new file is dropped and the entry points at the existing one. Evicts LRU entries when
+        the store is over its size cap. Returns the entry.
+        """
+        sha = file_digest(path)
+        size = os.path.getsize(path)
+        with self._index() as index:
+            entries = index['entries']
+            same = next(
+                (e for vid, e in entries.items() if vid != video_id and e['sha'] == sha and os.path.exists(e['path'])),
+                None,
+            )
+            if same is not None and os.path.abspath(same['path']) != os.path.abspath(path):
+                os.remove(path)
+                path = same['path']
+            now = time.time()
+            entry = {'path': path, 'sha': sha, 'size': size, 'added': now, 'last_used': now, **meta}
+            entries[video_id] = entry
+            self._evict(entries, keep=video_id)
+            return dict(entry)
+
+    def _evict(self, entries: Dict[str, Dict[str, Any]], keep: str) -> None:
+        if self.max_bytes <= 0:
+            return
+        # shared files count once
+        sizes = {e['path']: e['size'] for e in entries.values()}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        cutoff = time.time() - EVICT_GRACE_SEC
+        for vid, e in sorted(entries.items(), key=lambda kv: kv[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if vid == keep or e['last_used'] > cutoff:
+                continue
+            del entries[vid]
+            path = e['path']
+            if any(o['path'] == path for o in entries.values()):
+                continue  # still referenced by another id
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= sizes.get(path, 0)
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from typing import Optional
-import subprocess
-import json
+import asyncio
+
+from src.ingest.async_ingest import fetch_info
 
 @dataclass
 class VideoMeta:
@@ -12,10 +13,7 @@ class VideoMeta:
 
 def get_youtube_meta(url: str) -> Optional[VideoMeta]:
     try:
-        out = subprocess.check_output([
-            "yt-dlp", url, "--dump-json", "--skip-download"
-        ], text=True)
-        data = json.loads(out)
+        data = asyncio.run(fetch_info(url))
         return VideoMeta(
             url=url,
             title=data.get("title"),
@@ -0,0 +1,278 @@
+import contextvars
+import json
+import os
+import re
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import ffmpeg
+
+# Run instrumentation: stages record wall/CPU time, peak RSS, bytes read/written and the stats of
+# every ffmpeg they run. Nothing is measured unless a RunRecorder is active in the current context
+# (see recording()); pool threads see it when their work is submitted through copy_context().
+# Stage CPU and I/O are per thread, plus the usage of the ffmpeg children the stage reaped itself
+# (run_ffmpeg / reap), so stages running side by side do not count each other's work.
+
+EventCallback = Callable[[Dict[str, Any]], None]
+
+_FFMPEG_STAT = re.compile(r'(frame|fps|size|time|bitrate|speed)=\s*(\S+)')
+
+
+@dataclass
+class FfmpegStats:
+    label: str
+    wall_sec: float
+    frames: Optional[int] = None
+    fps: Optional[float] = None
+    out_time_sec: Optional[float] = None
+    speed: Optional[float] = None  # encode speed as a multiple of realtime
+    size_kb: Optional[int] = None
+
+
+@dataclass
+class StageRecord:
+    name: str
+    parent: Optional[str]
+    thread: str
+    start_sec: float  # offset from the start of the run
+    wall_sec: float = 0.0
+    cpu_sec: float = 0.0         # this thread's CPU plus child_cpu_sec
+    child_cpu_sec: float = 0.0   # ffmpeg children run in this stage or its sub-stages (any thread)
+    peak_rss_mb: float = 0.0     # process high-water mark when the stage ended
+    child_peak_rss_mb: float = 0.0  # largest of those children
+    read_bytes: int = 0          # this thread, via read()/write() syscalls
+    write_bytes: int = 0
+    child_read_bytes: int = 0    # those children, storage-level blocks
+    child_write_bytes: int = 0
+    error: Optional[str] = None
+    ffmpeg: List[FfmpegStats] = field(default_factory=list)
+
+
+def _thread_io() -> Tuple[int, int]:
+    """(rchar, wchar) of the calling thread; (0, 0) where /proc has no per-task io."""
+    try:
+        with open(f'/proc/self/task/{threading.get_native_id()}/io', 'r') as f:
+            vals = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(vals.get('rchar', 0)), int(vals.get('wchar', 0))
+    except (OSError, ValueError):
+        return 0, 0
+
+
+def _snapshot() -> Dict[str, float]:
+    rchar, wchar = _thread_io()
+    return {
+        'wall': time.perf_counter(),
+        'thread_cpu': time.thread_time(),
+        'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'rchar': rchar,
+        'wchar': wchar,
+    }
+
+
+def parse_ffmpeg_stats(stderr: str) -> Dict[str, Any]:
+    """Last progress line of ffmpeg's stderr ('frame= .. fps= .. time= .. speed=1.5x') as numbers."""
+    last: Dict[str, str] = {}
+    for line in stderr.replace('\r', '\n').splitlines():
+        found = dict(_FFMPEG_STAT.findall(line))
+        if 'time' in found or 'speed' in found:
+            last = found
+    out: Dict[str, Any] = {}
+    try:
+        if 'frame' in last:
+            out['frames'] = int(last['frame'])
+        if 'fps' in last:
+            out['fps'] = float(last['fps'])
+        if 'size' in last and last['size'].lower().endswith(('kb', 'kib')):
+            out['size_kb'] = int(re.sub(r'[^0-9]', '', last['size']) or 0)
+        if 'time' in last and last['time'].count(':') == 2:
+            h, m, s = last['time'].split(':')
+            out['out_time_sec'] = round(int(h) * 3600 + int(m) * 60 + float(s), 3)
+        if 'speed' in last and last['speed'].endswith('x'):
+            out['speed'] = float(last['speed'][:-1])
+    except ValueError:
+        pass
+    return out
+
+
+class RunRecorder:
+    """Collects stage records for one run and forwards progress events to on_event (if given)."""
+
+    def __init__(self, on_event: Optional[EventCallback] = None):
+        self.on_event = on_event
+        self.stages: List[StageRecord] = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._cpu0 = sum(os.times()[:4])
+        self.started = time.time()
+
+    def emit(self, event: str, **fields) -> None:
+        if self.on_event is None:
+            return
+        try:
+            self.on_event({'event': event, 'time': time.time(), **fields})
+        except Exception:
+            pass  # metrics must never break a run
+
+    def _add(self, rec: StageRecord) -> None:
+        with self._lock:
+            self.stages.append(rec)
+
+    def _charge(self, records: Tuple[StageRecord, ...], usage) -> None:
+        """Add a reaped child's resource usage to each of the given (open) stages."""
+        with self._lock:
+            for r in records:
+                r.child_cpu_sec += usage.ru_utime + usage.ru_stime
+                r.child_peak_rss_mb = max(r.child_peak_rss_mb, round(usage.ru_maxrss / 1024, 1))
+                r.child_read_bytes += usage.ru_inblock * 512
+                r.child_write_bytes += usage.ru_oublock * 512
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = _snapshot()
+        with self._lock:
+            stages = [asdict(s) for s in self.stages]
+        return {
+            'started': self.started,
+            'wall_sec': round(end['wall'] - self._t0, 3),
+            # run totals are process-wide: other runs in the same process (service workers) count too
+            'cpu_sec': round(sum(os.times()[:4]) - self._cpu0, 3),  # process + reaped children
+            'peak_rss_mb': round(end['rss_kb'] / 1024, 1),
+            'child_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+            'stages': stages,
+        }
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# (recorder, open stages outermost first) for the current context
+_active: contextvars.ContextVar[Tuple[Optional[RunRecorder], Tuple[StageRecord, ...]]] = contextvars.ContextVar(
+    'run_recorder', default=(None, ()),
+)
+
+
+@contextmanager
+def recording(on_event: Optional[EventCallback] = None) -> Iterator[RunRecorder]:
+    """Activate a RunRecorder for the code inside the block."""
+    rec = RunRecorder(on_event)
+    token = _active.set((rec, ()))
+    try:
+        yield rec
+    finally:
+        _active.reset(token)
+
+
+def current_recorder() -> Optional[RunRecorder]:
+    return _active.get()[0]
+
+
+@contextmanager
+def stage(name: str, **fields) -> Iterator[Optional[StageRecord]]:
+    """Measure the enclosed block as a stage of the active run; a no-op without a recorder."""
+    rec, open_stages = _active.get()
+    if rec is None:
+        yield None
+        return
+    s0 = _snapshot()
+    record = StageRecord(
+        name=name, parent=open_stages[-1].name if open_stages else None,
+        thread=threading.current_thread().name, start_sec=round(s0['wall'] - rec._t0, 3),
+    )
+    token = _active.set((rec, open_stages + (record,)))
+    rec.emit('stage_start', stage=name, parent=record.parent, **fields)
+    try:
+        yield record
+    except BaseException as e:
+        record.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        _active.reset(token)
+        s1 = _snapshot()
+        record.wall_sec = round(s1['wall'] - s0['wall'], 4)
+        with rec._lock:
+            record.child_cpu_sec = round(record.child_cpu_sec, 4)
+        record.cpu_sec = round((s1['thread_cpu'] - s0['thread_cpu']) + record.child_cpu_sec, 4)
+        record.peak_rss_mb = round(s1['rss_kb'] / 1024, 1)
+        record.read_bytes = int(s1['rchar'] - s0['rchar'])
+        record.write_bytes = int(s1['wchar'] - s0['wchar'])
+        rec._add(record)
+        rec.emit('stage_end', stage=name, wall_sec=record.wall_sec, cpu_sec=record.cpu_sec, error=record.error, **fields)
+
+
+def reap(proc) -> int:
+    """
+    proc.wait() for a child started in a stage: the child is reaped with wait4 so its own CPU and
+    I/O are charged to the stages open in the current context. Returns the exit code.
+    """
+    if proc.returncode is not None:
+        return proc.returncode
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    except ChildProcessError:  # already reaped elsewhere
+        return proc.wait()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    rec, open_stages = _active.get()
+    if rec is not None and open_stages:
+        rec._charge(open_stages, usage)
+    return proc.returncode
+
+
+def run_ffmpeg(stream_spec, label: str = 'ffmpeg'):
+    """
+    Run an ffmpeg-python graph (as .run(quiet=True) did) and attach its progress stats and
+    resource usage to the current stage. Returns (stdout, stderr); raises ffmpeg.Error on a
+    non-zero exit, as .run does.
+    """
+    t0 = time.perf_counter()
+    proc = stream_spec.run_async(pipe_stdout=True, pipe_stderr=True)
+    # drain stderr on a helper thread so neither pipe can fill up and stall ffmpeg
+    err_parts: List[bytes] = []
+    drain = threading.Thread(target=lambda: err_parts.append(proc.stderr.read()), daemon=True)
+    drain.start()
+    try:
+        out = proc.stdout.read()
+    finally:
+        drain.join()
+        proc.stdout.close()
+        proc.stderr.close()
+        code = reap(proc)
+    err = err_parts[0] if err_parts else b''
+    if code:
+        raise ffmpeg.Error('ffmpeg', out, err)
+    rec, open_stages = _active.get()
+    parent = open_stages[-1] if open_stages else None
+    if rec is not None:
+        stats = FfmpegStats(label=label, wall_sec=round(time.perf_counter() - t0, 4), **parse_ffmpeg_stats((err or b'').decode('utf-8', 'replace')))
+        if parent is not None:
+            parent.ffmpeg.append(stats)
+        rec.emit('ffmpeg', stage=parent.name if parent else None, **asdict(stats))
+    return out, err
+
+
+def submit_in_context(pool, fn, *args):
+    """pool.submit that carries the caller's context (active recorder and stage) into the worker."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+@contextmanager
+def maybe_recording(report_path: Optional[str] = None, on_event: Optional[EventCallback] = None) -> Iterator[Optional[RunRecorder]]:
+    """
+    recording() when a report file or event callback is requested and no run is being recorded
+    yet (e.g. by the service); otherwise join the active recorder, if any. The report is written
+    even when the run fails.
+    """
+    active = current_recorder()
+    if active is not None or (report_path is None and on_event is None):
+        yield active
+        return
+    with recording(on_event) as rec:
+        try:
+            yield rec
+        finally:
+            if report_path:
+                rec.write(report_path)
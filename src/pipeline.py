@@ -1,13 +1,36 @@
 import os
 import yaml
-from dataclasses import dataclass
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dataclasses import dataclass, field, asdict
+from functools import cached_property
+from typing import Optional, List, Tuple, Union
 
 from src.ingest.fetch_video import get_latest_cc_viral_video, download_cc_video
-from src.analysis.engagement import best_window, top_windows_multi
-from src.analysis.semantic import transcribe_with_words, detect_silences, pick_idea_endpoint
-from src.edit.formatters import cut_segment, to_vertical, export_audio
-from src.edit.subtitles import burn_subtitles_karaoke
+from src.ingest.store import DEFAULT_RAW_DIR
+from src.analysis.cache import AnalysisCache, DEFAULT_CACHE_DIR
+from src.analysis.engagement import (
+    FeatureTimeline, best_window, top_windows_multi, feature_timeline, hop_for_stride,
+    FAST_MOTION_WIDTH, FAST_MOTION_HEIGHT, FAST_MOTION_FPS, REFINE_TOP_K,
+)
+from src.analysis.stream import DEFAULT_BLOCK_SEC
+from src.analysis.semantic import transcribe_with_words, detect_silences, pick_idea_endpoint, slice_transcript, ActivityMap
+from src.analysis.selection import BoundaryIndex, select_clips
+from src.analysis.transcribe import DEFAULT_CHUNK_SEC, LazyTranscript, transcribe_chunked
+from src.analysis.proxy import ensure_proxy, DEFAULT_PROXY_DIR, PROXY_HEIGHT
+from src.edit.formatters import CanvasOutput, cut_segment, to_vertical, export_audio, render_clip, render_canvases, probe_keyframes
+from src.edit.subtitles import burn_subtitles_karaoke, write_karaoke_ass
+from src.metrics import EventCallback, maybe_recording, stage, submit_in_context
+from src.runs import DEFAULT_RUNS_DIR, RunDir, run_id, run_step
+
+
+@dataclass
+class RenderProfile:
+    name: str
+    width: int
+    height: int
+    fps: int
+    blur: int
 
 
 @dataclass
@@ -20,12 +43,68 @@ class PipelineConfig:
     subs_enabled: bool
     subs_model: str
     padding_color: str
+    cache_enabled: bool = True
+    cache_dir: str = DEFAULT_CACHE_DIR
+    cache_max_mb: float = 2048.0
+    motion_mode: str = 'full'
+    motion_width: int = FAST_MOTION_WIDTH
+    motion_height: int = FAST_MOTION_HEIGHT
+    motion_fps: float = FAST_MOTION_FPS
+    streaming: bool = False
+    stream_block_sec: float = DEFAULT_BLOCK_SEC
+    single_pass: bool = False
+    cut_mode: str = 'copy'
+    render_workers: int = 1
+    ffmpeg_threads: int = 0
+    joint_selection: bool = False
+    proxy: bool = False
+    proxy_height: int = PROXY_HEIGHT
+    proxy_fps: float = 0.0
+    proxy_dir: str = DEFAULT_PROXY_DIR
+    coarse_factor: int = 1  # >1: score windows at this multiple of the stride, refine the best regions
+    refine_top_k: int = REFINE_TOP_K
+    raw_dir: str = DEFAULT_RAW_DIR
+    raw_max_mb: float = 0.0  # 0 = no cap on the raw-media store
+    transcribe_workers: int = 1  # >1 (or 0 = auto): chunk long sources at silences, transcribe in parallel
+    transcribe_chunk_sec: float = DEFAULT_CHUNK_SEC
+    lazy_transcript: bool = False  # transcribe only the ranges endpoint selection / subtitles read
+    runs_dir: str = DEFAULT_RUNS_DIR  # per-run work dirs and step manifests
+    resume: bool = True  # skip steps a previous run of the same inputs completed
+    profile: str = ''
+    # further profiles rendered from the same decode as the main one (short_final{tag}_{name}.mp4)
+    profiles: List[RenderProfile] = field(default_factory=list)
+
+
+# a full transcript, or one that is transcribed range by range as stages ask for it
+Transcript = Union[dict, LazyTranscript]
+
+WORK_DIR = 'data/working'
+OUTPUT_DIR = 'data/outputs/shorts'
+
+SILENCE_MIN_LEN_MS = 400
+SILENCE_DB_DROP = 16.0
+
+
+def _render_profile(cfg: dict, name: str) -> RenderProfile:
+    if name not in cfg['profiles']:
+        raise ValueError(f'Unknown profile {name!r}; configured: {sorted(cfg["profiles"])}')
+    p = cfg['profiles'][name]
+    return RenderProfile(
+        name=name, width=int(p['width']), height=int(p['height']), fps=int(p['fps']),
+        blur=int(p.get('background_blur', 25)),
+    )
 
 
-def load_config(path: str, profile: str) -> PipelineConfig:
+def load_config(path: str, profile: str, profiles: Optional[List[str]] = None) -> PipelineConfig:
+    """
+    Settings for `profile`. profiles (default: render.profiles in the file) lists extra output
+    profiles rendered alongside it; the main profile is skipped if listed.
+    """
     with open(path, 'r') as f:
         cfg = yaml.safe_load(f)
     p = cfg['profiles'][profile]
+    if profiles is None:
+        profiles = list(cfg.get('render', {}).get('profiles') or [])
     return PipelineConfig(
         width=int(p['width']),
         height=int(p['height']),
@@ -34,174 +113,453 @@ def load_config(path: str, profile: str) -> PipelineConfig:
         blur=int(p.get('background_blur', 25)),
         subs_enabled=bool(cfg.get('subtitles', {}).get('enabled', True)),
         subs_model=str(cfg.get('subtitles', {}).get('model', 'tiny')),
+        transcribe_workers=int(cfg.get('subtitles', {}).get('workers', 1)),
+        transcribe_chunk_sec=float(cfg.get('subtitles', {}).get('chunk_sec', DEFAULT_CHUNK_SEC)),
+        lazy_transcript=bool(cfg.get('subtitles', {}).get('lazy', False)),
         padding_color=str(p.get('padding_color', '#000000')),
+        cache_enabled=bool(cfg.get('cache', {}).get('enabled', True)),
+        cache_dir=str(cfg.get('cache', {}).get('dir', DEFAULT_CACHE_DIR)),
+        cache_max_mb=float(cfg.get('cache', {}).get('max_size_mb', 2048)),
+        motion_mode=str(cfg.get('analysis', {}).get('motion_mode', 'full')),
+        motion_width=int(cfg.get('analysis', {}).get('motion_width', FAST_MOTION_WIDTH)),
+        motion_height=int(cfg.get('analysis', {}).get('motion_height', FAST_MOTION_HEIGHT)),
+        motion_fps=float(cfg.get('analysis', {}).get('motion_fps', FAST_MOTION_FPS)),
+        streaming=bool(cfg.get('analysis', {}).get('streaming', False)),
+        stream_block_sec=float(cfg.get('analysis', {}).get('stream_block_sec', DEFAULT_BLOCK_SEC)),
+        single_pass=bool(cfg.get('render', {}).get('single_pass', False)),
+        cut_mode=str(cfg.get('render', {}).get('cut_mode', 'copy')),
+        render_workers=int(cfg.get('render', {}).get('workers', 1)),
+        ffmpeg_threads=int(cfg.get('render', {}).get('ffmpeg_threads', 0)),
+        joint_selection=bool(cfg.get('analysis', {}).get('joint_selection', False)),
+        proxy=bool(cfg.get('analysis', {}).get('proxy', False)),
+        proxy_height=int(cfg.get('analysis', {}).get('proxy_height', PROXY_HEIGHT)),
+        proxy_fps=float(cfg.get('analysis', {}).get('proxy_fps', 0.0)),
+        proxy_dir=str(cfg.get('analysis', {}).get('proxy_dir', DEFAULT_PROXY_DIR)),
+        coarse_factor=int(cfg.get('analysis', {}).get('coarse_factor', 1)),
+        refine_top_k=int(cfg.get('analysis', {}).get('refine_top_k', REFINE_TOP_K)),
+        raw_dir=str(cfg.get('ingest', {}).get('dir', DEFAULT_RAW_DIR)),
+        raw_max_mb=float(cfg.get('ingest', {}).get('max_size_mb', 0)),
+        runs_dir=str(cfg.get('runs', {}).get('dir', DEFAULT_RUNS_DIR)),
+        resume=bool(cfg.get('runs', {}).get('resume', True)),
+        profile=profile,
+        profiles=[_render_profile(cfg, name) for name in dict.fromkeys(profiles) if name != profile],
     )
 
 
-def run_pipeline(
-    input_path: Optional[str],
-    profile: str = 'tiktok',
-    config_path: str = 'configs/pipeline.yaml',
-    via_youtube_query: Optional[str] = None,
-    duration_override: Optional[float] = None,
-    subs_enabled_override: Optional[bool] = None,
-    idea_end: bool = True,
-    min_dur: float = 20.0,
-    max_dur: float = 120.0,
-    tail_pad_sec: float = 1.5,
-    head_pad_sec: float = 0.0,
-    export_audio_only: bool = False,
-) -> str:
-    """Produce a single final short and return its output path."""
-    conf = load_config(config_path, profile)
-    if duration_override is not None and duration_override > 0:
-        conf.duration = float(duration_override)
-    if subs_enabled_override is not None:
-        conf.subs_enabled = bool(subs_enabled_override)
+def make_cache(conf: PipelineConfig, use_cache: bool) -> AnalysisCache:
+    return AnalysisCache(
+        root=conf.cache_dir,
+        max_bytes=int(conf.cache_max_mb * 1024 * 1024),
+        enabled=conf.cache_enabled and use_cache,
+    )
 
-    if via_youtube_query and not input_path:
-        item = get_latest_cc_viral_video(via_youtube_query)
-        if not item:
-            raise RuntimeError('No CC-licensed video found for query')
-        input_path = download_cc_video(item.url, 'data/raw')
-        if not input_path:
-            raise RuntimeError('Failed to download CC video')
 
-    if not input_path or not os.path.exists(input_path):
-        raise FileNotFoundError('Input video not found')
+# settings that change how fast a run goes but not what it produces; left out of the run id
+_RUN_NEUTRAL = (
+    'cache_enabled', 'cache_dir', 'cache_max_mb', 'streaming', 'stream_block_sec', 'render_workers', 'ffmpeg_threads',
+    'raw_dir', 'raw_max_mb', 'proxy_dir', 'runs_dir', 'resume',
+)
 
-    # Find an engaging start
-    score_win = min((duration_override or conf.duration or 30), 30)
-    start, _ = best_window(input_path, window_sec=score_win, stride_sec=1.0)
 
-    os.makedirs('data/working', exist_ok=True)
-    seg_path = os.path.join('data/working', 'segment.mp4')
+def open_run(input_path: str, conf: PipelineConfig, cache: AnalysisCache, out_root: str = OUTPUT_DIR, **params) -> RunDir:
+    """
+    The run directory for input_path with conf and the run's own params (mode, durations, pads, ...):
+    work files under conf.runs_dir/<id>/work, outputs under out_root/<id>. Enter it to lock it.
+    """
+    settings = {k: v for k, v in asdict(conf).items() if k not in _RUN_NEUTRAL}
+    digest = cache.digest(input_path)
+    rid = run_id(input_path, digest, {'conf': settings, **params})
+    inputs = {'source': os.path.abspath(input_path), 'source_digest': digest, 'params': params, 'conf': settings}
+    return RunDir(conf.runs_dir, out_root, rid, inputs=inputs, resume=conf.resume)
 
-    # Probe media duration once
-    try:
-        import ffmpeg as _ff
-        meta = _ff.probe(input_path)
-        fmt = meta.get('format', {})
-        media_dur = float(fmt.get('duration', 0.0)) if fmt.get('duration') else 0.0
-    except Exception:
-        media_dur = 0.0
 
-    if idea_end:
-        # Idea-aware end selection
+def _media_duration(input_path: str, cache: AnalysisCache) -> float:
+    def probe() -> Optional[float]:
         try:
-            transcript = transcribe_with_words(input_path, model=conf.subs_model)
+            import ffmpeg as _ff
+            meta = _ff.probe(input_path)
+            fmt = meta.get('format', {})
+            return float(fmt.get('duration', 0.0)) if fmt.get('duration') else 0.0
         except Exception:
-            transcript = None
+            return None
+    with stage('probe'):
+        return cache.fetch(input_path, 'probe', probe) or 0.0
+
+
+def _timeline(input_path: str, stride_sec: float, conf: PipelineConfig, cache: AnalysisCache) -> FeatureTimeline:
+    params = dict(hop_sec=hop_for_stride(stride_sec), motion_mode=conf.motion_mode)
+    if conf.motion_mode == 'fast':
+        params.update(motion_width=conf.motion_width, motion_height=conf.motion_height, motion_fps=conf.motion_fps)
+    # streaming yields the same timeline, so it is not part of the cache key
+    def compute() -> FeatureTimeline:
+        return feature_timeline(input_path, streaming=conf.streaming, block_sec=conf.stream_block_sec, **params)
+    with stage('timeline'):
+        return cache.fetch(input_path, 'timeline', compute, **params)
+
+
+def _transcript(input_path: str, model: str, cache: AnalysisCache) -> Optional[dict]:
+    def transcribe() -> Optional[dict]:
         try:
-            sils = detect_silences(input_path)
+            return transcribe_with_words(input_path, model=model)
         except Exception:
-            sils = []
-        end = pick_idea_endpoint(transcript, sils, start_hint=start, min_dur=float(min_dur), max_dur=float(max_dur))
-        end += max(0.0, min(3.0, float(tail_pad_sec)))
-        if media_dur and end > media_dur:
-            end = media_dur
-        head = max(0.0, min(3.0, float(head_pad_sec)))
-        out_start = max(0.0, start - head)
-        duration = max(0.1, end - start + head)
-        if media_dur:
-            duration = min(duration, max(0.1, media_dur - out_start))
-        cut_segment(input_path, seg_path, start=out_start, duration=duration)
-    else:
-        base_dur = float(duration_override or conf.duration)
-        head = max(0.0, min(3.0, float(head_pad_sec)))
-        out_start = max(0.0, start - head)
-        duration = base_dur + head
-        if media_dur:
-            duration = min(duration, max(0.1, media_dur - out_start))
-        cut_segment(input_path, seg_path, start=out_start, duration=duration)
+            return None
+    with stage('transcription', model=model):
+        return cache.fetch(input_path, 'transcript', transcribe, model=model)
 
-    if export_audio_only:
-        final_audio = os.path.join('data/outputs/shorts', 'short_final.mp3')
-        os.makedirs(os.path.dirname(final_audio), exist_ok=True)
-        export_audio(seg_path, final_audio)
-        return final_audio
 
-    vert_path = os.path.join('data/working', 'vertical.mp4')
-    to_vertical(seg_path, vert_path, width=conf.width, height=conf.height, blur=conf.blur, padding_color=conf.padding_color)
+def _transcript_for(transcript: Optional[Transcript], ranges: List[Tuple[float, float]]) -> Optional[dict]:
+    """Transcript covering ranges: a lazy one transcribes what it lacks, a full one is returned as is."""
+    if not isinstance(transcript, LazyTranscript):
+        return transcript
+    with stage('transcription', model=transcript.model, lazy=True):
+        return transcript.transcript(ranges)
 
-    final_path = os.path.join('data/outputs/shorts', 'short_final.mp4')
-    os.makedirs(os.path.dirname(final_path), exist_ok=True)
-    if conf.subs_enabled:
-        burn_subtitles_karaoke(vert_path, final_path, model=conf.subs_model)
-    else:
-        import ffmpeg
-        ffmpeg.input(vert_path).output(final_path, c='copy', movflags='faststart').overwrite_output().run(quiet=True)
 
-    return final_path
+def _chunked_transcript(input_path: str, conf: PipelineConfig, cache: AnalysisCache) -> Optional[dict]:
+    """Silence-chunked transcript from a process pool (conf.transcribe_workers); cached like _transcript."""
+    media_dur = _media_duration(input_path, cache)
+    sils = _silences(input_path, conf, cache)
+    def transcribe() -> Optional[dict]:
+        try:
+            return transcribe_chunked(
+                input_path, sils, media_dur, model=conf.subs_model, workers=conf.transcribe_workers,
+                chunk_sec=conf.transcribe_chunk_sec,
+            )
+        except Exception:
+            return None
+    # the chunk plan (not the worker count) shapes the result, so it is part of the key
+    with stage('transcription', model=conf.subs_model, workers=conf.transcribe_workers):
+        return cache.fetch(input_path, 'transcript', transcribe, model=conf.subs_model, chunk_sec=conf.transcribe_chunk_sec)
 
 
-def run_pipeline_multi(
-    input_path: Optional[str],
-    profile: str = 'tiktok',
-    config_path: str = 'configs/pipeline.yaml',
-    via_youtube_query: Optional[str] = None,
-    durations: Optional[List[float]] = None,
-    max_clips: int = 3,
-    stride_sec: float = 1.0,
-    subs_enabled_override: Optional[bool] = None,
-    idea_end: bool = False,
-    min_dur: float = 20.0,
-    max_dur: float = 120.0,
-    tail_pad_sec: float = 1.5,
-    head_pad_sec: float = 0.0,
+def _silences(input_path: str, conf: PipelineConfig, cache: AnalysisCache) -> ActivityMap:
+    def detect() -> Optional[np.ndarray]:
+        try:
+            sils = detect_silences(
+                input_path, min_silence_len_ms=SILENCE_MIN_LEN_MS, silence_db_drop=SILENCE_DB_DROP,
+                block_sec=conf.stream_block_sec,
+            )
+        except Exception:
+            return None
+        return np.asarray(sils, dtype=np.float64).reshape(-1, 2)
+    with stage('silences'):
+        arr = cache.fetch(
+            input_path, 'silences', detect,
+            min_silence_len_ms=SILENCE_MIN_LEN_MS, silence_db_drop=SILENCE_DB_DROP,
+        )
+    return ActivityMap([] if arr is None else arr)
+
+
+def source_keyframes(input_path: str, conf: PipelineConfig, cache: AnalysisCache) -> Optional[np.ndarray]:
+    """Keyframe index of the render source for smart cuts, probed once per source (None if unused)."""
+    if conf.cut_mode != 'smart' or conf.single_pass:
+        return None
+    def probe() -> np.ndarray:
+        try:
+            return probe_keyframes(input_path)
+        except Exception:
+            return np.empty(0)  # smart_cut then falls back to an accurate re-encode
+    with stage('keyframes'):
+        return cache.fetch(input_path, 'keyframes', probe)
+
+
+def _ffmpeg_threads(conf: PipelineConfig) -> Optional[int]:
+    """Per-ffmpeg thread cap: explicit setting, else split the cores across concurrent renders."""
+    if conf.ffmpeg_threads > 0:
+        return conf.ffmpeg_threads
+    if conf.render_workers > 1:
+        return max(1, (os.cpu_count() or 1) // conf.render_workers)
+    return None
+
+
+def _render_clip(
+    input_path: str,
+    out_start: float,
+    duration: float,
+    transcript: Optional[Transcript],
+    conf: PipelineConfig,
+    tag: str,
     export_audio_only: bool = False,
+    work_dir: str = WORK_DIR,
+    out_dir: str = OUTPUT_DIR,
+    keyframes: Optional[np.ndarray] = None,
+    run: Optional[RunDir] = None,
 ) -> List[str]:
-    """Generate multiple clips (variable length) and return list of final paths."""
-    conf = load_config(config_path, profile)
-    if subs_enabled_override is not None:
-        conf.subs_enabled = bool(subs_enabled_override)
+    """
+    Cut/format/subtitle one clip of input_path and return its final paths (tag: '' or '_<idx>'):
+    the main profile's first, then one per conf.profiles entry.
+    keyframes is the source_keyframes() index used by smart cuts. With a run, the intermediate
+    files (segment, vertical) are run steps, so a resumed clip starts after the last one it finished.
+    """
+    with stage('clip', tag=tag):
+        return _render_clip_files(input_path, out_start, duration, transcript, conf, tag, export_audio_only, work_dir, out_dir, keyframes, run)
+
+
+def _render_clip_files(
+    input_path: str,
+    out_start: float,
+    duration: float,
+    transcript: Optional[Transcript],
+    conf: PipelineConfig,
+    tag: str,
+    export_audio_only: bool,
+    work_dir: str,
+    out_dir: str,
+    keyframes: Optional[np.ndarray],
+    run: Optional[RunDir] = None,
+) -> List[str]:
+    threads = _ffmpeg_threads(conf)
+    os.makedirs(work_dir, exist_ok=True)
+    os.makedirs(out_dir, exist_ok=True)
+    if isinstance(transcript, LazyTranscript):
+        # only the subtitles read the transcript here
+        subs = conf.subs_enabled and not export_audio_only
+        transcript = _transcript_for(transcript, [(out_start, out_start + duration)]) if subs else None
+    # reuse the source transcript (if any) instead of transcribing the rendered clip again
+    clip_transcript = slice_transcript(transcript, out_start, duration) if transcript is not None else None
+    final_path = os.path.join(out_dir, f'short_final{tag}.mp4')
+
+    if conf.profiles and not export_audio_only:
+        return _render_profiles(input_path, out_start, duration, clip_transcript, conf, tag, work_dir, out_dir, keyframes, threads, run)
+
+    if conf.single_pass and not export_audio_only:
+        ass_path = None
+        if conf.subs_enabled and clip_transcript is not None:
+            ass_path = write_karaoke_ass(clip_transcript, os.path.join(work_dir, f'subs{tag}.ass'))
+        render_clip(
+            input_path, final_path, start=out_start, duration=duration,
+            width=conf.width, height=conf.height, blur=conf.blur, ass_path=ass_path, fps=conf.fps,
+            threads=threads,
+        )
+        return [final_path]
+
+    if export_audio_only:
+        # straight from the source: input seeking is sample-accurate when transcoding
+        final_audio = os.path.join(out_dir, f'short_final{tag}.mp3')
+        export_audio(input_path, final_audio, start=out_start, duration=duration)
+        return [final_audio]
+
+    seg_path = os.path.join(work_dir, f'segment{tag}.mp4')
+    run_step(
+        run, f'segment{tag}', lambda: cut_segment(
+            input_path, seg_path, start=out_start, duration=duration, mode=conf.cut_mode, keyframes=keyframes, threads=threads,
+        ),
+        deps=[out_start, duration], outputs=[seg_path],
+    )
+
+    # without subtitles the vertical render is the final file
+    vert_path = os.path.join(work_dir, f'vertical{tag}.mp4') if conf.subs_enabled else final_path
+    run_step(
+        run, f'vertical{tag}', lambda: to_vertical(
+            seg_path, vert_path, width=conf.width, height=conf.height, blur=conf.blur,
+            padding_color=conf.padding_color, threads=threads,
+        ),
+        inputs=[seg_path], outputs=[vert_path],
+    )
 
+    if conf.subs_enabled:
+        run_step(
+            run, f'subtitles{tag}', lambda: burn_subtitles_karaoke(
+                vert_path, final_path, model=conf.subs_model, transcript=clip_transcript, threads=threads,
+            ),
+            inputs=[vert_path], outputs=[final_path],
+        )
+    return [final_path]
+
+
+def _render_profiles(
+    input_path: str,
+    out_start: float,
+    duration: float,
+    clip_transcript: Optional[dict],
+    conf: PipelineConfig,
+    tag: str,
+    work_dir: str,
+    out_dir: str,
+    keyframes: Optional[np.ndarray],
+    threads: Optional[int],
+    run: Optional[RunDir] = None,
+) -> List[str]:
+    """
+    Render the main profile and every conf.profiles entry in one ffmpeg run (one decode, split into
+    one composite + subtitle burn per canvas). single_pass reads the source with an accurate seek;
+    otherwise the cut segment is the input. With a run, each canvas is a step and only the canvases
+    not done yet are rendered.
+    """
+    inputs: List[str] = []
+    if conf.single_pass:
+        src, start, dur = input_path, out_start, duration
+    else:
+        src, start, dur = os.path.join(work_dir, f'segment{tag}.mp4'), None, None
+        run_step(
+            run, f'segment{tag}', lambda: cut_segment(
+                input_path, src, start=out_start, duration=duration, mode=conf.cut_mode, keyframes=keyframes, threads=threads,
+            ),
+            deps=[out_start, duration], outputs=[src],
+        )
+        inputs = [src]
+
+    main = RenderProfile(conf.profile, conf.width, conf.height, conf.fps, conf.blur)
+    canvases = []
+    for p in [main, *conf.profiles]:
+        suffix = f'_{p.name}' if p is not main else ''
+        path = os.path.join(out_dir, f'short_final{tag}{suffix}.mp4')
+        canvases.append((f'canvas{tag}{suffix}', [out_start, duration, asdict(p)], p, suffix, path))
+    todo = [c for c in canvases if run is None or not run.done(c[0], c[1], inputs)]
+
+    if todo and conf.subs_enabled and clip_transcript is None and not conf.single_pass:
+        # only callers without a source transcript (watch) get here; the segment is unique to the clip
+        with stage('transcription', model=conf.subs_model):
+            clip_transcript = transcribe_with_words(src, model=conf.subs_model)
+    pending = []
+    for _name, _deps, p, suffix, path in todo:
+        ass_path = None
+        if conf.subs_enabled and clip_transcript is not None:
+            ass_path = write_karaoke_ass(clip_transcript, os.path.join(work_dir, f'subs{tag}{suffix}.ass'), play_res=(p.width, p.height))
+        pending.append(CanvasOutput(path, p.width, p.height, p.fps, p.blur, ass_path))
+    if pending:
+        render_canvases(src, pending, start=start, duration=dur, threads=threads)
+    # record each canvas (the ones rendered above are built by now; done ones are skipped)
+    for name, deps, _p, _suffix, path in canvases:
+        run_step(run, name, lambda path=path: [path], deps=deps, inputs=inputs)
+    return [path for *_, path in canvases]
+
+
+def resolve_input(input_path: Optional[str], via_youtube_query: Optional[str] = None, conf: Optional[PipelineConfig] = None) -> str:
+    """
+    Ingest stage: return a local source path, downloading a CC video for a query if needed
+    (into the raw-media store set by conf, default data/raw).
+    """
     if via_youtube_query and not input_path:
-        item = get_latest_cc_viral_video(via_youtube_query)
-        if not item:
-            raise RuntimeError('No CC-licensed video found for query')
-        input_path = download_cc_video(item.url, 'data/raw')
-        if not input_path:
-            raise RuntimeError('Failed to download CC video')
+        with stage('ingest'):
+            item = get_latest_cc_viral_video(via_youtube_query)
+            if not item:
+                raise RuntimeError('No CC-licensed video found for query')
+            raw_dir, raw_mb = (conf.raw_dir, conf.raw_max_mb) if conf else (DEFAULT_RAW_DIR, 0.0)
+            input_path = download_cc_video(item.url, raw_dir, info=item.info, max_bytes=int(raw_mb * 1024 * 1024))
+            if not input_path:
+                raise RuntimeError('Failed to download CC video')
 
     if not input_path or not os.path.exists(input_path):
         raise FileNotFoundError('Input video not found')
-
-    durations = durations or [20, 30, 45, 60]
-    windows = top_windows_multi(input_path, durations=durations, stride_sec=stride_sec, max_clips=max_clips)
-
-    # Probe media duration once and compute transcript/silences once
-    try:
-        import ffmpeg as _ff
-        meta = _ff.probe(input_path)
-        fmt = meta.get('format', {})
-        media_dur = float(fmt.get('duration', 0.0)) if fmt.get('duration') else 0.0
-    except Exception:
-        media_dur = 0.0
-
-    transcript = None
-    sils: List = []
-    if idea_end:
-        try:
-            transcript = transcribe_with_words(input_path, model=conf.subs_model)
-        except Exception:
-            transcript = None
+    return input_path
+
+
+def analysis_input(input_path: str, conf: PipelineConfig, cache: AnalysisCache) -> str:
+    """
+    Path the analysis stages read: the source itself, or (conf.proxy) its low-res mono-16k proxy,
+    encoded once and reused. Rendering always reads the original. Falls back to the source if
+    the proxy cannot be made.
+    """
+    if not conf.proxy:
+        return input_path
+    with stage('proxy'):
         try:
-            sils = detect_silences(input_path)
+            return ensure_proxy(
+                input_path, cache, root=conf.proxy_dir, height=conf.proxy_height, fps=conf.proxy_fps,
+                threads=_ffmpeg_threads(conf),
+            )
         except Exception:
-            sils = []
+            return input_path
 
-    out_paths: List[str] = []
-    os.makedirs('data/working', exist_ok=True)
-    os.makedirs('data/outputs/shorts', exist_ok=True)
 
+@dataclass
+class SourceAnalysis:
+    windows: List[Tuple[float, float, float]]  # (start_sec, duration_sec, score)
+    media_dur: float
+    silences: ActivityMap
+    timeline: Optional[FeatureTimeline] = None
+    max_clips: int = 0
+    stride_sec: float = 1.0
+
+
+def analyze_source(
+    input_path: str,
+    conf: PipelineConfig,
+    cache: AnalysisCache,
+    durations: List[float],
+    max_clips: int,
+    stride_sec: float,
+    idea_end: bool,
+) -> SourceAnalysis:
+    """Analysis stage (CPU): engagement windows, media duration and (for idea-end) silences."""
+    with stage('analysis'):
+        timeline = _timeline(input_path, stride_sec, conf, cache)
+        with stage('windows'):
+            windows = top_windows_multi(
+                input_path, durations=durations, stride_sec=stride_sec, max_clips=max_clips, timeline=timeline,
+                coarse_factor=conf.coarse_factor, top_k=conf.refine_top_k,
+            )
+        media_dur = _media_duration(input_path, cache)
+        sils = _silences(input_path, conf, cache) if idea_end else ActivityMap()
+    return SourceAnalysis(
+        windows=windows, media_dur=media_dur, silences=sils,
+        timeline=timeline, max_clips=max_clips, stride_sec=stride_sec,
+    )
+
+
+def source_transcript(
+    input_path: str,
+    conf: PipelineConfig,
+    cache: AnalysisCache,
+    idea_end: bool,
+    export_audio_only: bool = False,
+) -> Optional[Transcript]:
+    """
+    Transcription stage: one Whisper pass over the source when idea-end, or subtitles rendered in
+    one pass (single_pass or extra profiles), need it. With conf.lazy_transcript a LazyTranscript is returned instead and nothing runs
+    until plan/render ask for ranges (joint selection reads every boundary, so it stays eager).
+    """
+    one_pass_subs = (conf.single_pass or bool(conf.profiles)) and conf.subs_enabled and not export_audio_only
+    if idea_end or one_pass_subs:
+        if conf.lazy_transcript and not conf.joint_selection:
+            return LazyTranscript(
+                input_path, conf.subs_model, _silences(input_path, conf, cache), _media_duration(input_path, cache), cache,
+            )
+        if conf.transcribe_workers != 1:
+            return _chunked_transcript(input_path, conf, cache)
+        return _transcript(input_path, conf.subs_model, cache)
+    return None
+
+
+def plan_clips(
+    analysis: SourceAnalysis,
+    transcript: Optional[Transcript],
+    idea_end: bool,
+    min_dur: float,
+    max_dur: float,
+    tail_pad_sec: float,
+    head_pad_sec: float,
+    joint: bool = False,
+) -> List[Tuple[float, float, str]]:
+    """
+    Turn chosen windows into (out_start, duration, tag) render jobs. With idea_end and joint, the
+    fixed-length windows are replaced by clips chosen jointly over sentence/silence-aligned
+    (start, end) pairs.
+    """
+    media_dur = analysis.media_dur
+    windows = analysis.windows
+    ends: List[float] = []
+    if idea_end:
+        # endpoints only look at [start + min_dur, start + max_dur] of each window
+        transcript = _transcript_for(transcript, [(w[0] + float(min_dur), w[0] + float(max_dur)) for w in windows])
+        with stage('plan'):
+            bounds = BoundaryIndex(transcript, analysis.silences)
+            if joint and analysis.timeline is not None:
+                windows = select_clips(
+                    analysis.timeline, bounds, min_dur=float(min_dur), max_dur=float(max_dur),
+                    max_clips=analysis.max_clips or len(windows), stride_sec=analysis.stride_sec, media_dur=media_dur,
+                )
+                ends = [start + dur for start, dur, _ in windows]
+            else:
+                ends = bounds.ends_for(np.array([w[0] for w in windows]), float(min_dur), float(max_dur)).tolist()
+    jobs = []
     for idx, (start, dur, _score) in enumerate(windows, start=1):
         head = max(0.0, min(3.0, float(head_pad_sec)))
         out_start = max(0.0, start - head)
 
         if idea_end:
-            end = pick_idea_endpoint(transcript, sils, start_hint=start, min_dur=float(min_dur), max_dur=float(max_dur))
-            end += max(0.0, min(3.0, float(tail_pad_sec)))
+            end = ends[idx - 1] + max(0.0, min(3.0, float(tail_pad_sec)))
             if media_dur and end > media_dur:
                 end = media_dur
             duration = max(0.1, end - start + head)
@@ -210,25 +568,387 @@ def run_pipeline_multi(
 
         if media_dur:
             duration = min(duration, max(0.1, media_dur - out_start))
+        jobs.append((out_start, duration, f'_{idx}'))
+    return jobs
 
-        seg_path = os.path.join('data/working', f'segment_{idx}.mp4')
-        cut_segment(input_path, seg_path, start=out_start, duration=duration)
 
-        if export_audio_only:
-            final_audio = os.path.join('data/outputs/shorts', f'short_final_{idx}.mp3')
-            export_audio(seg_path, final_audio)
-            out_paths.append(final_audio)
-            continue
+def prefetch_transcript(
+    transcript: Optional[Transcript],
+    jobs: List[Tuple[float, float, str]],
+    conf: PipelineConfig,
+    export_audio_only: bool = False,
+    run: Optional[RunDir] = None,
+) -> None:
+    """
+    Transcribe the ranges the render of jobs will read for subtitles now rather than during render
+    (a no-op unless the transcript is lazy). Clips the run has already rendered are left out.
+    """
+    if not isinstance(transcript, LazyTranscript) or not conf.subs_enabled or export_audio_only:
+        return
+    if run is not None:
+        jobs = [job for job in jobs if not run.done(*_clip_step(job))]
+    if jobs:
+        _transcript_for(transcript, [(out_start, out_start + duration) for out_start, duration, _ in jobs])
+
+
+def render_clips(
+    input_path: str,
+    jobs: List[Tuple[float, float, str]],
+    transcript: Optional[Transcript],
+    conf: PipelineConfig,
+    export_audio_only: bool = False,
+    work_dir: str = WORK_DIR,
+    out_dir: str = OUTPUT_DIR,
+    keyframes: Optional[np.ndarray] = None,
+    run: Optional[RunDir] = None,
+) -> List[str]:
+    """
+    Render stage: render planned clips, conf.render_workers at a time, in plan order. With a run,
+    work_dir/out_dir are the run's, each clip is a run step (done clips are not rendered again) and
+    its files are renamed into the output dir only once all of them are complete.
+    """
+    if run is not None:
+        work_dir, out_dir = run.work_dir, run.out_dir
+
+    # map() keeps output order (and short_final_{idx} naming) deterministic
+    def render(job) -> List[str]:
+        out_start, duration, tag = job
+        if run is None:
+            return _render_clip(input_path, out_start, duration, transcript, conf, tag, export_audio_only, work_dir, out_dir, keyframes)
+
+        def build() -> List[str]:
+            return run.publish(_render_clip(
+                input_path, out_start, duration, transcript, conf, tag, export_audio_only, work_dir, run.staging_dir, keyframes, run,
+            ))
+        name, deps = _clip_step(job)
+        return run.step(name, build, deps=deps)
+
+    workers = max(1, min(conf.render_workers, len(jobs)))
+    with stage('render', clips=len(jobs)):
+        if workers == 1:
+            rendered = [render(job) for job in jobs]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [submit_in_context(pool, render, job) for job in jobs]
+                rendered = [f.result() for f in futures]
+    # each clip's main-profile file first, then its other profiles
+    return [path for paths in rendered for path in paths]
 
-        vert_path = os.path.join('data/working', f'vertical_{idx}.mp4')
-        to_vertical(seg_path, vert_path, width=conf.width, height=conf.height, blur=conf.blur, padding_color=conf.padding_color)
 
-        final_path = os.path.join('data/outputs/shorts', f'short_final_{idx}.mp4')
-        if conf.subs_enabled:
-            burn_subtitles_karaoke(vert_path, final_path, model=conf.subs_model)
-        else:
-            import ffmpeg
-            ffmpeg.input(vert_path).output(final_path, c='copy', movflags='faststart').overwrite_output().run(quiet=True)
-        out_paths.append(final_path)
+def _clip_step(job: Tuple[float, float, str]) -> Tuple[str, list]:
+    """Run step name and deps of a render job."""
+    out_start, duration, tag = job
+    return f'clip{tag}', [out_start, duration]
 
-    return out_paths
+
+@dataclass
+class _RunSources:
+    """Analysis input and source transcript of a run, made on first use (a resumed run may need neither)."""
+    input_path: str
+    conf: PipelineConfig
+    cache: AnalysisCache
+    idea_end: bool
+    export_audio_only: bool
+
+    @cached_property
+    def analysis_path(self) -> str:
+        return analysis_input(self.input_path, self.conf, self.cache)
+
+    @cached_property
+    def transcript(self) -> Optional[Transcript]:
+        return source_transcript(self.analysis_path, self.conf, self.cache, self.idea_end, self.export_audio_only)
+
+
+def _render_run(run: RunDir, sources: _RunSources, jobs: List[Tuple[float, float, str]]) -> List[str]:
+    """render_clips into a run; the transcript and keyframes are only loaded if a clip still needs rendering."""
+    pending = [job for job in jobs if not run.done(*_clip_step(job))]
+    transcript = sources.transcript if pending else None
+    keyframes = None
+    if pending and not sources.export_audio_only:
+        keyframes = source_keyframes(sources.input_path, sources.conf, sources.cache)
+    return render_clips(sources.input_path, jobs, transcript, sources.conf, sources.export_audio_only, keyframes=keyframes, run=run)
+
+
+def run_pipeline(
+    input_path: Optional[str],
+    profile: str = 'tiktok',
+    config_path: str = 'configs/pipeline.yaml',
+    via_youtube_query: Optional[str] = None,
+    duration_override: Optional[float] = None,
+    subs_enabled_override: Optional[bool] = None,
+    idea_end: bool = True,
+    min_dur: float = 20.0,
+    max_dur: float = 120.0,
+    tail_pad_sec: float = 1.5,
+    head_pad_sec: float = 0.0,
+    export_audio_only: bool = False,
+    use_cache: bool = True,
+    streaming: bool = False,
+    single_pass: bool = False,
+    ffmpeg_threads: Optional[int] = None,
+    joint_selection: bool = False,
+    proxy: bool = False,
+    cut_mode: Optional[str] = None,
+    profiles: Optional[List[str]] = None,
+    transcribe_workers: Optional[int] = None,
+    lazy_transcript: bool = False,
+    coarse_factor: Optional[int] = None,
+    resume: bool = True,
+    report_path: Optional[str] = None,
+    on_event: Optional[EventCallback] = None,
+) -> str:
+    """
+    Produce a single final short and return its output path. Extra profiles (profiles, or
+    render.profiles in the config) are rendered alongside it as short_final_<profile>.mp4.
+    Files go to the run's directories (see open_run); rerunning the same inputs skips the steps
+    already completed unless resume is False. ffmpeg_threads caps the threads of each ffmpeg
+    render (0 = auto: every core, since the clip renders alone).
+    report_path writes a JSON run report (per-stage timings, memory, I/O, ffmpeg stats); on_event
+    receives progress events as they happen.
+    """
+    with maybe_recording(report_path, on_event):
+        return _run_single(
+            input_path, profile, config_path, via_youtube_query, duration_override, subs_enabled_override,
+            idea_end, min_dur, max_dur, tail_pad_sec, head_pad_sec, export_audio_only, use_cache, streaming,
+            single_pass, ffmpeg_threads, joint_selection, proxy, cut_mode, profiles, transcribe_workers,
+            lazy_transcript, coarse_factor, resume,
+        )
+
+
+def _run_single(
+    input_path: Optional[str],
+    profile: str,
+    config_path: str,
+    via_youtube_query: Optional[str],
+    duration_override: Optional[float],
+    subs_enabled_override: Optional[bool],
+    idea_end: bool,
+    min_dur: float,
+    max_dur: float,
+    tail_pad_sec: float,
+    head_pad_sec: float,
+    export_audio_only: bool,
+    use_cache: bool,
+    streaming: bool,
+    single_pass: bool,
+    ffmpeg_threads: Optional[int],
+    joint_selection: bool,
+    proxy: bool,
+    cut_mode: Optional[str],
+    profiles: Optional[List[str]],
+    transcribe_workers: Optional[int],
+    lazy_transcript: bool,
+    coarse_factor: Optional[int],
+    resume: bool,
+) -> str:
+    conf = load_config(config_path, profile, profiles)
+    if duration_override is not None and duration_override > 0:
+        conf.duration = float(duration_override)
+    if subs_enabled_override is not None:
+        conf.subs_enabled = bool(subs_enabled_override)
+    if streaming:
+        conf.streaming = True
+    if single_pass:
+        conf.single_pass = True
+    # one clip renders alone, so render.workers must not split the cores for it
+    conf.render_workers = 1
+    if ffmpeg_threads is not None:
+        conf.ffmpeg_threads = max(0, int(ffmpeg_threads))
+    if joint_selection:
+        conf.joint_selection = True
+    if proxy:
+        conf.proxy = True
+    if cut_mode:
+        conf.cut_mode = cut_mode
+    if transcribe_workers is not None:
+        conf.transcribe_workers = max(0, int(transcribe_workers))
+    if lazy_transcript:
+        conf.lazy_transcript = True
+    if coarse_factor is not None:
+        conf.coarse_factor = max(1, int(coarse_factor))
+    if not resume:
+        conf.resume = False
+
+    input_path = resolve_input(input_path, via_youtube_query, conf)
+    cache = make_cache(conf, use_cache)
+
+    run = open_run(
+        input_path, conf, cache, mode='single', idea_end=idea_end, min_dur=min_dur, max_dur=max_dur,
+        tail_pad_sec=tail_pad_sec, head_pad_sec=head_pad_sec, export_audio_only=export_audio_only,
+    )
+    with run:
+        sources = _RunSources(input_path, conf, cache, idea_end, export_audio_only)
+
+        def plan() -> List[float]:
+            analysis_path = sources.analysis_path
+
+            # Find an engaging start
+            score_win = min((duration_override or conf.duration or 30), 30)
+            with stage('analysis'):
+                timeline = _timeline(analysis_path, 1.0, conf, cache)
+                with stage('windows'):
+                    start, _ = best_window(
+                        analysis_path, window_sec=score_win, stride_sec=1.0, timeline=timeline,
+                        coarse_factor=conf.coarse_factor, top_k=conf.refine_top_k,
+                    )
+
+                # Probe media duration once
+                media_dur = _media_duration(input_path, cache)
+
+            transcript = sources.transcript
+            if idea_end:
+                # Idea-aware end selection
+                sils = _silences(analysis_path, conf, cache)
+                end = None
+                # a no-op unless lazy (never with joint selection): only the endpoint search range is needed
+                selection_transcript = _transcript_for(transcript, [(start + float(min_dur), start + float(max_dur))])
+                with stage('plan'):
+                    if conf.joint_selection:
+                        # pick start and end together from sentence/silence boundaries
+                        picked = select_clips(
+                            timeline, BoundaryIndex(selection_transcript, sils), min_dur=float(min_dur), max_dur=float(max_dur),
+                            max_clips=1, media_dur=media_dur,
+                        )
+                        if picked:
+                            start, dur, _ = picked[0]
+                            end = start + dur
+                    if end is None:
+                        end = pick_idea_endpoint(selection_transcript, sils, start_hint=start, min_dur=float(min_dur), max_dur=float(max_dur))
+                end += max(0.0, min(3.0, float(tail_pad_sec)))
+                if media_dur and end > media_dur:
+                    end = media_dur
+                head = max(0.0, min(3.0, float(head_pad_sec)))
+                out_start = max(0.0, start - head)
+                duration = max(0.1, end - start + head)
+                if media_dur:
+                    duration = min(duration, max(0.1, media_dur - out_start))
+            else:
+                base_dur = float(duration_override or conf.duration)
+                head = max(0.0, min(3.0, float(head_pad_sec)))
+                out_start = max(0.0, start - head)
+                duration = base_dur + head
+                if media_dur:
+                    duration = min(duration, max(0.1, media_dur - out_start))
+            return [float(out_start), float(duration)]
+
+        out_start, duration = run.step('plan', plan, outputs=())
+        return _render_run(run, sources, [(out_start, duration, '')])[0]
+
+
+def run_pipeline_multi(
+    input_path: Optional[str],
+    profile: str = 'tiktok',
+    config_path: str = 'configs/pipeline.yaml',
+    via_youtube_query: Optional[str] = None,
+    durations: Optional[List[float]] = None,
+    max_clips: int = 3,
+    stride_sec: float = 1.0,
+    subs_enabled_override: Optional[bool] = None,
+    idea_end: bool = False,
+    min_dur: float = 20.0,
+    max_dur: float = 120.0,
+    tail_pad_sec: float = 1.5,
+    head_pad_sec: float = 0.0,
+    export_audio_only: bool = False,
+    use_cache: bool = True,
+    streaming: bool = False,
+    single_pass: bool = False,
+    render_workers: Optional[int] = None,
+    ffmpeg_threads: Optional[int] = None,
+    joint_selection: bool = False,
+    proxy: bool = False,
+    cut_mode: Optional[str] = None,
+    profiles: Optional[List[str]] = None,
+    transcribe_workers: Optional[int] = None,
+    lazy_transcript: bool = False,
+    coarse_factor: Optional[int] = None,
+    resume: bool = True,
+    report_path: Optional[str] = None,
+    on_event: Optional[EventCallback] = None,
+) -> List[str]:
+    """Generate multiple clips (variable length) and return list of final paths (run dirs, resume, report_path / on_event as in run_pipeline)."""
+    with maybe_recording(report_path, on_event):
+        return _run_multi(
+            input_path, profile, config_path, via_youtube_query, durations, max_clips, stride_sec,
+            subs_enabled_override, idea_end, min_dur, max_dur, tail_pad_sec, head_pad_sec, export_audio_only,
+            use_cache, streaming, single_pass, render_workers, ffmpeg_threads, joint_selection, proxy, cut_mode, profiles,
+            transcribe_workers, lazy_transcript, coarse_factor, resume,
+        )
+
+
+def _run_multi(
+    input_path: Optional[str],
+    profile: str,
+    config_path: str,
+    via_youtube_query: Optional[str],
+    durations: Optional[List[float]],
+    max_clips: int,
+    stride_sec: float,
+    subs_enabled_override: Optional[bool],
+    idea_end: bool,
+    min_dur: float,
+    max_dur: float,
+    tail_pad_sec: float,
+    head_pad_sec: float,
+    export_audio_only: bool,
+    use_cache: bool,
+    streaming: bool,
+    single_pass: bool,
+    render_workers: Optional[int],
+    ffmpeg_threads: Optional[int],
+    joint_selection: bool,
+    proxy: bool,
+    cut_mode: Optional[str],
+    profiles: Optional[List[str]],
+    transcribe_workers: Optional[int],
+    lazy_transcript: bool,
+    coarse_factor: Optional[int],
+    resume: bool,
+) -> List[str]:
+    conf = load_config(config_path, profile, profiles)
+    if subs_enabled_override is not None:
+        conf.subs_enabled = bool(subs_enabled_override)
+    if streaming:
+        conf.streaming = True
+    if single_pass:
+        conf.single_pass = True
+    if render_workers is not None:
+        conf.render_workers = max(1, int(render_workers))
+    if ffmpeg_threads is not None:
+        conf.ffmpeg_threads = max(0, int(ffmpeg_threads))
+    if joint_selection:
+        conf.joint_selection = True
+    if proxy:
+        conf.proxy = True
+    if cut_mode:
+        conf.cut_mode = cut_mode
+    if transcribe_workers is not None:
+        conf.transcribe_workers = max(0, int(transcribe_workers))
+    if lazy_transcript:
+        conf.lazy_transcript = True
+    if coarse_factor is not None:
+        conf.coarse_factor = max(1, int(coarse_factor))
+    if not resume:
+        conf.resume = False
+
+    input_path = resolve_input(input_path, via_youtube_query, conf)
+    cache = make_cache(conf, use_cache)
+
+    durations = durations or [20, 30, 45, 60]
+    run = open_run(
+        input_path, conf, cache, mode='multi', durations=durations, max_clips=max_clips, stride_sec=stride_sec,
+        idea_end=idea_end, min_dur=min_dur, max_dur=max_dur, tail_pad_sec=tail_pad_sec, head_pad_sec=head_pad_sec,
+        export_audio_only=export_audio_only,
+    )
+    with run:
+        sources = _RunSources(input_path, conf, cache, idea_end, export_audio_only)
+
+        def plan() -> List[list]:
+            analysis = analyze_source(sources.analysis_path, conf, cache, durations, max_clips, stride_sec, idea_end)
+            jobs = plan_clips(
+                analysis, sources.transcript, idea_end, min_dur, max_dur, tail_pad_sec, head_pad_sec, conf.joint_selection,
+            )
+            return [[float(out_start), float(duration), tag] for out_start, duration, tag in jobs]
+
+        jobs = [tuple(job) for job in run.step('plan', plan, outputs=())]
+        return _render_run(run, sources, jobs)
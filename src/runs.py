@@ -0,0 +1,188 @@
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.metrics import current_recorder
+
+# Per-run work directories. A run (one source through the pipeline with one set of options) works
+# in <root>/<run id>/work and publishes to <out root>/<run id>; the id is derived from the source's
+# content hash and the options, so a rerun of the same inputs lands in the same directory and two
+# different runs never share a path. manifest.json records every completed step with a fingerprint
+# of what it was built from (step parameters plus size/mtime of its input files) and the size/mtime
+# of its outputs. A step whose entry still matches and whose outputs are unchanged is skipped, like
+# make. The run holds an exclusive flock on <run>/.lock while it works (an identical concurrent
+# run waits, then finds every step done); the manifest and published outputs are replaced
+# atomically, so neither is ever seen half-written.
+
+DEFAULT_RUNS_DIR = 'data/runs'
+MANIFEST_VERSION = 1
+
+
+def _hash(obj: Any) -> str:
+    data = json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(data, digest_size=10).hexdigest()
+
+
+def _safe_stem(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path.rstrip('/')))[0] or 'run'
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in stem)[:40]
+
+
+def run_id(source: str, source_digest: str, params: Dict[str, Any]) -> str:
+    """<source stem>_<hash of source content and params>: stable across reruns of the same inputs."""
+    return f'{_safe_stem(source)}_{_hash([source_digest, params])}'
+
+
+def file_signature(path: str) -> Optional[List[int]]:
+    """[size, mtime_ns] of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class RunDir:
+    """
+    Work directory, output directory and step manifest of one run. Use as a context manager: entering
+    takes the run lock and loads the manifest (a fresh one if resume is False or the run key differs).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        out_root: str,
+        run_id: str,
+        inputs: Optional[Dict[str, Any]] = None,
+        resume: bool = True,
+    ):
+        self.id = run_id
+        self.dir = os.path.join(root, run_id)
+        self.work_dir = os.path.join(self.dir, 'work')
+        self.out_dir = os.path.join(out_root, run_id)
+        self.staging_dir = os.path.join(self.work_dir, 'final')  # outputs are renamed out of here
+        self.manifest_path = os.path.join(self.dir, 'manifest.json')
+        self.inputs = dict(inputs or {})
+        self.resume = resume
+        self.skipped: List[str] = []
+        self._manifest: Dict[str, Any] = {}
+        self._lock = threading.Lock()  # render threads record steps concurrently
+        self._handle = None
+
+    def __enter__(self) -> 'RunDir':
+        for d in (self.work_dir, self.staging_dir, self.out_dir):
+            os.makedirs(d, exist_ok=True)
+        self._handle = open(os.path.join(self.dir, '.lock'), 'a')
+        fcntl.flock(self._handle, fcntl.LOCK_EX)
+        manifest = None
+        if self.resume:
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    manifest = json.load(f)
+                if manifest.get('version') != MANIFEST_VERSION or manifest.get('id') != self.id:
+                    manifest = None
+            except (OSError, ValueError):
+                manifest = None
+        self._manifest = manifest or {'version': MANIFEST_VERSION, 'id': self.id, 'steps': {}}
+        self._manifest['inputs'] = self.inputs
+        self._manifest['pid'] = os.getpid()
+        self._save()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        fcntl.flock(self._handle, fcntl.LOCK_UN)
+        self._handle.close()
+        self._handle = None
+
+    def _save(self) -> None:
+        tmp = f'{self.manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    @staticmethod
+    def _fingerprint(name: str, deps: Any, inputs: Sequence[str]) -> Dict[str, Any]:
+        sigs = {p: file_signature(p) for p in inputs}
+        return {'fingerprint': _hash([name, deps, sigs]), 'inputs': sigs}
+
+    def done(self, name: str, deps: Any = (), inputs: Sequence[str] = ()) -> bool:
+        """Whether step `name` is recorded for these deps/inputs and its outputs are unchanged."""
+        fp = self._fingerprint(name, deps, inputs)['fingerprint']
+        with self._lock:
+            entry = self._manifest['steps'].get(name)
+        if entry is None or entry['fingerprint'] != fp:
+            return False
+        return all(file_signature(p) == sig for p, sig in entry['outputs'].items())
+
+    def step(
+        self,
+        name: str,
+        build: Callable[[], Any],
+        deps: Any = (),
+        inputs: Sequence[str] = (),
+        outputs: Optional[Sequence[str]] = None,
+    ) -> Any:
+        """
+        Run build() unless step `name` is done (see done()), and return its value (JSON-serialisable;
+        a skipped step returns the recorded one). outputs are the files the step writes; None means
+        the value itself is the list of output paths.
+        """
+        if self.done(name, deps, inputs):
+            with self._lock:
+                self.skipped.append(name)
+                entry = self._manifest['steps'][name]
+            rec = current_recorder()
+            if rec is not None:
+                rec.emit('step_skipped', step=name, run=self.id)
+            return entry.get('value')
+        t0 = time.time()
+        value = build()
+        entry = self._fingerprint(name, deps, inputs)
+        entry.update(
+            value=value,
+            outputs={p: file_signature(p) for p in (value if outputs is None else outputs)},
+            started=round(t0, 3),
+            finished=round(time.time(), 3),
+        )
+        with self._lock:
+            self._manifest['steps'][name] = entry
+            self._save()
+        return value
+
+    def publish(self, paths: Sequence[str]) -> List[str]:
+        """Move finished files from the staging dir into the output dir (atomic renames)."""
+        published = []
+        for p in paths:
+            dst = os.path.join(self.out_dir, os.path.basename(p))
+            try:
+                os.replace(p, dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # runs dir on another filesystem: copy next to dst, then rename
+                tmp = f'{dst}.{os.getpid()}.part'
+                shutil.copyfile(p, tmp)
+                os.replace(tmp, dst)
+                os.remove(p)
+            published.append(dst)
+        return published
+
+
+def run_step(
+    run: Optional[RunDir],
+    name: str,
+    build: Callable[[], Any],
+    deps: Any = (),
+    inputs: Sequence[str] = (),
+    outputs: Optional[Sequence[str]] = None,
+) -> Any:
+    """RunDir.step when there is a run, else just build()."""
+    if run is None:
+        return build()
+    return run.step(name, build, deps=deps, inputs=inputs, outputs=outputs)
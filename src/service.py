@@ -0,0 +1,276 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from src.pipeline import load_config, run_pipeline, run_pipeline_multi
+from src.analysis.semantic import load_whisper_model, loaded_models
+from src.metrics import recording
+
+# Long-lived worker: keeps Whisper models loaded and runs pipeline jobs from a bounded queue.
+# Jobs are submitted and followed over a small local HTTP API:
+#   POST /jobs               body: job params (JSON)  -> 202 {"id": ...} | 503 when the queue is full
+#   GET  /jobs/<id>          -> job status, outputs, error
+#   GET  /jobs/<id>/events   -> newline-delimited JSON status and stage progress events, streamed until the job ends
+#   GET  /jobs/<id>/report   -> per-stage run report (timings, memory, I/O, ffmpeg stats) once finished
+#   GET  /health             -> queue depth, running jobs, loaded models
+
+JOB_PARAMS = (
+    'input_path', 'profile', 'multi', 'durations', 'max_clips', 'stride_sec', 'duration_override',
+    'subs_enabled_override', 'idea_end', 'min_dur', 'max_dur', 'tail_pad_sec', 'head_pad_sec',
+    'export_audio_only', 'use_cache', 'streaming', 'single_pass', 'render_workers', 'ffmpeg_threads',
+    'joint_selection', 'proxy', 'cut_mode', 'profiles',
+    'transcribe_workers', 'lazy_transcript', 'coarse_factor', 'resume',
+)
+
+# Finished jobs (with their events and report) are kept for polling until there are more than
+# KEEP_FINISHED of them or they are older than FINISHED_TTL seconds; the oldest are dropped first.
+KEEP_FINISHED = 256
+FINISHED_TTL = 24 * 3600.0
+
+
+@dataclass
+class Job:
+    id: str
+    params: Dict[str, Any]
+    status: str = 'queued'  # queued | running | done | failed
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    report: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'outputs': self.outputs,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+def run_job(params: Dict[str, Any], config_path: str) -> List[str]:
+    """Default job runner: dispatch to run_pipeline / run_pipeline_multi."""
+    params = dict(params)
+    multi = bool(params.pop('multi', False))
+    if multi:
+        params.pop('duration_override', None)
+        return run_pipeline_multi(config_path=config_path, **params)
+    for k in ('durations', 'max_clips', 'stride_sec', 'render_workers'):
+        params.pop(k, None)
+    return [run_pipeline(config_path=config_path, **params)]
+
+
+class PipelineService:
+    def __init__(
+        self,
+        config_path: str = 'configs/pipeline.yaml',
+        workers: int = 1,
+        max_queue: int = 16,
+        preload_models: Optional[List[str]] = None,
+        runner: Optional[Callable[[Dict[str, Any], str], List[str]]] = None,
+        keep_finished: int = KEEP_FINISHED,
+        finished_ttl: float = FINISHED_TTL,
+    ):
+        self.config_path = config_path
+        self.workers = max(1, int(workers))
+        self.runner = runner or run_job
+        self.preload_models = preload_models
+        self.keep_finished = max(0, int(keep_finished))
+        self.finished_ttl = float(finished_ttl)
+        self._queue: 'queue.Queue[Optional[Job]]' = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._jobs: Dict[str, Job] = {}
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        models = self.preload_models
+        if models is None:
+            try:
+                models = [load_config(self.config_path, 'tiktok').subs_model]
+            except Exception:
+                models = []
+        for m in models:
+            load_whisper_model(m)
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f'pipeline-worker-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def submit(self, params: Dict[str, Any]) -> Job:
+        """Queue a job; raises queue.Full when the queue is at capacity."""
+        if not isinstance(params, dict):
+            raise TypeError('Job params must be a JSON object')
+        unknown = set(params) - set(JOB_PARAMS)
+        if unknown:
+            raise ValueError(f'Unknown job params: {sorted(unknown)}')
+        if params.get('render_workers') is not None and not params.get('multi'):
+            raise ValueError('render_workers only applies to multi jobs (a single clip renders alone)')
+        job = Job(id=uuid.uuid4().hex[:12], params=dict(params))
+        with self._cond:
+            self._prune()
+            self._jobs[job.id] = job
+            self._event(job, 'queued')
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._cond:
+                del self._jobs[job.id]
+            raise
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def health(self) -> Dict[str, Any]:
+        with self._cond:
+            running = sum(1 for j in self._jobs.values() if j.status == 'running')
+        return {'queued': self._queue.qsize(), 'running': running, 'workers': self.workers, 'models': loaded_models()}
+
+    def iter_events(self, job: Job, timeout: float = 3600.0):
+        """Yield the job's events as they happen, ending after it finishes."""
+        i = 0
+        deadline = time.time() + timeout
+        while True:
+            with self._cond:
+                while i >= len(job.events) and job.status not in ('done', 'failed'):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return
+                    self._cond.wait(remaining)
+                pending = job.events[i:]
+                finished = job.status in ('done', 'failed')
+            for ev in pending:
+                yield ev
+            i += len(pending)
+            if finished and i >= len(job.events):
+                return
+
+    def _event(self, job: Job, status: str, **extra) -> None:
+        # caller holds self._cond
+        job.status = status
+        job.events.append({'id': job.id, 'status': status, 'time': time.time(), **extra})
+        self._cond.notify_all()
+
+    def _prune(self) -> None:
+        # caller holds self._cond; drops finished jobs past the TTL or beyond keep_finished
+        finished = sorted(
+            (j for j in self._jobs.values() if j.status in ('done', 'failed')), key=lambda j: j.finished or 0.0
+        )
+        cutoff = time.time() - self.finished_ttl
+        excess = len(finished) - self.keep_finished
+        for i, j in enumerate(finished):
+            if i < excess or (j.finished or 0.0) < cutoff:
+                del self._jobs[j.id]
+
+    def _progress(self, job: Job, ev: Dict[str, Any]) -> None:
+        with self._cond:
+            job.events.append({'id': job.id, 'status': job.status, **ev})
+            self._cond.notify_all()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._cond:
+                job.started = time.time()
+                self._event(job, 'running')
+            error = None
+            with recording(on_event=lambda ev, job=job: self._progress(job, ev)) as rec:
+                try:
+                    outputs = self.runner(job.params, self.config_path)
+                    if outputs is None:
+                        error = 'Runner returned no outputs'
+                except Exception as e:
+                    outputs, error = None, f'{type(e).__name__}: {e}'
+            with self._cond:
+                job.report = rec.to_dict()
+                job.finished = time.time()
+                if outputs is None:
+                    job.error = error
+                    self._event(job, 'failed', error=job.error)
+                else:
+                    job.outputs = list(outputs)
+                    self._event(job, 'done', outputs=job.outputs)
+                self._prune()
+
+
+def make_handler(service: PipelineService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # keep the service quiet
+            pass
+
+        def _json(self, code: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = [p for p in self.path.split('?')[0].split('/') if p]
+            if parts == ['health']:
+                return self._json(200, service.health())
+            if len(parts) >= 2 and parts[0] == 'jobs':
+                job = service.get(parts[1])
+                if job is None:
+                    return self._json(404, {'error': 'unknown job'})
+                if len(parts) == 2:
+                    return self._json(200, job.to_dict())
+                if parts[2:] == ['report']:
+                    if job.report is None:
+                        return self._json(409, {'error': 'job not finished'})
+                    return self._json(200, job.report)
+                if parts[2:] == ['events']:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.send_header('Connection', 'close')
+                    self.end_headers()
+                    for ev in service.iter_events(job):
+                        self.wfile.write((json.dumps(ev) + '\n').encode())
+                        self.wfile.flush()
+                    return
+            self._json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/jobs':
+                return self._json(404, {'error': 'not found'})
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                params = json.loads(self.rfile.read(length) or b'{}')
+                job = service.submit(params)
+            except queue.Full:
+                return self._json(503, {'error': 'queue full'})
+            except (ValueError, TypeError) as e:
+                return self._json(400, {'error': str(e)})
+            self._json(202, {'id': job.id})
+
+    return Handler
+
+
+def serve(service: PipelineService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """Start the service workers and return a bound (not yet serving) HTTP server."""
+    service.start()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,441 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import ffmpeg
+import numpy as np
+
+from src.analysis.engagement import (
+    FeatureTimeline, score_timeline, hop_for_stride, iter_gray_frames, frame_diffs, FAST_MOTION_FPS,
+)
+from src.analysis.stream import RunningBins, iter_pcm_blocks, probe_audio, DEFAULT_BLOCK_SEC
+from src.analysis.semantic import silences_from_ms_energy, ActivityMap
+from src.analysis.selection import BoundaryIndex
+from src.pipeline import PipelineConfig, SILENCE_MIN_LEN_MS, SILENCE_DB_DROP, OUTPUT_DIR, WORK_DIR, render_clips
+
+# Watch mode: follow a recording that is still being written (one growing file, or a directory of
+# rolling segments) and render clips while it runs. Audio and frames are decoded once, as they
+# arrive, into append-only per-hop engagement sums and per-millisecond silence bins. A window is
+# emitted once it has settled (no better window can still start near it) and its idea-end
+# boundary is final, so latency from an event to its clip is about window_sec + settle_sec
+# (+ max_dur - window_sec when idea ends may reach past the window) plus render time.
+# A growing single file must be in a container that is readable while written (MPEG-TS, MKV, FLV,
+# fragmented MP4); a regular MP4 only gets its index when recording stops.
+# Frames are read through ffmpeg either way (OpenCV cannot follow a growing file): conf.motion_mode
+# 'full' diffs every frame at source resolution, 'fast' the small low-fps frames. Each session
+# works in its own directory, so two watchers of same-named sources never share files.
+
+SEGMENT_EXTS = ('.ts', '.mkv', '.mp4', '.m4s', '.flv')
+LIVE_BLOCK_SEC = 1.0  # decode granularity; bounds how stale the live timeline can be
+
+
+class _GrowBins:
+    """Append-mostly per-bin sums/counts for values arriving with non-decreasing bin indices."""
+
+    def __init__(self):
+        self.sums = np.zeros(1024)
+        self.counts = np.zeros(1024)
+        self.n = 0
+
+    def add(self, bins: np.ndarray, weights: np.ndarray) -> None:
+        if not len(bins):
+            return
+        top = int(bins[-1]) + 1
+        if top > len(self.sums):
+            size = max(top, 2 * len(self.sums))
+            self.sums = np.pad(self.sums, (0, size - len(self.sums)))
+            self.counts = np.pad(self.counts, (0, size - len(self.counts)))
+        b0 = int(bins[0])
+        self.sums[b0:top] += np.bincount(bins - b0, weights=weights, minlength=top - b0)
+        self.counts[b0:top] += np.bincount(bins - b0, minlength=top - b0)
+        self.n = max(self.n, top)
+
+
+class LiveFeatures:
+    """
+    Engagement and silence features of a source that keeps growing. Feed it audio blocks and
+    grayscale frame blocks in order (from any thread); read a FeatureTimeline of the hops that
+    are complete on both streams, and silences over any recent range.
+    """
+
+    def __init__(self, hop_sec: float, sr: int, motion_fps: float = FAST_MOTION_FPS, has_video: bool = True):
+        self.hop_sec = float(hop_sec)
+        self.sr = int(sr)
+        self.motion_fps = float(motion_fps)
+        self.has_video = has_video
+        self._lock = threading.Lock()
+        self._hop_bins = RunningBins(max(1, int(round(hop_sec * sr))))
+        # sr is 0 for sources without audio; the millisecond bins are then never fed
+        self._ms_bins = RunningBins(max(self.sr, 1000), 1000, dtype=np.float32)
+        self._motion = _GrowBins()
+        self._prev_frame: Optional[np.ndarray] = None
+        self._n_diffs = 0
+        self._power_sum = 0.0  # running sum of channel-mean squared samples (silence reference)
+        self.audio_frames = 0
+        self.video_frames = 0
+
+    def add_audio(self, block: np.ndarray) -> None:
+        mono = block.mean(axis=1, dtype=np.float64)
+        power = np.square(block, dtype=np.float64).mean(axis=1)
+        with self._lock:
+            self._hop_bins.feed(mono * mono)
+            self._ms_bins.feed(power)
+            self._power_sum += float(power.sum())
+            self.audio_frames += len(block)
+
+    def add_frames(self, block: np.ndarray) -> None:
+        diffs, prev = frame_diffs(block, self._prev_frame)
+        self._prev_frame = prev
+        idx = np.arange(self._n_diffs + 1, self._n_diffs + len(diffs) + 1)
+        bins = (idx / self.motion_fps / self.hop_sec).astype(np.int64)
+        with self._lock:
+            self._motion.add(bins, diffs)
+            self._n_diffs += len(diffs)
+            self.video_frames += len(block)
+
+    @property
+    def ready_sec(self) -> float:
+        """Seconds of source decoded on every stream."""
+        audio = self.audio_frames / self.sr if self.sr else float('inf')
+        # the last frame's diff is binned at its own timestamp, so frame k covers up to k / fps
+        video = max(0, self.video_frames - 1) / self.motion_fps if self.has_video else float('inf')
+        ready = min(audio, video)
+        return 0.0 if ready == float('inf') else ready
+
+    def timeline(self, final: bool = False) -> FeatureTimeline:
+        """Timeline of the complete hops (all hops when final, i.e. the source has ended)."""
+        with self._lock:
+            energy, samples = self._hop_bins.closed()
+            if final:
+                energy, samples = self._hop_bins.finish()
+            n_motion = self._motion.n
+            motion, frames = self._motion.sums[:n_motion].copy(), self._motion.counts[:n_motion].copy()
+        n = int(self.ready_sec / self.hop_sec) if not final else max(len(energy), n_motion)
+        if self.sr:
+            n = min(n, len(energy))
+        if self.has_video and not final:
+            n = min(n, n_motion)
+
+        def fit(x):
+            x = np.asarray(x[:n], dtype=np.float64)
+            return np.pad(x, (0, n - len(x))) if len(x) < n else x
+        return FeatureTimeline(hop_sec=self.hop_sec, energy=fit(energy), samples=fit(samples), motion=fit(motion), frames=fit(frames))
+
+    def silences(self, from_sec: float = 0.0, min_silence_len_ms: int = SILENCE_MIN_LEN_MS, silence_db_drop: float = SILENCE_DB_DROP) -> List[Tuple[float, float]]:
+        """
+        Silences over the complete milliseconds from from_sec on, thresholded against the mean
+        power of everything decoded so far (the live stand-in for pydub's whole-track dBFS).
+        """
+        with self._lock:
+            energy, frames = self._ms_bins.closed()
+            ref = self._power_sum / max(1, self.audio_frames)
+        a = max(0, int(from_sec * 1000))
+        if a >= len(energy):
+            return []
+        return silences_from_ms_energy(
+            energy[a:], frames[a:], min_silence_len_ms, silence_db_drop, reference_power=ref, offset_ms=a,
+        )
+
+
+@dataclass
+class Segment:
+    path: str
+    start_sec: float
+    duration_sec: float
+
+
+@dataclass
+class WatchState:
+    cursor_sec: float = 0.0  # no clip may start before this (end of the last clip + gap)
+    emitted: List[Tuple[float, float]] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    segments: List[Segment] = field(default_factory=list)
+    done: bool = False
+    error: Optional[str] = None
+
+
+def _follow_args(idle_timeout_sec: float) -> List[str]:
+    # file protocol: keep reading at EOF, give up after idle_timeout_sec without new bytes
+    return ['-follow', '1', '-rw_timeout', str(int(idle_timeout_sec * 1e6))]
+
+
+def _frame_blocks(path: str, live: LiveFeatures, frame_size: Tuple[int, int], input_args: Sequence[str] = ()):
+    width, height = frame_size
+    return iter_gray_frames(
+        path, width, height, live.motion_fps, block_frames=max(1, int(live.motion_fps * LIVE_BLOCK_SEC)),
+        input_args=input_args,
+    )
+
+
+def _feed_file(
+    path: str, live: LiveFeatures, info, frame_size: Tuple[int, int], idle_timeout_sec: float, state: WatchState,
+) -> None:
+    args = _follow_args(idle_timeout_sec)
+    src = f'file:{os.path.abspath(path)}'
+    workers = []
+
+    def guarded(fn):
+        def run():
+            try:
+                fn()
+            except Exception as e:
+                state.error = f'{type(e).__name__}: {e}'
+        return run
+
+    if info is not None:
+        sr, channels = info
+
+        def audio():
+            for block in iter_pcm_blocks(src, sr, channels, block_sec=LIVE_BLOCK_SEC, input_args=args):
+                live.add_audio(block)
+        workers.append(threading.Thread(target=guarded(audio), name='watch-audio', daemon=True))
+    if live.has_video:
+        def video():
+            for block in _frame_blocks(src, live, frame_size, input_args=args):
+                live.add_frames(block)
+        workers.append(threading.Thread(target=guarded(video), name='watch-video', daemon=True))
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    state.done = True
+
+
+def _list_segments(directory: str) -> List[str]:
+    return sorted(
+        os.path.join(directory, f) for f in os.listdir(directory)
+        if f.lower().endswith(SEGMENT_EXTS) and not f.startswith('.')
+    )
+
+
+def _feed_segments(
+    directory: str, live: LiveFeatures, channels: int, frame_size: Tuple[int, int],
+    idle_timeout_sec: float, poll_sec: float, state: WatchState,
+) -> None:
+    try:
+        _follow_segments(directory, live, channels, frame_size, idle_timeout_sec, poll_sec, state)
+    except Exception as e:
+        state.error = f'{type(e).__name__}: {e}'
+    finally:
+        state.done = True
+
+
+def _follow_segments(
+    directory: str, live: LiveFeatures, channels: int, frame_size: Tuple[int, int],
+    idle_timeout_sec: float, poll_sec: float, state: WatchState,
+) -> None:
+    # a segment is complete once a newer one exists, or when nothing has changed for idle_timeout_sec;
+    # old segments may be deleted by the recorder's retention, so track them by name
+    done = set()
+    last_change = time.time()
+    last_sig = None
+    while True:
+        names = _list_segments(directory)
+        try:
+            sig = (names[-1] if names else None, os.path.getsize(names[-1]) if names else 0)
+        except OSError:
+            sig = None
+        if sig != last_sig:
+            last_sig, last_change = sig, time.time()
+        idle = time.time() - last_change >= idle_timeout_sec
+        pending = [p for p in (names if idle else names[:-1]) if p not in done]
+        for path in pending:
+            start = live.audio_frames / live.sr if live.sr else live.video_frames / live.motion_fps
+            for block in iter_pcm_blocks(path, live.sr, channels, block_sec=DEFAULT_BLOCK_SEC) if live.sr else ():
+                live.add_audio(block)
+            if live.has_video:
+                for block in _frame_blocks(path, live, frame_size):
+                    live.add_frames(block)
+            end = live.audio_frames / live.sr if live.sr else live.video_frames / live.motion_fps
+            state.segments.append(Segment(path, start, end - start))
+            done.add(path)
+        if idle:
+            break
+        time.sleep(poll_sec)
+
+
+def _join_segments(segments: List[Segment], start: float, end: float, out_path: str) -> Tuple[str, float]:
+    """Stream-copy the segments covering [start, end) into one file; returns (path, its start time)."""
+    used = [s for s in segments if s.start_sec < end and s.start_sec + s.duration_sec > start]
+    if not used:
+        raise RuntimeError(f'No segments cover {start:.2f}-{end:.2f}s')
+    list_path = out_path + '.txt'
+    with open(list_path, 'w') as f:
+        for s in used:
+            f.write("file '{}'\n".format(os.path.abspath(s.path).replace("'", "'\\''")))
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-nostdin', '-y', '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', out_path],
+        check=True,
+    )
+    os.remove(list_path)
+    return out_path, used[0].start_sec
+
+
+def _next_clip(
+    live: LiveFeatures,
+    state: WatchState,
+    window_sec: float,
+    stride_sec: float,
+    min_dur: float,
+    max_dur: float,
+    min_score: float,
+    settle_sec: float,
+    warmup_sec: float,
+    final: bool,
+) -> Optional[Tuple[float, float, float]]:
+    """(start, end, score) of the next clip whose window has settled and whose end is final, or None."""
+    tl = live.timeline(final=final)
+    ready = tl.duration_sec
+    if ready < max(warmup_sec, window_sec):
+        return None
+    scores, stride = score_timeline(tl, window_sec, stride_sec)  # normalised over all history
+    i0 = int(np.ceil(state.cursor_sec / stride - 1e-9))
+    if i0 >= len(scores):
+        return None
+    # windows whose start may still be beaten by a later, not yet complete window are not settled
+    settled = len(scores) if final else max(i0, len(scores) - int(np.ceil(settle_sec / stride)))
+    if settled <= i0:
+        return None
+    region = scores[i0:settled]
+    j = int(np.argmax(region))
+    if region[j] < min_score:
+        # every settled window is below the bar; don't revisit them (keeps latency bounded)
+        state.cursor_sec = max(state.cursor_sec, settled * stride)
+        return None
+    start = (i0 + j) * stride
+    sil_from = start + min_dur
+    sils = live.silences(from_sec=sil_from)
+    end = BoundaryIndex(None, ActivityMap(sils)).end_for(start, min_dur, max_dur)
+    # a silence start t is only known once t + min_silence_len has been decoded
+    known = ready if final else ready - SILENCE_MIN_LEN_MS / 1000.0
+    if end > known:
+        if not final:
+            return None
+        end = ready
+    return start, end, float(region[j])
+
+
+def watch(
+    source: str,
+    conf: PipelineConfig,
+    window_sec: float = 30.0,
+    stride_sec: float = 1.0,
+    min_dur: float = 20.0,
+    max_dur: float = 30.0,
+    min_score: float = 1.0,
+    settle_sec: float = 5.0,
+    warmup_sec: float = 60.0,
+    min_gap_sec: float = 1.0,
+    head_pad_sec: float = 0.0,
+    tail_pad_sec: float = 0.5,
+    poll_sec: float = 1.0,
+    idle_timeout_sec: float = 30.0,
+    export_audio_only: bool = False,
+    out_dir: Optional[str] = None,
+    on_clip: Optional[Callable[[str, float, float], None]] = None,
+) -> List[str]:
+    """
+    Follow a growing recording (a file being written, or a directory of rolling segments) and
+    render clips through the pipeline's render path while it runs. Stops idle_timeout_sec after
+    the source stops growing. A clip is the best window_sec window (z-score >= min_score over all
+    history) among windows that have settled, ended at its idea-end boundary (silence start in
+    [start + min_dur, start + max_dur]). Returns the rendered paths; on_clip(path, start, dur)
+    is called as each one finishes.
+    """
+    is_dir = os.path.isdir(source)
+    probe_path = source
+    if is_dir:
+        while not _list_segments(source):
+            time.sleep(poll_sec)
+        probe_path = _list_segments(source)[0]
+    info = probe_audio(probe_path)
+    sr, channels = info if info is not None else (0, 0)
+    video = _video_stream(probe_path)
+    width, height, fps = _motion_sampling(video, conf)
+    live = LiveFeatures(hop_for_stride(stride_sec), sr, motion_fps=fps, has_video=video is not None)
+    state = WatchState()
+
+    # a fresh session directory per watch: <stem>_<start time>_<random>
+    stem = os.path.splitext(os.path.basename(source.rstrip('/')))[0] or 'live'
+    os.makedirs(os.path.join(WORK_DIR, 'live'), exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=f'{stem}_{time.strftime("%Y%m%d-%H%M%S")}_', dir=os.path.join(WORK_DIR, 'live'))
+    out_dir = out_dir or os.path.join(OUTPUT_DIR, 'live', os.path.basename(work_dir))
+
+    if is_dir:
+        feeder = threading.Thread(
+            target=_feed_segments, args=(source, live, channels, (width, height), idle_timeout_sec, poll_sec, state),
+            name='watch-segments', daemon=True,
+        )
+    else:
+        feeder = threading.Thread(
+            target=_feed_file, args=(source, live, info, (width, height), idle_timeout_sec, state),
+            name='watch-file', daemon=True,
+        )
+    feeder.start()
+
+    head = max(0.0, min(3.0, float(head_pad_sec)))
+    tail = max(0.0, min(3.0, float(tail_pad_sec)))
+    futures = []
+
+    def render(idx: int, start: float, end: float) -> str:
+        out_start = max(0.0, start - head)
+        duration = max(0.1, end + tail - out_start)
+        path = source
+        if is_dir:
+            path, base = _join_segments(state.segments, out_start, out_start + duration, os.path.join(work_dir, f'join_{idx}.ts'))
+            out_start -= base
+        out = render_clips(path, [(out_start, duration, f'_{idx}')], None, conf, export_audio_only, work_dir, out_dir)[0]
+        if on_clip:
+            on_clip(out, start, end - start)
+        return out
+
+    with ThreadPoolExecutor(max_workers=max(1, conf.render_workers)) as pool:
+        while True:
+            final = state.done
+            clip = _next_clip(live, state, window_sec, stride_sec, min_dur, max_dur, min_score, settle_sec, warmup_sec, final)
+            if clip is not None:
+                start, end, _score = clip
+                state.emitted.append((start, end))
+                state.cursor_sec = end + tail + min_gap_sec + head
+                futures.append(pool.submit(render, len(state.emitted), start, end))
+                continue
+            if final:
+                break
+            time.sleep(poll_sec)
+        for f in futures:
+            state.outputs.append(f.result())
+    feeder.join()
+    if state.error:
+        raise RuntimeError(f'Watch stopped early ({state.error}); rendered {len(state.outputs)} clip(s)')
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return state.outputs
+
+
+def _video_stream(path: str) -> Optional[dict]:
+    try:
+        return next((s for s in ffmpeg.probe(path).get('streams', []) if s.get('codec_type') == 'video'), None)
+    except ffmpeg.Error:
+        return None
+
+
+def _frame_rate(rate) -> float:
+    try:
+        num, den = (float(x) for x in str(rate).split('/'))
+    except ValueError:
+        return 0.0
+    return num / den if num > 0 and den > 0 else 0.0
+
+
+def _motion_sampling(video: Optional[dict], conf: PipelineConfig) -> Tuple[int, int, float]:
+    """(width, height, fps) frames are diffed at: the source's own in 'full' motion mode."""
+    if conf.motion_mode == 'fast' or video is None:
+        return conf.motion_width, conf.motion_height, conf.motion_fps
+    # a growing file may not have an average rate yet; 30 is what OpenCV assumes without one
+    fps = _frame_rate(video.get('avg_frame_rate')) or _frame_rate(video.get('r_frame_rate')) or 30.0
+    return int(video.get('width') or conf.motion_width), int(video.get('height') or conf.motion_height), fps
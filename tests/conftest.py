@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Run from anywhere: make the repo root importable as the `src` package's parent.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the yt-dlp executable (point $YTDLP_BIN at it). It understands the calls
+src/ingest/async_ingest.py makes:
+
+  <url> --dump-json --skip-download            one info dict for the video id in the URL
+  ytsearch<N>:<query> --dump-json ...          N info dicts
+  --load-info-json <file> -o <template> ... --print after_move:filepath
+                                               writes <template> and prints its path last
+
+Every call is appended to $FAKE_YTDLP_STATE/calls.jsonl, and the number of calls running at once
+is tracked in running/peak files there. Ids starting with 'nc' get a non-CC license; every call
+sleeps $FAKE_YTDLP_DELAY seconds (default 0.2) so concurrent calls overlap.
+"""
+import fcntl
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+CC_LICENSE = 'Creative Commons Attribution license (reuse allowed)'
+STANDARD_LICENSE = 'Standard YouTube License'
+
+
+@contextmanager
+def _locked(state):
+    with open(os.path.join(state, 'lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            return int(f.read() or 0)
+    except OSError:
+        return 0
+
+
+def _write_int(path, value):
+    with open(path, 'w') as f:
+        f.write(str(value))
+
+
+def _enter(state, argv):
+    with _locked(state):
+        with open(os.path.join(state, 'calls.jsonl'), 'a') as f:
+            f.write(json.dumps(argv) + '\n')
+        running = _read_int(os.path.join(state, 'running')) + 1
+        _write_int(os.path.join(state, 'running'), running)
+        _write_int(os.path.join(state, 'peak'), max(running, _read_int(os.path.join(state, 'peak'))))
+
+
+def _leave(state):
+    with _locked(state):
+        _write_int(os.path.join(state, 'running'), _read_int(os.path.join(state, 'running')) - 1)
+
+
+def _info(video_id):
+    return {
+        'id': video_id,
+        'title': f'Video {video_id}',
+        'ext': 'mp4',
+        'webpage_url': f'https://www.youtube.com/watch?v={video_id}',
+        'license': STANDARD_LICENSE if video_id.startswith('nc') else CC_LICENSE,
+        'view_count': sum(map(ord, video_id)),
+    }
+
+
+def main(argv):
+    state = os.environ['FAKE_YTDLP_STATE']
+    _enter(state, argv)
+    try:
+        time.sleep(float(os.environ.get('FAKE_YTDLP_DELAY', '0.2')))
+        print('[youtube] Extracting URL')  # progress noise the caller has to skip
+        if '--load-info-json' in argv:
+            with open(argv[argv.index('--load-info-json') + 1]) as f:
+                info = json.load(f)
+            path = argv[argv.index('-o') + 1].replace('%(id)s', info['id']).replace('%(ext)s', info['ext'])
+            with open(path, 'w') as f:
+                f.write(f'fake video {info["id"]}\n')  # distinct content per id
+            print(f'[download] Destination: {path}')
+            print(path)
+            return 0
+        target = argv[0]
+        if target.startswith('ytsearch'):
+            count = int(target[len('ytsearch'):].split(':', 1)[0] or 1)
+            for i in range(count):
+                print(json.dumps(_info(f'search{i:04d}' if i % 2 == 0 else f'ncsearch{i:04d}')))
+            return 0
+        video_id = (parse_qs(urlparse(target).query).get('v') or [''])[0]
+        if not video_id:
+            print(f'ERROR: Unsupported URL: {target}', file=sys.stderr)
+            return 1
+        print(json.dumps(_info(video_id)))
+        return 0
+    finally:
+        _leave(state)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from src.ingest import async_ingest
+from src.ingest.async_ingest import AsyncIngest, YTDLP_ENV, ingest_urls
+
+FAKE_YTDLP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_yt_dlp.py')
+
+
+def _url(video_id):
+    return f'https://www.youtube.com/watch?v={video_id}'
+
+
+@pytest.fixture
+def ytdlp(tmp_path, monkeypatch):
+    """Fake yt-dlp on $YTDLP_BIN; returns its call log reader."""
+    state = tmp_path / 'ytdlp'
+    state.mkdir()
+    monkeypatch.setenv(YTDLP_ENV, FAKE_YTDLP)
+    monkeypatch.setenv('FAKE_YTDLP_STATE', str(state))
+
+    class Calls:
+        def all(self):
+            path = state / 'calls.jsonl'
+            return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+        def dump_json(self):
+            return [c for c in self.all() if '--dump-json' in c]
+
+        def downloads(self):
+            return [c for c in self.all() if '--load-info-json' in c]
+
+        def peak(self):
+            return int((state / 'peak').read_text())
+    return Calls()
+
+
+def test_concurrency_cap(ytdlp, tmp_path):
+    ids = [f'vid{i:05d}' for i in range(6)]
+    results = ingest_urls([_url(v) for v in ids], str(tmp_path / 'raw'), concurrency=2)
+    assert all(r.path for r in results), [r.error for r in results]
+    assert len(ytdlp.all()) == 12
+    assert ytdlp.peak() == 2
+
+
+def test_one_metadata_call_per_url(ytdlp, tmp_path):
+    ids = [f'vid{i:05d}' for i in range(3)]
+    ingest_urls([_url(v) for v in ids], str(tmp_path / 'raw'), concurrency=3)
+    assert sorted(c[0] for c in ytdlp.dump_json()) == sorted(_url(v) for v in ids)
+    assert len(ytdlp.downloads()) == 3
+
+
+def test_stored_video_is_not_fetched_again(ytdlp, tmp_path):
+    raw = str(tmp_path / 'raw')
+    first, = ingest_urls([_url('vid00001')], raw)
+    again, = ingest_urls([_url('vid00001')], raw)
+    assert again.cached and again.path == first.path
+    assert len(ytdlp.all()) == 2
+
+
+def test_non_cc_video_is_rejected_without_download(ytdlp, tmp_path):
+    res, = ingest_urls([_url('ncvideo01')], str(tmp_path / 'raw'))
+    assert res.path is None
+    assert 'not Creative Commons' in res.error
+    assert ytdlp.downloads() == []
+
+
+def test_download_path_is_the_after_move_filepath(ytdlp, tmp_path):
+    raw = tmp_path / 'raw'
+    res, = ingest_urls([_url('vid00042')], str(raw))
+    assert res.path == str(raw / 'vid00042.mp4')
+    with open(res.path) as f:
+        assert f.read() == 'fake video vid00042\n'
+    call, = ytdlp.downloads()
+    assert call[call.index('--print') + 1] == 'after_move:filepath'
+
+
+def test_search_cc_picks_the_most_viewed_cc_result(ytdlp, tmp_path):
+    info = asyncio.run(AsyncIngest(str(tmp_path / 'raw')).search_cc('query', limit=4))
+    assert info['id'] == 'search0002'  # results 1 and 3 are not CC
+    assert async_ingest.is_creative_commons(info['license'])
+    assert len(ytdlp.all()) == 1
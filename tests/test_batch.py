@@ -0,0 +1,83 @@
+import contextlib
+import dataclasses
+import os
+
+import pytest
+
+pytest.importorskip('librosa')
+pytest.importorskip('cv2')
+
+from src import batch
+from src.analysis.transcribe import LazyTranscript
+from src.pipeline import load_config
+
+CONFIG = os.path.join(os.path.dirname(__file__), '..', 'configs', 'pipeline.yaml')
+
+
+class _Slot:
+    """Semaphore stand-in that records whether it is held."""
+
+    def __init__(self):
+        self.held = 0
+
+    def __enter__(self):
+        self.held += 1
+
+    def __exit__(self, *exc):
+        self.held -= 1
+
+
+@pytest.fixture
+def stages(monkeypatch, tmp_path):
+    """Replace the pipeline stages batch.process calls; tests override the ones they exercise."""
+    slots = {}
+    monkeypatch.setattr(batch.threading, 'BoundedSemaphore', lambda n: slots.setdefault(len(slots), _Slot()))
+    monkeypatch.setattr(batch, 'resolve_input', lambda src: src)
+    monkeypatch.setattr(batch, 'analysis_input', lambda src, conf, cache: src)
+    monkeypatch.setattr(batch, 'analyze_source', lambda *a: 'analysis')
+    monkeypatch.setattr(batch, 'source_transcript', lambda *a: None)
+    monkeypatch.setattr(batch, 'plan_clips', lambda *a: [(0.0, 10.0, '_1')])
+    monkeypatch.setattr(batch, 'source_keyframes', lambda *a: None)
+    monkeypatch.setattr(batch, 'render_clips', lambda path, jobs, *a: [f'{path}{tag}.mp4' for _, _, tag in jobs])
+    monkeypatch.setattr(batch, 'open_run', lambda *a, **kw: type('Run', (contextlib.nullcontext,), {
+        'work_dir': str(tmp_path), 'out_dir': str(tmp_path),
+    })())
+    conf = dataclasses.replace(load_config(CONFIG, 'tiktok'), ffmpeg_threads=1, cache_enabled=False)
+    defaults = {k: None for k in batch.ITEM_OPTIONS}
+
+    def run(*sources):
+        return batch.run_batch([batch.BatchItem(s) for s in sources], conf, defaults, workers={'render': 1})
+    # slots are created in batch.STAGES order
+    run.slot = lambda name: slots[batch.STAGES.index(name)]
+    return run
+
+
+def test_plan_failure_is_attributed_to_plan(stages, monkeypatch):
+    def plan(*a):
+        raise ValueError('no windows')
+    monkeypatch.setattr(batch, 'plan_clips', plan)
+    res, = stages('a.mp4')
+    assert res.status == 'failed'
+    assert res.failed_stage == 'plan'
+    assert res.error == 'ValueError: no windows'
+
+
+def test_keyframe_failure_is_attributed_to_keyframes(stages, monkeypatch):
+    def probe(*a):
+        raise OSError('ffprobe')
+    monkeypatch.setattr(batch, 'source_keyframes', probe)
+    res, = stages('a.mp4')
+    assert res.failed_stage == 'keyframes'
+
+
+def test_lazy_transcript_plans_inside_the_transcription_slot(stages, monkeypatch):
+    lazy = LazyTranscript('a.mp4')
+    held = []
+    monkeypatch.setattr(batch, 'source_transcript', lambda *a: lazy)
+    monkeypatch.setattr(batch, 'plan_clips', lambda *a: held.append(stages.slot('transcription').held) or [(0.0, 5.0, '_1')])
+    monkeypatch.setattr(batch, 'prefetch_transcript', lambda t, jobs, *a: held.append(stages.slot('transcription').held))
+    res, = stages('a.mp4')
+    assert res.status == 'done', res.error
+    assert held == [1, 1]
+    assert res.outputs == ['a.mp4_1.mp4']
+    assert set(res.stage_sec) >= {'analysis', 'transcription', 'plan', 'keyframes', 'render'}
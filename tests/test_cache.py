@@ -0,0 +1,72 @@
+import os
+
+from src.analysis.cache import AnalysisCache
+
+
+def _source(tmp_path, name='a.mp4', data=b'video'):
+    p = tmp_path / name
+    p.write_bytes(data)
+    return str(p)
+
+
+def _entries(root):
+    return sorted(f for _d, _s, files in os.walk(root) for f in files if f.endswith('.bin'))
+
+
+def test_fetch_computes_once_per_content_and_params(tmp_path):
+    src = _source(tmp_path)
+    root = str(tmp_path / 'cache')
+    calls = []
+    compute = lambda: calls.append(1) or {'frames': len(calls)}
+    assert AnalysisCache(root).fetch(src, 'timeline', compute, hop=0.5) == {'frames': 1}
+    assert AnalysisCache(root).fetch(src, 'timeline', compute, hop=0.5) == {'frames': 1}
+    assert AnalysisCache(root).fetch(src, 'timeline', compute, hop=0.25) == {'frames': 2}
+    # a copy with the same content shares entries; changed content does not
+    assert AnalysisCache(root).fetch(_source(tmp_path, 'copy.mp4'), 'timeline', compute, hop=0.5) == {'frames': 1}
+    assert AnalysisCache(root).fetch(_source(tmp_path, data=b'other'), 'timeline', compute, hop=0.5) == {'frames': 3}
+
+
+def test_none_results_are_not_cached(tmp_path):
+    src = _source(tmp_path)
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    calls = []
+    for _ in range(2):
+        cache.fetch(src, 'transcript', lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_disabled_cache_always_computes(tmp_path):
+    src = _source(tmp_path)
+    cache = AnalysisCache(str(tmp_path / 'cache'), enabled=False)
+    calls = []
+    for _ in range(2):
+        cache.fetch(src, 'probe', lambda: calls.append(1) or 1.0)
+    assert len(calls) == 2
+    cache.put('k' * 40, 'value')
+    assert cache.get('k' * 40) is None
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    root = str(tmp_path / 'cache')
+    cache = AnalysisCache(root, max_bytes=10 ** 9)
+    keys = [f'{i:02d}' + 'k' * 38 for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, os.urandom(1000))  # incompressible: ~1 KB per entry
+        os.utime(cache._entry_path(key), (1000 + i, 1000 + i))
+    assert cache.get(keys[0]) is not None  # a hit makes entry 0 the most recent
+    size = os.path.getsize(cache._entry_path(keys[1]))
+    cache.max_bytes = 3 * size + size // 2
+    cache.put('99' + 'k' * 38, os.urandom(1000))
+    assert cache.get(keys[1]) is None and cache.get(keys[2]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[3]) is not None
+    assert len(_entries(root)) == 3
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    key = 'ab' + 'c' * 38
+    cache.put(key, [1, 2, 3])
+    with open(cache._entry_path(key), 'wb') as f:
+        f.write(b'not zlib')
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._entry_path(key))
@@ -0,0 +1,192 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('librosa')
+pytest.importorskip('cv2')
+
+from src.analysis import engagement, stream
+from src.analysis.engagement import (
+    AUDIO_WEIGHT, MOTION_WEIGHT, FeatureTimeline, _bin_diffs, best_window, feature_timeline, frame_diffs, hop_for_stride, score_timeline, search_timeline,
+    select_non_overlapping, top_windows_multi,
+)
+
+
+def synthetic_timeline(n, hop=0.5, seed=0, burst=None):
+    """Random per-hop sums; burst=(first hop, last hop) makes that span loud and busy."""
+    rng = np.random.default_rng(seed)
+    samples = np.full(n, 8000.0 * hop)
+    energy = rng.uniform(0.5, 1.5, n) * samples * 0.01
+    frames = np.full(n, 15.0)
+    motion = rng.uniform(1.0, 3.0, n) * frames
+    if burst is not None:
+        energy[burst[0]:burst[1]] *= 20
+        motion[burst[0]:burst[1]] *= 5
+    return FeatureTimeline(hop_sec=hop, energy=energy, samples=samples, motion=motion, frames=frames)
+
+
+def naive_scores(tl, window_sec, stride_sec):
+    """Per-window sums straight from the hop arrays, z-scored like score_timeline."""
+    w = int(round(window_sec / tl.hop_sec))
+    step = int(round(stride_sec / tl.hop_sec))
+    rms, motion = [], []
+    for a in range(0, max(0, len(tl) - w) + 1, step):
+        b = min(a + w, len(tl))
+        rms.append(np.sqrt(tl.energy[a:b].sum() / max(tl.samples[a:b].sum(), 1.0)))
+        motion.append(tl.motion[a:b].sum() / max(tl.frames[a:b].sum(), 1.0))
+    rms, motion = np.array(rms), np.array(motion)
+    z = lambda x: (x - x.mean()) / (x.std() + 1e-6)
+    return AUDIO_WEIGHT * z(rms) + MOTION_WEIGHT * z(motion)
+
+
+@pytest.mark.parametrize('window_sec, stride_sec', [(2.0, 0.5), (10.0, 1.0), (30.0, 3.0), (7.5, 2.5)])
+def test_prefix_sum_scores_match_per_window_sums(window_sec, stride_sec):
+    tl = synthetic_timeline(400, hop=hop_for_stride(stride_sec), seed=int(window_sec))
+    scores, stride = score_timeline(tl, window_sec, stride_sec)
+    assert stride == pytest.approx(stride_sec)
+    np.testing.assert_allclose(scores, naive_scores(tl, window_sec, stride_sec), rtol=1e-9, atol=1e-9)
+
+
+def test_window_longer_than_the_source_scores_one_window():
+    tl = synthetic_timeline(10)
+    scores, _ = score_timeline(tl, 60.0, 1.0)
+    assert len(scores) == 1
+
+
+def test_empty_timeline():
+    empty = FeatureTimeline(0.5, *(np.zeros(0) for _ in range(4)))
+    scores, stride = score_timeline(empty, 10.0, 1.0)
+    assert scores.tolist() == [0.0] and stride == 1.0
+
+
+def test_hop_divides_stride():
+    assert hop_for_stride(1.0) == 0.5
+    assert hop_for_stride(0.25) == 0.25
+    assert hop_for_stride(3.0) == 0.5
+    assert hop_for_stride(0.75) == 0.375
+
+
+def test_every_duration_is_scored_from_one_timeline():
+    # hops 200-239 (100-120 s) are the burst: each duration's best window sits on it
+    tl = synthetic_timeline(600, burst=(200, 240))
+    clips = top_windows_multi('unused.mp4', [10.0, 20.0], stride_sec=1.0, max_clips=1, timeline=tl)
+    (start, dur, _score), = clips
+    assert 100.0 <= start and start + dur <= 120.0
+
+
+def naive_nms(starts, ends, scores, max_clips, min_gap_sec):
+    chosen = []
+    for i in sorted(range(len(scores)), key=lambda i: -scores[i]):  # sorted() is stable: ties keep order
+        if len(chosen) >= max_clips:
+            break
+        if all(ends[i] + min_gap_sec <= starts[j] or ends[j] + min_gap_sec <= starts[i] for j in chosen):
+            chosen.append(i)
+    return chosen
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_nms_matches_greedy_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 3000))  # past the first 256-candidate screening chunk
+    starts = np.round(rng.uniform(0, 3600, n), 1)
+    ends = starts + rng.choice([10.0, 20.0, 30.0, 60.0], n)
+    scores = np.round(rng.normal(size=n), 1)  # coarse values: plenty of ties
+    max_clips = int(rng.integers(1, 40))
+    got = select_non_overlapping(starts, ends, scores, max_clips, min_gap_sec=1.0)
+    assert got.tolist() == naive_nms(starts, ends, scores, max_clips, 1.0)
+
+
+def test_nms_gap_boundary_and_ties():
+    starts = np.array([0.0, 11.0, 10.5, 30.0])
+    ends = starts + 10.0
+    # span 1 starts exactly min_gap after span 0 ends; span 2 is 0.5 s short of the gap
+    assert select_non_overlapping(starts, ends, np.array([3.0, 2.0, 2.5, 1.0]), 4, 1.0).tolist() == [0, 1, 3]
+    # equal scores: earlier input wins
+    assert select_non_overlapping(starts, ends, np.ones(4), 4, 1.0).tolist() == [0, 1, 3]
+    assert select_non_overlapping(starts, ends, np.ones(4), 2, 1.0).tolist() == [0, 1]
+    assert select_non_overlapping(starts[:0], ends[:0], np.ones(0), 3, 1.0).tolist() == []
+
+
+def test_coarse_factor_one_is_the_exhaustive_scan():
+    tl = synthetic_timeline(500, seed=3)
+    idx, scores, stride = search_timeline(tl, 30.0, 1.0, coarse_factor=1)
+    exhaustive, _ = score_timeline(tl, 30.0, 1.0)
+    assert idx.tolist() == list(range(len(exhaustive)))
+    np.testing.assert_array_equal(scores, exhaustive)
+    assert best_window('unused.mp4', 30.0, 1.0, timeline=tl) == (float(np.argmax(exhaustive)), float(exhaustive.max()))
+
+
+@pytest.mark.parametrize('burst_start', [123, 400, 777, 1500])
+def test_coarse_search_finds_a_clear_peak(burst_start):
+    # one 30 s burst in 20 minutes: the coarse pass must land next to it and the refinement on it
+    tl = synthetic_timeline(2400, seed=burst_start, burst=(burst_start, burst_start + 60))
+    exhaustive, _ = score_timeline(tl, 30.0, 1.0)
+    idx, scores, _ = search_timeline(tl, 30.0, 1.0, coarse_factor=8)
+    assert len(idx) < len(exhaustive) / 2  # most windows are never scored
+    assert int(idx[np.argmax(scores)]) == int(np.argmax(exhaustive))
+
+
+@pytest.mark.parametrize('hop_sec, block_sec', [(0.5, 0.37), (0.25, 1.0), (0.1, 0.013)])
+def test_streaming_timeline_matches_in_memory(monkeypatch, hop_sec, block_sec):
+    sr = 8000
+    rng = np.random.default_rng(5)
+    pcm = rng.normal(0, 0.05, (sr * 40 + 321, 2)).astype(np.float32)
+    pcm[sr * 17:sr * 23] *= 8  # one loud stretch, so the best window is well defined
+    block = max(1, int(block_sec * sr))
+    cuts = np.cumsum([block + i % 7 for i in range(len(pcm) // block)])  # uneven block sizes
+    monkeypatch.setattr(stream, 'probe_audio', lambda path: (sr, 2))
+    monkeypatch.setattr(
+        stream, 'iter_pcm_blocks',
+        lambda path, sr, channels, block_sec: iter(np.split(pcm, cuts[cuts < len(pcm)])),
+    )
+    # librosa.load(mono=True) averages channels in float32
+    monkeypatch.setattr(engagement.librosa, 'load', lambda path, sr, mono: (pcm.mean(axis=1), 8000), raising=False)
+    motion = (np.full(int(40 / hop_sec) + 1, 2.0), np.full(int(40 / hop_sec) + 1, 1.0))
+    monkeypatch.setattr(engagement, '_motion_hops', lambda path, hop: motion)
+
+    loaded = feature_timeline('src.mp4', hop_sec=hop_sec)
+    streamed = feature_timeline('src.mp4', hop_sec=hop_sec, streaming=True, block_sec=block_sec)
+    np.testing.assert_array_equal(streamed.samples, loaded.samples)
+    np.testing.assert_allclose(streamed.energy, loaded.energy, rtol=1e-5)
+    for window_sec, stride_sec in [(5.0, 0.5), (10.0, 1.0)]:
+        a, _ = score_timeline(loaded, window_sec, stride_sec)
+        b, _ = score_timeline(streamed, window_sec, stride_sec)
+        assert int(np.argmax(a)) == int(np.argmax(b))
+
+
+@pytest.mark.parametrize('block_sizes', [[37], [1] * 37, [5, 1, 16, 15], [36, 1], [1, 36]])
+def test_frame_diffs_across_blocks_match_one_block(block_sizes):
+    frames = np.random.default_rng(7).integers(0, 256, (37, 160 * 90), dtype=np.uint8)
+    whole, last = frame_diffs(frames, None)
+    expected = np.abs(frames[1:].astype(np.int16) - frames[:-1]).mean(axis=1)
+    np.testing.assert_allclose(whole, expected)
+    assert len(whole) == 36 and np.array_equal(last, frames[-1])
+
+    parts, prev = [], None
+    for block in np.split(frames, np.cumsum(block_sizes)[:-1]):
+        diffs, prev = frame_diffs(block, prev)
+        parts.append(diffs)
+    np.testing.assert_allclose(np.concatenate(parts), whole)
+
+
+def test_frame_diffs_of_a_single_first_frame_is_empty():
+    diffs, prev = frame_diffs(np.full((1, 4), 9, dtype=np.uint8), None)
+    assert len(diffs) == 0 and prev.tolist() == [9, 9, 9, 9]
+    # uint8 frames are differenced without wrap-around
+    diffs, _ = frame_diffs(np.zeros((1, 4), dtype=np.uint8), prev)
+    assert diffs.tolist() == [9.0]
+
+
+def test_bin_diffs_puts_each_diff_at_its_frame_time():
+    # 10 fps, 0.5 s hops: diff i belongs to frame i + 1 at (i + 1) / 10 s
+    diffs = np.arange(1.0, 13.0)
+    motion, frames = _bin_diffs(diffs, 10.0, 0.5)
+    assert frames.tolist() == [4.0, 5.0, 3.0]
+    assert motion.tolist() == [1 + 2 + 3 + 4, 5 + 6 + 7 + 8 + 9, 10 + 11 + 12]
+
+
+def test_bin_diffs_at_a_fractional_rate():
+    diffs = np.ones(60)
+    motion, frames = _bin_diffs(diffs, 29.97, 1.0)
+    times = np.arange(1, 61) / 29.97
+    assert frames.tolist() == np.bincount((times / 1.0).astype(int)).tolist() == [29, 30, 1]
+    np.testing.assert_array_equal(motion, frames)
@@ -0,0 +1,110 @@
+import os
+import subprocess
+
+import ffmpeg
+import numpy as np
+import pytest
+
+from src.edit import formatters
+from src.edit.formatters import cut_segment, probe_keyframes, smart_cut
+
+H264 = {'streams': [{'codec_type': 'video', 'codec_name': 'h264', 'pix_fmt': 'yuv420p'}, {'codec_type': 'audio', 'codec_name': 'aac'}]}
+
+
+def _args(args):
+    return {k: args[i + 1] for i, k in enumerate(args[:-1]) if k in ('-ss', '-t', '-c:v', '-vcodec', '-f')}
+
+
+@pytest.fixture
+def ffmpeg_calls(monkeypatch):
+    """Record (stage, args) of every run_ffmpeg call; the concat list is read before it is removed."""
+    calls = []
+
+    def fake_run(stream, stage):
+        args = stream.get_args()
+        listing = None
+        if stage == 'smart_cut_mux':
+            with open(args[args.index('-i') + 1]) as f:
+                listing = [os.path.basename(line.strip().strip("'").split("'")[-1]) for line in f]
+        calls.append((stage, args, listing))
+
+    monkeypatch.setattr(formatters, 'run_ffmpeg', fake_run)
+    return calls
+
+
+@pytest.fixture
+def accurate_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(formatters, 'cut_accurate', lambda *a, **kw: calls.append(a))
+    return calls
+
+
+def test_probe_keyframes_parses_flags_and_subtracts_start_time(monkeypatch):
+    csv = '\n'.join([
+        '1.400000,K__', '1.433333,___', '3.400000,K_', '2.400000,K__',  # out of order
+        'N/A,K__', ',K_', '3.400000,K__',  # missing pts, duplicate
+        '4.400000,__D', '',
+    ])
+    seen = {}
+
+    def fake_run(cmd, **kw):
+        seen['cmd'] = cmd
+        return subprocess.CompletedProcess(cmd, 0, stdout=csv, stderr='')
+
+    monkeypatch.setattr(formatters.subprocess, 'run', fake_run)
+    monkeypatch.setattr(ffmpeg, 'probe', lambda path: {'format': {'start_time': '1.400000'}})
+    kf = probe_keyframes('src.mp4')
+    np.testing.assert_allclose(kf, [0.0, 1.0, 2.0])
+    assert seen['cmd'][0] == 'ffprobe' and seen['cmd'][-1] == 'src.mp4'
+
+
+def test_probe_keyframes_without_start_time(monkeypatch):
+    monkeypatch.setattr(formatters.subprocess, 'run', lambda cmd, **kw: subprocess.CompletedProcess(cmd, 0, stdout='0.0,K_\n2.0,K_\n', stderr=''))
+    monkeypatch.setattr(ffmpeg, 'probe', lambda path: {'format': {}})
+    assert probe_keyframes('src.mp4').tolist() == [0.0, 2.0]
+
+
+def test_smart_cut_reencodes_up_to_the_first_keyframe_at_or_after_start(monkeypatch, ffmpeg_calls, accurate_calls):
+    monkeypatch.setattr(ffmpeg, 'probe', lambda path: H264)
+    smart_cut('src.mp4', 'out.mp4', 3.0, 10.0, keyframes=np.array([0.0, 2.0, 4.0, 6.0]))
+    assert not accurate_calls
+    assert [c[0] for c in ffmpeg_calls] == ['smart_cut_head', 'smart_cut_copy', 'smart_cut_mux']
+    head, body, mux = ffmpeg_calls
+    assert _args(head[1]) == {'-ss': '3.0', '-t': '1.0', '-vcodec': 'libx264'}
+    assert _args(body[1]) == {'-ss': '4.0', '-t': '9.0', '-vcodec': 'copy'}
+    assert mux[2] == ['head.ts', 'body.ts']
+    # audio is re-encoded from exactly start
+    assert '-ss' in mux[1] and mux[1][mux[1].index('-ss') + 1] == '3.0'
+
+
+def test_smart_cut_on_a_keyframe_only_copies(monkeypatch, ffmpeg_calls, accurate_calls):
+    monkeypatch.setattr(ffmpeg, 'probe', lambda path: H264)
+    smart_cut('src.mp4', 'out.mp4', 4.0005, 5.0, keyframes=np.array([0.0, 2.0, 4.0, 6.0]))
+    assert [c[0] for c in ffmpeg_calls] == ['smart_cut_copy', 'smart_cut_mux']
+    assert _args(ffmpeg_calls[0][1])['-ss'] == '4.0'
+    assert ffmpeg_calls[1][2] == ['body.ts']
+
+
+@pytest.mark.parametrize('start, duration', [(4.5, 1.0), (6.5, 3.0), (3.0, 0.9995)])
+def test_smart_cut_without_a_keyframe_inside_the_clip_falls_back(monkeypatch, ffmpeg_calls, accurate_calls, start, duration):
+    monkeypatch.setattr(ffmpeg, 'probe', lambda path: H264)
+    smart_cut('src.mp4', 'out.mp4', start, duration, keyframes=np.array([0.0, 2.0, 4.0, 6.0]))
+    assert not ffmpeg_calls
+    assert accurate_calls == [('src.mp4', 'out.mp4', start, duration, None)]
+
+
+def test_smart_cut_without_a_matching_encoder_falls_back(monkeypatch, ffmpeg_calls, accurate_calls):
+    monkeypatch.setattr(ffmpeg, 'probe', lambda path: {'streams': [{'codec_type': 'video', 'codec_name': 'vp9'}]})
+    monkeypatch.setattr(formatters, 'probe_keyframes', lambda path: pytest.fail('keyframes probed for an unsupported codec'))
+    smart_cut('src.webm', 'out.mp4', 1.0, 5.0, threads=2)
+    assert not ffmpeg_calls
+    assert accurate_calls == [('src.webm', 'out.mp4', 1.0, 5.0, 2)]
+
+
+def test_cut_segment_probes_keyframes_for_smart_mode(monkeypatch, ffmpeg_calls, accurate_calls):
+    monkeypatch.setattr(ffmpeg, 'probe', lambda path: H264)
+    monkeypatch.setattr(formatters, 'probe_keyframes', lambda path: np.array([0.0, 5.0]))
+    cut_segment('src.mp4', 'out.mp4', 1.0, 10.0, mode='smart')
+    assert [c[0] for c in ffmpeg_calls] == ['smart_cut_head', 'smart_cut_copy', 'smart_cut_mux']
+    with pytest.raises(ValueError):
+        cut_segment('src.mp4', 'out.mp4', 1.0, 10.0, mode='fast')
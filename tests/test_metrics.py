@@ -0,0 +1,128 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ffmpeg
+import pytest
+
+from src.metrics import _thread_io, parse_ffmpeg_stats, recording, run_ffmpeg, stage, submit_in_context
+
+X264_STDERR = (
+    "Input #0, lavfi, from 'testsrc=size=1280x720:rate=30':\n"
+    "  Duration: N/A, start: 0.000000, bitrate: N/A\n"
+    "Stream mapping:\n  Stream #0:0 -> #0:0 (rawvideo (native) -> h264 (libx264))\n"
+    "frame=   48 fps=0.0 q=28.0 size=       0kB time=00:00:01.53 bitrate=   0.3kbits/s speed=3.05x    \r"
+    "frame=  300 fps=220 q=-1.0 Lsize=     231kB time=00:00:09.93 bitrate= 190.5kbits/s speed=7.29x    \n"
+    "video:228kB audio:0kB subtitle:0kB other streams:0kB global headers:0kB muxing overhead: 1.2%\n"
+    "[libx264 @ 0x55d0c8a3e2c0] frame I:2     Avg QP:19.31  size: 21312\n"
+)
+
+
+def test_last_progress_line_of_an_encode():
+    assert parse_ffmpeg_stats(X264_STDERR) == {
+        'frames': 300, 'fps': 220.0, 'size_kb': 231, 'out_time_sec': 9.93, 'speed': 7.29,
+    }
+
+
+def test_audio_only_and_newer_units():
+    err = 'size=     157KiB time=01:02:03.50 bitrate= 128.6kbits/s speed= 120x elapsed=0:00:31.00    \n'
+    assert parse_ffmpeg_stats(err) == {'size_kb': 157, 'out_time_sec': 3723.5, 'speed': 120.0}
+
+
+def test_missing_values_are_left_out():
+    err = 'frame=    0 fps=0.0 q=0.0 size=N/A time=N/A bitrate=N/A speed=N/A    \r'
+    assert parse_ffmpeg_stats(err) == {'frames': 0, 'fps': 0.0}
+    assert parse_ffmpeg_stats('') == {}
+    assert parse_ffmpeg_stats('ffmpeg version 6.1\nError opening input file x.mp4.\n') == {}
+
+
+class _FakeSpec:
+    """Stands in for an ffmpeg-python graph: a Python child that prints canned ffmpeg stderr."""
+
+    def __init__(self, code=0, busy_sec=0.0):
+        self.script = (
+            'import sys, time\n'
+            f't = time.process_time() + {busy_sec}\n'
+            'while time.process_time() < t: pass\n'
+            f'sys.stderr.write({X264_STDERR!r}); sys.exit({code})\n'
+        )
+
+    def run_async(self, pipe_stdout, pipe_stderr):
+        return subprocess.Popen([sys.executable, '-c', self.script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def test_run_ffmpeg_attaches_stats_to_the_current_stage():
+    events = []
+    with recording(on_event=events.append) as rec:
+        with stage('render', clips=1):
+            with stage('vertical'):
+                run_ffmpeg(_FakeSpec(), 'to_vertical')
+    report = json.loads(json.dumps(rec.to_dict()))
+    render, = (s for s in report['stages'] if s['name'] == 'render')
+    vertical, = (s for s in report['stages'] if s['name'] == 'vertical')
+    assert vertical['parent'] == 'render' and render['parent'] is None
+    (stats,) = vertical['ffmpeg']
+    assert stats['label'] == 'to_vertical' and stats['frames'] == 300 and stats['speed'] == 7.29
+    assert [e['event'] for e in events] == ['stage_start', 'stage_start', 'ffmpeg', 'stage_end', 'stage_end']
+    assert events[0]['clips'] == 1
+
+
+def test_run_ffmpeg_without_a_recorder_just_runs():
+    assert run_ffmpeg(_FakeSpec())[1].startswith(b'Input #0')
+
+
+def test_failed_ffmpeg_raises_with_its_stderr():
+    with pytest.raises(ffmpeg.Error) as e:
+        run_ffmpeg(_FakeSpec(code=1))
+    assert e.value.stderr.startswith(b'Input #0')
+
+
+def test_concurrent_stages_do_not_count_each_other():
+    def busy():
+        with stage('busy'):
+            run_ffmpeg(_FakeSpec(busy_sec=0.3), 'busy')
+
+    def idle():
+        with stage('idle'):
+            time.sleep(0.5)
+
+    with recording() as rec:
+        with stage('render'):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                for f in [submit_in_context(pool, idle), submit_in_context(pool, busy)]:
+                    f.result()
+    stages = {s['name']: s for s in rec.to_dict()['stages']}
+    assert stages['busy']['child_cpu_sec'] >= 0.25 and stages['busy']['cpu_sec'] >= stages['busy']['child_cpu_sec']
+    assert stages['idle']['child_cpu_sec'] == 0.0 and stages['idle']['cpu_sec'] < 0.1
+    # a child run in a sub-stage on another thread still counts for the enclosing stage
+    assert stages['render']['child_cpu_sec'] == stages['busy']['child_cpu_sec']
+    assert stages['busy']['child_peak_rss_mb'] > 0
+
+
+@pytest.mark.skipif(_thread_io() == (0, 0), reason='no per-task /proc io')
+def test_stage_io_is_per_thread(tmp_path):
+    started = threading.Barrier(2)
+
+    def writer():
+        with stage('writer'):
+            started.wait(timeout=5)
+            with open(tmp_path / 'big.bin', 'wb') as f:
+                for _ in range(16):
+                    f.write(b'x' * 65536)
+            started.wait(timeout=5)
+
+    def waiter():
+        with stage('waiter'):
+            started.wait(timeout=5)
+            started.wait(timeout=5)
+
+    with recording() as rec:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for f in [submit_in_context(pool, writer), submit_in_context(pool, waiter)]:
+                f.result()
+    stages = {s['name']: s for s in rec.to_dict()['stages']}
+    assert stages['writer']['write_bytes'] >= 16 * 65536
+    assert stages['waiter']['write_bytes'] < 65536
@@ -0,0 +1,117 @@
+import dataclasses
+import os
+
+import pytest
+
+pytest.importorskip('librosa')
+pytest.importorskip('cv2')
+
+from src import pipeline
+from src.analysis import cache as cache_mod
+from src.analysis.cache import AnalysisCache
+from src.runs import RunDir
+
+CONFIG = os.path.join(os.path.dirname(__file__), '..', 'configs', 'pipeline.yaml')
+
+
+def test_digest_is_memoised_with_the_cache_disabled(tmp_path, monkeypatch):
+    src = tmp_path / 'a.mp4'
+    src.write_bytes(b'video' * 1000)
+    hashed = []
+    real = cache_mod.file_digest
+    monkeypatch.setattr(cache_mod, 'file_digest', lambda p: hashed.append(p) or real(p))
+    root = str(tmp_path / 'cache')
+    first = AnalysisCache(root, enabled=False).digest(str(src))
+    assert AnalysisCache(root, enabled=False).digest(str(src)) == first
+    assert len(hashed) == 1
+    src.write_bytes(b'other' * 1000)  # new size/mtime: hashed again
+    assert AnalysisCache(root, enabled=False).digest(str(src)) != first
+    assert len(hashed) == 2
+
+
+@pytest.fixture
+def profiles_conf():
+    conf = pipeline.load_config(CONFIG, 'tiktok', profiles=['square', 'shorts'])
+    return dataclasses.replace(conf, subs_enabled=False)
+
+
+@pytest.fixture
+def fake_render(monkeypatch):
+    calls = {'cut': 0, 'canvases': []}
+
+    def cut_segment(src, dst, **kw):
+        calls['cut'] += 1
+        with open(dst, 'w') as f:
+            f.write('segment')
+
+    def render_canvases(src, outputs, **kw):
+        calls['canvases'].append([os.path.basename(o.path) for o in outputs])
+        for o in outputs:
+            with open(o.path, 'w') as f:
+                f.write(f'{o.width}x{o.height}')
+
+    monkeypatch.setattr(pipeline, 'cut_segment', cut_segment)
+    monkeypatch.setattr(pipeline, 'render_canvases', render_canvases)
+    return calls
+
+
+def _render(run, conf):
+    return pipeline._render_profiles('a.mp4', 1.0, 5.0, None, conf, '_1', run.work_dir, run.staging_dir, None, None, run)
+
+
+def test_profiles_resume_renders_only_missing_canvases(tmp_path, profiles_conf, fake_render):
+    def open_run():
+        return RunDir(str(tmp_path / 'runs'), str(tmp_path / 'out'), 'a_run')
+
+    with open_run() as run:
+        paths = _render(run, profiles_conf)
+    assert [os.path.basename(p) for p in paths] == ['short_final_1.mp4', 'short_final_1_square.mp4', 'short_final_1_shorts.mp4']
+    assert fake_render['canvases'] == [['short_final_1.mp4', 'short_final_1_square.mp4', 'short_final_1_shorts.mp4']]
+
+    with open_run() as run:
+        assert _render(run, profiles_conf) == paths
+    assert fake_render['cut'] == 1 and len(fake_render['canvases']) == 1
+
+    os.remove(paths[1])
+    with open_run() as run:
+        _render(run, profiles_conf)
+    assert fake_render['cut'] == 1
+    assert fake_render['canvases'][-1] == ['short_final_1_square.mp4']
+
+
+def test_profiles_with_subtitles_use_the_source_transcript(tmp_path, profiles_conf, fake_render, monkeypatch):
+    conf = dataclasses.replace(profiles_conf, subs_enabled=True)
+    words = [{'word': ' hi', 'start': 2.0, 'end': 2.5}, {'word': ' there.', 'start': 2.5, 'end': 3.0}]
+    source = {'text': ' hi there.', 'segments': [{'start': 2.0, 'end': 3.0, 'text': ' hi there.', 'words': words}]}
+    fetched = []
+    monkeypatch.setattr(pipeline, '_transcript', lambda path, model, cache: fetched.append(path) or source)
+    monkeypatch.setattr(pipeline, 'transcribe_with_words', lambda *a, **kw: pytest.fail('segment re-transcribed'))
+    # neither idea-end nor single-pass: the extra profiles alone call for a source transcript
+    transcript = pipeline.source_transcript('a.mp4', conf, AnalysisCache(enabled=False), idea_end=False)
+    assert transcript is source and fetched == ['a.mp4']
+
+    with RunDir(str(tmp_path / 'runs'), str(tmp_path / 'out'), 'a_run') as run:
+        pipeline._render_clip_files('a.mp4', 1.0, 5.0, transcript, conf, '_1', False, run.work_dir, run.staging_dir, None, run)
+    ass = [f for f in os.listdir(run.work_dir) if f.endswith('.ass')]
+    assert sorted(ass) == ['subs_1.ass', 'subs_1_shorts.ass', 'subs_1_square.ass']
+
+
+class _Resolved(Exception):
+    pass
+
+
+@pytest.mark.parametrize('ffmpeg_threads, expected', [(None, None), (3, 3), (0, None)])
+def test_single_clip_applies_ffmpeg_threads(monkeypatch, ffmpeg_threads, expected):
+    seen = {}
+
+    def resolve_input(input_path, query, conf):
+        seen['threads'] = pipeline._ffmpeg_threads(conf)
+        raise _Resolved
+
+    monkeypatch.setattr(pipeline, 'resolve_input', resolve_input)
+    # render.workers in the config must not split the cores for a lone clip
+    real_load = pipeline.load_config
+    monkeypatch.setattr(pipeline, 'load_config', lambda *a: dataclasses.replace(real_load(*a), render_workers=4))
+    with pytest.raises(_Resolved):
+        pipeline.run_pipeline('a.mp4', config_path=CONFIG, ffmpeg_threads=ffmpeg_threads)
+    assert seen['threads'] == expected
@@ -0,0 +1,45 @@
+import os
+import threading
+
+from src.analysis import proxy
+
+
+def test_concurrent_builders_write_distinct_temp_files(tmp_path, monkeypatch):
+    out = str(tmp_path / 'proxies' / 'abc_360p.mkv')
+    temps, barrier = [], threading.Barrier(2)
+
+    def fake_run(stream, stage):
+        tmp = next(a for a in stream.get_args() if a.endswith('.part.mkv'))
+        temps.append(tmp)
+        barrier.wait(timeout=5)  # both builders are mid-encode at once
+        with open(tmp, 'wb') as f:
+            f.write(b'proxy')
+
+    monkeypatch.setattr(proxy, 'run_ffmpeg', fake_run)
+    monkeypatch.setattr(proxy, '_has_audio', lambda path: True)
+    threads = [threading.Thread(target=proxy.make_proxy, args=('src.mp4', out)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(temps)) == 2
+    assert all(os.path.dirname(t) == os.path.dirname(out) and t.endswith('.part.mkv') for t in temps)
+    with open(out, 'rb') as f:
+        assert f.read() == b'proxy'
+    assert os.listdir(os.path.dirname(out)) == ['abc_360p.mkv']
+
+
+def test_failed_encode_leaves_no_temp_file(tmp_path, monkeypatch):
+    out = str(tmp_path / 'abc_360p.mkv')
+
+    def fail(stream, stage):
+        raise RuntimeError('encode failed')
+
+    monkeypatch.setattr(proxy, 'run_ffmpeg', fail)
+    monkeypatch.setattr(proxy, '_has_audio', lambda path: False)
+    try:
+        proxy.make_proxy('src.mp4', out)
+    except RuntimeError:
+        pass
+    assert os.listdir(tmp_path) == []
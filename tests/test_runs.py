@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+from src.runs import MANIFEST_VERSION, RunDir, run_id, run_step
+
+
+@pytest.fixture
+def open_run(tmp_path):
+    def make(rid='clip_abc', resume=True):
+        return RunDir(str(tmp_path / 'runs'), str(tmp_path / 'out'), rid, inputs={'source': 'a.mp4'}, resume=resume)
+    return make
+
+
+def _writer(path, calls, text='x'):
+    def build():
+        calls.append(path)
+        with open(path, 'w') as f:
+            f.write(text)
+        return [path]
+    return build
+
+
+def test_run_id_is_stable_and_keyed_on_content_and_params():
+    rid = run_id('data/raw/My Video!.mp4', 'd1', {'durations': [20]})
+    assert rid == run_id('/elsewhere/My Video!.mp4', 'd1', {'durations': [20]})
+    assert rid.startswith('My_Video__')
+    assert rid != run_id('data/raw/My Video!.mp4', 'd2', {'durations': [20]})
+    assert rid != run_id('data/raw/My Video!.mp4', 'd1', {'durations': [30]})
+
+
+def test_manifest_records_steps(open_run):
+    calls = []
+    with open_run() as run:
+        out = os.path.join(run.work_dir, 'a.txt')
+        assert run.step('a', _writer(out, calls), deps=[1]) == [out]
+    with open(run.manifest_path) as f:
+        manifest = json.load(f)
+    assert manifest['version'] == MANIFEST_VERSION and manifest['id'] == 'clip_abc'
+    assert manifest['inputs'] == {'source': 'a.mp4'}
+    entry = manifest['steps']['a']
+    assert entry['value'] == [out]
+    assert entry['outputs'] == {out: [1, os.stat(out).st_mtime_ns]}
+
+
+def test_resume_skips_done_steps(open_run):
+    calls = []
+    with open_run() as run:
+        out = os.path.join(run.work_dir, 'a.txt')
+        run.step('a', _writer(out, calls), deps=[1])
+    with open_run() as run:
+        assert run.step('a', _writer(out, calls), deps=[1]) == [out]
+        assert run.skipped == ['a']
+    assert calls == [out]
+
+
+@pytest.mark.parametrize('change', ['deps', 'output', 'input', 'no_resume'])
+def test_step_reruns_when_anything_it_depends_on_changes(open_run, change):
+    calls = []
+    with open_run() as run:
+        src = os.path.join(run.work_dir, 'in.txt')
+        out = os.path.join(run.work_dir, 'out.txt')
+        with open(src, 'w') as f:
+            f.write('1')
+        run.step('a', _writer(out, calls), deps=[1], inputs=[src])
+    deps = [1]
+    if change == 'deps':
+        deps = [2]
+    elif change == 'output':
+        with open(out, 'a') as f:
+            f.write('edited')
+    elif change == 'input':
+        with open(src, 'w') as f:
+            f.write('22')
+    with open_run(resume=change != 'no_resume') as run:
+        run.step('a', _writer(out, calls), deps=deps, inputs=[src])
+        assert run.skipped == []
+    assert calls == [out, out]
+
+
+def test_steps_with_explicit_outputs_return_the_recorded_value(open_run):
+    calls = []
+    with open_run() as run:
+        out = os.path.join(run.work_dir, 'a.txt')
+        def build():
+            _writer(out, calls)()
+            return {'frames': 3}
+        assert run.step('a', build, outputs=[out]) == {'frames': 3}
+    with open_run() as run:
+        assert run.step('a', build, outputs=[out]) == {'frames': 3}
+    assert len(calls) == 1
+
+
+def test_publish_moves_staged_files(open_run):
+    with open_run() as run:
+        staged = os.path.join(run.staging_dir, 'short_final_1.mp4')
+        with open(staged, 'w') as f:
+            f.write('clip')
+        published = run.publish([staged])
+    assert published == [os.path.join(run.out_dir, 'short_final_1.mp4')]
+    assert not os.path.exists(staged)
+    with open(published[0]) as f:
+        assert f.read() == 'clip'
+
+
+def test_run_step_without_a_run_just_builds():
+    assert run_step(None, 'a', lambda: 42) == 42
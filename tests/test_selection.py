@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('librosa')
+pytest.importorskip('cv2')
+
+from src.analysis.engagement import FeatureTimeline
+from src.analysis.selection import BoundaryIndex, select_clips
+from src.analysis.semantic import ActivityMap, pick_idea_endpoint
+
+
+def random_source(seed, length=600.0):
+    """Transcript segments (some closing a sentence) and silences over length seconds."""
+    rng = np.random.default_rng(seed)
+    segments, t = [], 0.0
+    while t < length:
+        dur = float(rng.uniform(1.0, 12.0))
+        text = ' words' + str(rng.choice(['.', '!', '?', ',', '']))
+        segments.append({'start': t, 'end': t + dur, 'text': text})
+        t += dur + float(rng.uniform(0.0, 2.0))
+    starts = np.sort(rng.uniform(0, length, 40))
+    silences = [(s, s + float(rng.uniform(0.4, 3.0))) for s in starts]
+    return {'segments': segments}, ActivityMap(silences)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_ends_match_pick_idea_endpoint(seed):
+    transcript, silences = random_source(seed)
+    index = BoundaryIndex(transcript, silences)
+    starts = np.random.default_rng(seed).uniform(0, 550, 50)
+    expected = [pick_idea_endpoint(transcript, silences, s, min_dur=20.0, max_dur=60.0) for s in starts]
+    np.testing.assert_allclose(index.ends_for(starts, 20.0, 60.0), expected)
+
+
+def test_end_preference():
+    transcript = {'segments': [
+        {'start': 0.0, 'end': 25.0, 'text': 'no full stop'},
+        {'start': 25.0, 'end': 31.0, 'text': 'done.'},
+    ]}
+    # sentence end (31) before the silence (35)
+    assert BoundaryIndex(transcript, [(35.0, 36.0)]).end_for(0.0, 20.0, 60.0) == 31.0
+    # silence (28) before the sentence end
+    assert BoundaryIndex(transcript, [(28.0, 29.0)]).end_for(0.0, 20.0, 60.0) == 28.0
+    # no sentence end in range: first segment end
+    assert BoundaryIndex(transcript).end_for(0.0, 20.0, 30.0) == 25.0
+    # nothing in range: max_dur
+    assert BoundaryIndex().end_for(10.0, 20.0, 30.0) == 40.0
+
+
+def test_starts_are_sentence_starts_and_silence_ends():
+    transcript = {'segments': [
+        {'start': 1.0, 'end': 4.0, 'text': 'One.'},
+        {'start': 4.5, 'end': 6.0, 'text': 'two and'},
+        {'start': 6.0, 'end': 8.0, 'text': 'three.'},
+        {'start': 9.0, 'end': 10.0, 'text': 'Four'},
+    ]}
+    index = BoundaryIndex(transcript, [(8.0, 9.0), (3.0, 3.5)])
+    assert index.starts.tolist() == [1.0, 3.5, 4.5, 9.0]
+
+
+def test_select_clips_starts_on_boundaries_and_prefers_the_burst():
+    n, hop = 400, 0.5
+    energy = np.full(n, 1.0)
+    energy[240:300] = 50.0  # 120-150 s
+    tl = FeatureTimeline(hop, energy, np.full(n, 1.0), np.zeros(n), np.zeros(n))
+    index = BoundaryIndex(None, [(10.0, 12.0), (40.0, 41.0), (95.0, 120.0), (150.5, 151.0), (170.0, 171.0)])
+    clips = select_clips(tl, index, min_dur=20.0, max_dur=40.0, max_clips=1, media_dur=200.0)
+    assert clips == [(120.0, 30.5, pytest.approx(clips[0][2]))]
+    assert all(s in index.starts for s, _, _ in select_clips(tl, index, 20.0, 40.0, max_clips=3))
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+pytest.importorskip('librosa')
+pytest.importorskip('cv2')
+
+from src import service as service_mod
+from src.service import PipelineService, run_job
+
+
+def _wait(service, job, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status not in ('done', 'failed') and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def _service(runner, **kw):
+    service = PipelineService(preload_models=[], runner=runner, **kw)
+    service.start()
+    return service
+
+
+def test_runner_returning_none_fails_the_job_and_keeps_the_worker():
+    results = iter([None, ['out.mp4']])
+    service = _service(lambda params, config: next(results))
+    try:
+        first = _wait(service, service.submit({'input_path': 'a.mp4'}))
+        second = _wait(service, service.submit({'input_path': 'b.mp4'}))
+    finally:
+        service.stop()
+    assert first.status == 'failed' and first.error
+    assert second.status == 'done' and second.outputs == ['out.mp4']
+
+
+def test_runner_exception_is_reported():
+    def boom(params, config):
+        raise RuntimeError('no input')
+
+    service = _service(boom)
+    try:
+        job = _wait(service, service.submit({'input_path': 'a.mp4'}))
+    finally:
+        service.stop()
+    assert job.status == 'failed'
+    assert job.error == 'RuntimeError: no input'
+
+
+def test_finished_jobs_are_pruned_oldest_first():
+    service = _service(lambda params, config: [params['input_path']], keep_finished=2)
+    try:
+        jobs = [_wait(service, service.submit({'input_path': f'{i}.mp4'})) for i in range(4)]
+    finally:
+        service.stop()
+    assert [service.get(j.id) is not None for j in jobs] == [False, False, True, True]
+
+
+def test_finished_jobs_expire_after_ttl():
+    service = _service(lambda params, config: ['out.mp4'], finished_ttl=0.0)
+    try:
+        old = _wait(service, service.submit({'input_path': 'a.mp4'}))
+        time.sleep(0.01)
+        new = service.submit({'input_path': 'b.mp4'})
+        assert service.get(old.id) is None
+        _wait(service, new)
+    finally:
+        service.stop()
+
+
+def test_render_workers_is_rejected_for_single_clip_jobs():
+    service = PipelineService(preload_models=[], runner=lambda params, config: [])
+    with pytest.raises(ValueError, match='render_workers'):
+        service.submit({'input_path': 'a.mp4', 'render_workers': 4})
+    assert service.submit({'input_path': 'a.mp4', 'multi': True, 'render_workers': 4}).status == 'queued'
+    assert service.submit({'input_path': 'a.mp4', 'render_workers': None}).status == 'queued'
+
+
+def test_single_clip_jobs_pass_ffmpeg_threads(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(service_mod, 'run_pipeline', lambda **kw: seen.update(kw) or 'out.mp4')
+    assert run_job({'input_path': 'a.mp4', 'ffmpeg_threads': 2, 'max_clips': 3}, 'conf.yaml') == ['out.mp4']
+    assert seen == {'config_path': 'conf.yaml', 'input_path': 'a.mp4', 'ffmpeg_threads': 2}
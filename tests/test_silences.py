@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from src.analysis.semantic import ActivityMap, silences_from_ms_energy
+
+
+def pydub_reference(power, min_len, db_drop, reference_power=None):
+    """pydub.silence.detect_silence (seek_step=1) transcribed onto per-millisecond mean power."""
+    n = len(power)
+    if n < min_len:
+        return []
+    ref = float(np.mean(power)) if reference_power is None else reference_power
+    thresh = ref * 10.0 ** (-db_drop / 10.0)
+    starts = [i for i in range(n - min_len + 1) if float(np.mean(power[i:i + min_len])) <= thresh]
+    if not starts:
+        return []
+    ranges = []
+    prev = cur = starts.pop(0)
+    for s in starts:
+        if s != prev + 1 and s > prev + min_len:
+            ranges.append((cur, prev + min_len))
+            cur = s
+        prev = s
+    ranges.append((cur, prev + min_len))
+    return [(a / 1000.0, b / 1000.0) for a, b in ranges]
+
+
+def detect(power, min_len, db_drop=0.0, frames_per_ms=1, **kw):
+    power = np.asarray(power, dtype=np.float64)
+    frames = np.full(len(power), frames_per_ms, dtype=np.float64)
+    return silences_from_ms_energy(power * frames, frames, min_len, db_drop, **kw)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_pydub_on_random_signals(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(10):
+        n = int(rng.integers(1, 200))
+        min_len = int(rng.integers(1, 25))
+        db_drop = float(rng.choice([3.0, 6.0, 10.0, 16.0]))
+        if rng.random() < 0.5:
+            power = rng.choice([0.0, 0.001, 0.05, 0.3, 1.0], size=n)  # gated tone levels
+        else:
+            power = rng.exponential(1.0, size=n) * (rng.random(n) < 0.4)  # sparse bursts
+        assert detect(power, min_len, db_drop, frames_per_ms=int(rng.integers(1, 48))) == pydub_reference(
+            power, min_len, db_drop,
+        )
+
+
+@pytest.mark.parametrize('gap, expected', [
+    (9, []),  # one ms short of min_silence_len: no window fits
+    (10, [(0.02, 0.03)]),
+    (11, [(0.02, 0.031)]),
+])
+def test_gap_at_min_silence_len(gap, expected):
+    # one loud millisecond lifts any window above the threshold
+    power = [20.0] * 20 + [0.0] * gap + [20.0] * 20
+    assert detect(power, 10, reference_power=1.0) == expected == pydub_reference(power, 10, 0.0, 1.0)
+
+
+def test_track_of_exactly_min_silence_len():
+    assert detect([0.0] * 10, 10, reference_power=1.0) == [(0.0, 0.01)]
+    assert detect([0.0] * 9, 10, reference_power=1.0) == []
+
+
+def test_window_at_the_threshold_is_silent():
+    # drop 0 dB: the threshold is reference_power itself; dyadic values keep the means exact
+    at = [1.0, 0.5, 1.5, 1.0]  # window mean 1.0 == threshold
+    above = [1.0, 0.5, 1.5, 1.0 + 2 ** -20]
+    assert detect(at, 4, reference_power=1.0) == [(0.0, 0.004)]
+    assert detect(above, 4, reference_power=1.0) == []
+    assert pydub_reference(at, 4, 0.0, reference_power=1.0) == [(0.0, 0.004)]
+
+
+def test_overlapping_runs_merge():
+    # windows holding both bursts are loud, windows holding one are quiet: two runs of silent
+    # window starts whose intervals overlap, reported as one silence like pydub
+    power = [0.0] * 4 + [3.0, 0.0, 3.0] + [0.0] * 4
+    assert detect(power, 4, reference_power=1.0) == [(0.0, 0.011)] == pydub_reference(power, 4, 0.0, 1.0)
+
+
+def test_runs_farther_apart_than_min_silence_len_stay_separate():
+    power = [0.0] * 10 + [5.0] + [0.0] * 10
+    assert detect(power, 4, reference_power=1.0) == [(0.0, 0.01), (0.011, 0.021)]
+
+
+def test_short_trailing_millisecond_is_dropped():
+    # pydub rounds the track length to whole milliseconds: a last bin under half full does not count
+    energy = np.array([0.0] * 10 + [0.0])
+    frames = np.array([16.0] * 10 + [7.0])
+    assert silences_from_ms_energy(energy, frames, 10, 0.0, reference_power=1.0) == [(0.0, 0.01)]
+    frames[-1] = 8.0
+    assert silences_from_ms_energy(energy, frames, 10, 0.0, reference_power=1.0) == [(0.0, 0.011)]
+
+
+def test_offset_shifts_intervals():
+    assert detect([0.0] * 10, 10, reference_power=1.0, offset_ms=2500) == [(2.5, 2.51)]
+
+
+def test_activity_map_queries():
+    amap = ActivityMap([(5.0, 6.0), (1.0, 2.0)])
+    assert amap.silences == [(1.0, 2.0), (5.0, 6.0)]
+    assert amap.is_silent(1.0) and not amap.is_silent(2.0)  # [start, end)
+    assert amap.is_speech(0.5) and amap.is_speech(3.0)
+    assert amap.first_silence_start(1.5, 5.0) == 5.0
+    assert amap.first_silence_start(0.0, 0.9) is None
+    assert amap.silent_fraction(0.0, 10.0) == pytest.approx(0.2)
+    assert amap.silent_fraction(1.5, 5.5) == pytest.approx(0.25)
+    assert amap.silent_fraction(2.0, 5.0) == 0.0
+    assert len(ActivityMap()) == 0 and ActivityMap().silent_fraction(0.0, 1.0) == 0.0
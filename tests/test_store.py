@@ -0,0 +1,111 @@
+import json
+import os
+import time
+
+from src.ingest.store import EVICT_GRACE_SEC, RawStore, video_id_from_url
+
+
+def _file(tmp_path, name, data=None, size=100):
+    p = tmp_path / 'raw' / name
+    p.parent.mkdir(exist_ok=True)
+    p.write_bytes(data if data is not None else os.urandom(size))
+    return str(p)
+
+
+def _backdate(store, **ages_sec):
+    """Set each id's last_used (and its file's mtime) ages_sec[id] seconds into the past."""
+    with open(store.index_path) as f:
+        index = json.load(f)
+    now = time.time()
+    for vid, age in ages_sec.items():
+        e = index['entries'][vid]
+        e['last_used'] = e['added'] = now - age
+        os.utime(e['path'], (now - age, now - age))
+    with open(store.index_path, 'w') as f:
+        json.dump(index, f)
+
+
+def _ids(store):
+    with open(store.index_path) as f:
+        return sorted(json.load(f)['entries'])
+
+
+def test_add_and_lookup(tmp_path):
+    store = RawStore(str(tmp_path / 'raw'))
+    path = _file(tmp_path, 'vid000001.mp4')
+    entry = store.add('vid000001', path, license='creativeCommon')
+    assert entry['path'] == path and entry['size'] == 100 and entry['license'] == 'creativeCommon'
+    _backdate(store, vid000001=600)
+    hit = store.lookup('vid000001')
+    assert hit['path'] == path and hit['last_used'] > time.time() - 5
+    assert store.lookup('unknown01') is None
+    os.remove(path)
+    assert store.lookup('vid000001') is None
+    assert _ids(store) == []
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = RawStore(str(tmp_path / 'raw'))
+    data = os.urandom(100)
+    first = _file(tmp_path, 'orig00001.mp4', data)
+    second = _file(tmp_path, 'reupload1.mp4', data)
+    store.add('orig00001', first)
+    entry = store.add('reupload1', second)
+    assert entry['path'] == first
+    assert not os.path.exists(second) and os.path.exists(first)
+    # re-adding an id with its own file keeps that file
+    assert store.add('orig00001', first)['path'] == first and os.path.exists(first)
+    # different content gets its own file
+    other = _file(tmp_path, 'other0001.mp4', os.urandom(100))
+    assert store.add('other0001', other)['path'] == other
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    store = RawStore(str(tmp_path / 'raw'), max_bytes=250)
+    paths = {vid: _file(tmp_path, f'{vid}.mp4') for vid in ('old000001', 'mid000001', 'new000001')}
+    for vid, p in paths.items():
+        store.add(vid, p)
+    assert _ids(store) == ['mid000001', 'new000001', 'old000001']  # 300 bytes: all within the grace period
+    _backdate(store, old000001=3 * EVICT_GRACE_SEC, mid000001=2 * EVICT_GRACE_SEC, new000001=1.5 * EVICT_GRACE_SEC)
+    store.add('add000001', _file(tmp_path, 'add000001.mp4'))
+    # 400 bytes over a 250 cap: the two least recently used go
+    assert _ids(store) == ['add000001', 'new000001']
+    assert not os.path.exists(paths['old000001']) and not os.path.exists(paths['mid000001'])
+    assert os.path.exists(paths['new000001'])
+
+
+def test_recently_used_entries_survive_the_cap(tmp_path):
+    store = RawStore(str(tmp_path / 'raw'), max_bytes=150)
+    a = _file(tmp_path, 'aaaaaa001.mp4')
+    store.add('aaaaaa001', a)
+    _backdate(store, aaaaaa001=EVICT_GRACE_SEC - 60)
+    store.add('bbbbbb001', _file(tmp_path, 'bbbbbb001.mp4'))
+    # over the cap, but the older entry was used within the grace period
+    assert _ids(store) == ['aaaaaa001', 'bbbbbb001'] and os.path.exists(a)
+    # a lookup refreshes it, so it is still not evicted once it ages past the grace period otherwise
+    _backdate(store, aaaaaa001=EVICT_GRACE_SEC + 60, bbbbbb001=EVICT_GRACE_SEC + 120)
+    store.lookup('aaaaaa001')
+    store.add('cccccc001', _file(tmp_path, 'cccccc001.mp4'))
+    assert _ids(store) == ['aaaaaa001', 'cccccc001']
+
+
+def test_shared_file_is_kept_while_another_id_uses_it(tmp_path):
+    store = RawStore(str(tmp_path / 'raw'), max_bytes=150)
+    data = os.urandom(100)
+    shared = _file(tmp_path, 'orig00001.mp4', data)
+    store.add('orig00001', shared)
+    store.add('reupload1', _file(tmp_path, 'reupload1.mp4', data))
+    _backdate(store, orig00001=3 * EVICT_GRACE_SEC, reupload1=60)
+    store.add('other0001', _file(tmp_path, 'other0001.mp4'))
+    # the older id is evicted, but its file stays for the id that shares it
+    assert _ids(store) == ['other0001', 'reupload1']
+    assert os.path.exists(shared)
+    assert store.lookup('reupload1')['path'] == shared
+
+
+def test_video_id_from_url():
+    assert video_id_from_url('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10') == 'dQw4w9WgXcQ'
+    assert video_id_from_url('https://youtu.be/dQw4w9WgXcQ') == 'dQw4w9WgXcQ'
+    assert video_id_from_url('https://youtube.com/shorts/dQw4w9WgXcQ') == 'dQw4w9WgXcQ'
+    assert video_id_from_url('https://www.youtube.com/channel/UC123456') is None
+    assert video_id_from_url('https://example.com/watch?v=dQw4w9WgXcQ') is None
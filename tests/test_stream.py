@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.analysis import stream
+from src.analysis.stream import RunningBins, stream_audio_features
+
+
+def _uneven_blocks(x, seed=0):
+    """Split x at random points, including empty and single-sample blocks."""
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.integers(0, len(x) + 1, size=max(1, len(x) // 50)))
+    return np.split(x, np.concatenate(([0, 0, 1], cuts)))
+
+
+@pytest.mark.parametrize('num, den', [(800, 1), (441, 1), (7, 1), (48000, 1000), (44100, 1000), (3, 2), (1, 1)])
+def test_running_bins_match_bincount(num, den):
+    x = np.random.default_rng(1).uniform(0, 1, 10007)
+    bins = RunningBins(num, den)
+    for block in _uneven_blocks(x):
+        bins.feed(block)
+    sums, counts = bins.finish()
+    idx = np.arange(len(x)) * den // num
+    np.testing.assert_allclose(sums, np.bincount(idx, weights=x), rtol=1e-12)
+    np.testing.assert_array_equal(counts, np.bincount(idx))
+
+
+def test_closed_bins_exclude_the_open_one():
+    bins = RunningBins(4)
+    bins.feed(np.ones(10))
+    sums, counts = bins.closed()
+    assert sums.tolist() == [4.0, 4.0] and counts.tolist() == [4, 4]
+    bins.feed(np.ones(2))
+    assert bins.closed()[1].tolist() == [4, 4]
+    assert bins.finish()[1].tolist() == [4, 4, 4]
+
+
+def test_fewer_than_one_sample_per_bin_is_rejected():
+    with pytest.raises(ValueError):
+        RunningBins(1, 2)
+    with pytest.raises(ValueError):
+        RunningBins(10, 0)
+
+
+def _fake_pcm(monkeypatch, pcm, sr):
+    monkeypatch.setattr(stream, 'probe_audio', lambda path: (sr, pcm.shape[1]))
+    monkeypatch.setattr(stream, 'iter_pcm_blocks', lambda path, sr, channels, block_sec: iter(_uneven_blocks(pcm, seed=2)))
+
+
+def test_stream_features_match_whole_track_sums(monkeypatch):
+    sr, hop_sec = 8000, 0.25
+    pcm = np.random.default_rng(3).normal(0, 0.1, (sr * 5 + 123, 2)).astype(np.float32)
+    _fake_pcm(monkeypatch, pcm, sr)
+    feats = stream_audio_features('src.wav', hop_sec=hop_sec, per_ms=True)
+
+    mono = pcm.mean(axis=1, dtype=np.float64)
+    hop = int(round(hop_sec * sr))
+    idx = np.arange(0, len(mono), hop)
+    np.testing.assert_allclose(feats.hop_energy, np.add.reduceat(mono * mono, idx), rtol=1e-9)
+    np.testing.assert_array_equal(feats.hop_samples, np.diff(np.append(idx, len(mono))))
+    ms = np.arange(len(pcm)) * 1000 // sr
+    np.testing.assert_allclose(feats.ms_energy, np.bincount(ms, weights=np.square(pcm, dtype=np.float64).mean(axis=1)), rtol=1e-6)
+    np.testing.assert_array_equal(feats.ms_frames, np.bincount(ms))
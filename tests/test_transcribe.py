@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from src.analysis.cache import AnalysisCache
+from src.analysis.transcribe import (
+    LAST_CHUNK_FACTOR, LAZY_MIN_SEC, MAX_CHUNK_FACTOR, LazyTranscript, merge_chunks, plan_chunks,
+)
+
+
+def assert_tiles(chunks, media_dur):
+    assert chunks[0][0] == 0.0 and chunks[-1][1] == media_dur
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(chunks, chunks[1:]))
+    assert all(a < b for a, b in chunks)
+
+
+def test_short_source_is_one_chunk():
+    assert plan_chunks([(50.0, 51.0)], 120.0 * LAST_CHUNK_FACTOR, 120.0) == [(0.0, 180.0)]
+
+
+def test_cuts_at_the_silence_middle_closest_to_chunk_sec():
+    # middles 71, 111, 128 and 251: 128 is nearest to 120, then 251 is nearest to 128 + 120
+    silences = [(70.0, 72.0), (110.0, 112.0), (125.0, 131.0), (250.0, 252.0)]
+    assert plan_chunks(silences, 400.0, 120.0) == [(0.0, 128.0), (128.0, 251.0), (251.0, 400.0)]
+
+
+def test_without_silences_cuts_every_chunk_sec():
+    assert plan_chunks([], 400.0, 120.0) == [(0.0, 120.0), (120.0, 240.0), (240.0, 400.0)]
+    # silences outside [start + chunk/2, start + chunk * MAX_CHUNK_FACTOR] are not used
+    assert plan_chunks([(10.0, 12.0)], 400.0, 120.0)[0] == (0.0, 120.0)
+    far = 120.0 * MAX_CHUNK_FACTOR + 5.0
+    assert plan_chunks([(far, far + 2.0)], 400.0, 120.0)[0] == (0.0, 120.0)
+
+
+def test_a_silence_past_the_end_does_not_cut():
+    assert plan_chunks([(290.0, 310.0)], 300.0, 100.0) == [(0.0, 100.0), (100.0, 200.0), (200.0, 300.0)]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_chunks_tile_the_source(seed):
+    rng = np.random.default_rng(seed)
+    media_dur = float(rng.uniform(10, 7200))
+    starts = np.sort(rng.uniform(0, media_dur, int(rng.integers(0, 300))))
+    silences = [(s, s + float(rng.uniform(0.3, 4.0))) for s in starts]
+    chunk_sec = float(rng.choice([30.0, 120.0, 600.0]))
+    chunks = plan_chunks(silences, media_dur, chunk_sec)
+    assert_tiles(chunks, media_dur)
+    assert all(chunk_sec / 2 <= b - a <= chunk_sec * MAX_CHUNK_FACTOR for a, b in chunks[:-1])
+    assert chunks[-1][1] - chunks[-1][0] <= chunk_sec * max(MAX_CHUNK_FACTOR, LAST_CHUNK_FACTOR)
+
+
+def test_merge_shifts_chunks_onto_the_source_timeline():
+    res = [
+        {'language': 'en', 'segments': [{'id': 0, 'start': 1.0, 'end': 2.0, 'text': ' a.', 'words': [{'word': ' a.', 'start': 1.0, 'end': 2.0}]}]},
+        {'segments': [{'id': 0, 'start': 0.5, 'end': 1.5, 'text': ' b.'}]},
+    ]
+    merged = merge_chunks(res, [(0.0, 100.0), (100.0, 200.0)])
+    assert [(s['id'], s['start'], s['end']) for s in merged['segments']] == [(0, 1.0, 2.0), (1, 100.5, 101.5)]
+    assert merged['segments'][0]['words'][0]['start'] == 1.0
+    assert merged['text'] == ' a. b.' and merged['language'] == 'en'
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    """Whisper 'transcribes' a range as one segment spanning it; returns the list of ranges run."""
+    from src.analysis import transcribe
+    calls = []
+
+    def chunk(path, start, end, model):
+        calls.append((start, end))
+        return {'segments': [{'start': 0.0, 'end': end - start, 'text': f' {start:g}-{end:g}.'}]}
+
+    monkeypatch.setattr(transcribe, 'whisper', object())
+    monkeypatch.setattr(transcribe, '_transcribe_chunk', chunk)
+    return calls
+
+
+def test_lazy_ranges_are_widened_and_merged(fake_whisper):
+    lazy = LazyTranscript('a.mp4', media_dur=600.0)
+    lazy.ensure(10.0, 20.0)
+    assert fake_whisper == [(10.0, 10.0 + LAZY_MIN_SEC)]  # short ranges grow to what Whisper decodes anyway
+    lazy.ensure(15.0, 35.0)  # already covered
+    lazy.ensure(30.0, 80.0)  # only the uncovered tail runs
+    assert fake_whisper == [(10.0, 40.0), (40.0, 80.0)]
+    assert lazy.covered == [(10.0, 80.0)]
+    lazy.ensure(200.0, 240.0)
+    lazy.ensure(80.0, 200.0)  # fills the hole between two covered ranges exactly
+    assert fake_whisper[-1] == (80.0, 200.0)
+    assert lazy.covered == [(10.0, 240.0)]
+    assert lazy.transcribed_sec == pytest.approx(230.0)
+
+
+def test_lazy_ranges_snap_to_silences_but_not_into_covered_time(fake_whisper):
+    # silence middles at 95 and 152; both within LAZY_SNAP_SEC of the requested range
+    lazy = LazyTranscript('a.mp4', silences=[(94.0, 96.0), (151.0, 153.0)], media_dur=600.0)
+    lazy.ensure(100.0, 145.0)
+    assert fake_whisper == [(95.0, 152.0)]
+    lazy.ensure(40.0, 100.0)
+    assert fake_whisper[-1] == (40.0, 95.0)  # ends where the covered range starts
+    assert lazy.covered == [(40.0, 152.0)]
+
+
+def test_lazy_ranges_are_clamped_to_the_media(fake_whisper):
+    lazy = LazyTranscript('a.mp4', media_dur=600.0)
+    lazy.ensure(590.0, 700.0)
+    lazy.ensure(-5.0, 1.0)
+    assert fake_whisper == [(590.0, 600.0), (0.0, LAZY_MIN_SEC)]
+
+
+def test_lazy_transcript_returns_everything_transcribed_in_source_time(fake_whisper):
+    lazy = LazyTranscript('a.mp4', media_dur=600.0)
+    out = lazy.transcript([(300.0, 340.0), (0.0, 40.0)])
+    assert [(s['id'], s['start'], s['end']) for s in out['segments']] == [(0, 0.0, 40.0), (1, 300.0, 340.0)]
+    assert out['text'] == ' 0-40. 300-340.'
+
+
+def test_lazy_ranges_are_cached_across_instances(fake_whisper, tmp_path):
+    src = tmp_path / 'a.mp4'
+    src.write_bytes(b'video')
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    LazyTranscript(str(src), media_dur=600.0, cache=cache).ensure(0.0, 60.0)
+    again = LazyTranscript(str(src), media_dur=600.0, cache=cache)
+    assert again.transcript([(0.0, 60.0)])['segments'][0]['end'] == 60.0
+    assert fake_whisper == [(0.0, 60.0)]
+
+
+def test_lazy_transcript_without_whisper(monkeypatch):
+    from src.analysis import transcribe
+    monkeypatch.setattr(transcribe, 'whisper', None)
+    lazy = LazyTranscript('a.mp4', media_dur=600.0)
+    assert lazy.transcript([(0.0, 60.0)]) is None and lazy.covered == []
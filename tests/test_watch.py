@@ -0,0 +1,51 @@
+import dataclasses
+import os
+
+import pytest
+
+pytest.importorskip('librosa')
+pytest.importorskip('cv2')
+
+from src import watch as watch_mod
+from src.pipeline import load_config
+
+CONFIG = os.path.join(os.path.dirname(__file__), '..', 'configs', 'pipeline.yaml')
+VIDEO = {'codec_type': 'video', 'width': 1280, 'height': 720, 'avg_frame_rate': '30000/1001', 'r_frame_rate': '30/1'}
+
+
+@pytest.fixture
+def conf():
+    return load_config(CONFIG, 'tiktok')
+
+
+def test_full_motion_samples_source_frames(conf):
+    full = dataclasses.replace(conf, motion_mode='full')
+    assert watch_mod._motion_sampling(VIDEO, full) == (1280, 720, pytest.approx(29.97, abs=1e-3))
+    growing = dict(VIDEO, avg_frame_rate='0/0')
+    assert watch_mod._motion_sampling(growing, full)[2] == 30.0
+
+
+def test_fast_motion_samples_small_frames(conf):
+    fast = dataclasses.replace(conf, motion_mode='fast')
+    assert watch_mod._motion_sampling(VIDEO, fast) == (fast.motion_width, fast.motion_height, fast.motion_fps)
+
+
+def test_sessions_get_their_own_directories(conf, tmp_path, monkeypatch):
+    seen = []
+
+    def feed(path, live, info, frame_size, idle_timeout_sec, state):
+        seen.append((os.listdir(tmp_path / 'work' / 'live'), frame_size, live.motion_fps))
+        state.done = True
+
+    monkeypatch.setattr(watch_mod, 'WORK_DIR', str(tmp_path / 'work'))
+    monkeypatch.setattr(watch_mod, 'probe_audio', lambda path: None)
+    monkeypatch.setattr(watch_mod, '_video_stream', lambda path: VIDEO)
+    monkeypatch.setattr(watch_mod, '_feed_file', feed)
+    full = dataclasses.replace(conf, motion_mode='full')
+    for _ in range(2):
+        assert watch_mod.watch('rec/stream.ts', full, poll_sec=0.01) == []
+    (first,), size, fps = seen[0]
+    (second,), _, _ = seen[1]
+    assert first != second and first.startswith('stream_') and second.startswith('stream_')
+    assert size == (1280, 720) and fps == pytest.approx(29.97, abs=1e-3)
+    assert os.listdir(tmp_path / 'work' / 'live') == []  # removed when the session ends